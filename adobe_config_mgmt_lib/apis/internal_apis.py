@@ -1,20 +1,107 @@
-from typing import List, Union
+import asyncio
+import json
+from typing import List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Body, Path, status
-from starlette.responses import JSONResponse, Response
+from fastapi import APIRouter, Body, Header, Path, Query, Request, WebSocket, status
+from starlette.responses import JSONResponse, Response, StreamingResponse
 from structlog import get_logger
 
+from adobe_config_mgmt_lib.core.config import settings
 from adobe_config_mgmt_lib.core.service_config import service_config_mgmt
+from adobe_config_mgmt_lib.core.service_config.delta_sync import (
+    SyncVersionExpiredError,
+    current_sync_version,
+    parse_since,
+)
+from adobe_config_mgmt_lib.core.service_config.etag import (
+    etag_matches,
+    make_etag,
+    parse_if_match,
+)
+from adobe_config_mgmt_lib.core.service_config.events import Subscription, Topic
+from adobe_config_mgmt_lib.core.service_config.response_cache import response_cache
+from adobe_config_mgmt_lib.dal.config_patch import (
+    JSON_PATCH,
+    JSON_PATCH_MEDIA_TYPE,
+    MERGE_PATCH,
+    MERGE_PATCH_MEDIA_TYPE,
+    InvalidPatchError,
+)
+from adobe_config_mgmt_lib.dal.exceptions import (
+    ConfigVersionConflictError,
+    PatchConflictError,
+)
+from adobe_config_mgmt_lib.dal.projection import parse_fields, project_item
 from adobe_config_mgmt_lib.models.configs.service_config import (
+    BatchGetPayload,
+    BatchGetResponse,
+    ConfigChangesResponse,
+    ImportResponse,
+    ServiceConfigKey,
     ServiceConfigPayload,
     ServiceConfigResponse,
+    ServiceHeadsPayload,
+    ServiceHeadsResponse,
 )
 from adobe_config_mgmt_lib.models.generic.empty_response import EmptyResponse
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_ITEMS_KEY,
+    HEAD_VERSION_KEY,
+    READ_CONSISTENCY_MODES,
+    SERVICE_ID_REGEX,
+    STRONG_CONSISTENCY,
+    SYNC_VERSION_HEADER,
+    SYNC_VERSION_KEY,
+    VERSION_KEY,
+)
 
 app = APIRouter()
 
 logger = get_logger(__name__)
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+FIELDS_DESCRIPTION = (
+    "Comma separated paths within the config, e.g. 'db.pool,features', "
+    "to return only these parts of the config"
+)
+CONSISTENCY_DESCRIPTION = (
+    "'strong' to read the latest writes, 'eventual' for a cheaper read which "
+    "may miss the very last writes. Defaults to the server setting"
+)
+CONSISTENCY_REGEX = "^(" + "|".join(READ_CONSISTENCY_MODES) + ")$"
+SERVICE_VERSION_HEADER = "X-Service-Version"
+WATCH_DESCRIPTION = (
+    "With a version, wait until the config is written past this version, "
+    "or until the timeout, which returns 304"
+)
+WATCH_SERVICE_DESCRIPTION = (
+    f"With a version, wait until any config of the service is written past "
+    f"this {SERVICE_VERSION_HEADER}, or until the timeout, which returns 304"
+)
+WATCH_VERSION_DESCRIPTION = "The version held by the client, to watch for a newer one"
+WATCH_TIMEOUT_DESCRIPTION = "The max number of seconds to wait, when watching"
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+HEARTBEAT_EVENT = "heartbeat"
+EVENT_SERVICES_DESCRIPTION = "The services whose config changes to receive"
+EVENT_CONFIGS_DESCRIPTION = (
+    "The configs whose changes to receive, as 'service_id/config_name'"
+)
+JSON_MEDIA_TYPE = "application/json"
+SINCE_DESCRIPTION = (
+    f"A {SYNC_VERSION_HEADER} or an ISO 8601 timestamp, to return only the "
+    "configs changed after it, the deleted ones included"
+)
+GZIP_ENCODING = "gzip"
+# Marks the configs served from their last known state, see RFC 7234
+STALE_WARNING = '110 - "Response is Stale"'
+
+
+def _consistent_read(consistency: Optional[str]) -> Optional[bool]:
+    if consistency is None:
+        return None
+    return consistency == STRONG_CONSISTENCY
+
 
 """
 NOTE:
@@ -35,12 +122,13 @@ If this will only be imported as a library, we can skip the APIs
     },
 )
 # @auth_check
-def add_service_configs(
+async def add_service_configs(
     response: Response,
     service_id: str = Path(
         ...,
         title="Service ID",
         description="The unique ID associated with the service",
+        regex=SERVICE_ID_REGEX,
     ),
     config_name: str = Path(
         title="The config name",
@@ -48,7 +136,7 @@ def add_service_configs(
     ),
     config: ServiceConfigPayload = Body(..., title="The config payload"),
 ):
-    result = service_config_mgmt.add_service_config(
+    result = await service_config_mgmt.add_service_config_async(
         service_id=service_id, config_name=config_name, config_data=config
     )
     if not result:
@@ -66,6 +154,11 @@ def add_service_configs(
     "/{service_id}/configs",
     status_code=status.HTTP_200_OK,
     summary="Get all the configs of the service",
+    description=(
+        f"The configs are returned along with their {SYNC_VERSION_HEADER}. With "
+        "it as 'since', only the configs changed after it are returned, "
+        "as the changes of `GET /configs/changes`."
+    ),
     response_model=Union[List[ServiceConfigResponse], EmptyResponse],
     responses={
         status.HTTP_200_OK: {
@@ -77,14 +170,63 @@ def add_service_configs(
 )
 # @auth_check
 async def get_service_config_all(
+    request: Request,
     response: Response,
     service_id: str = Path(
         ...,
         title="Service ID",
         description="The unique ID associated with the service",
+        regex=SERVICE_ID_REGEX,
     ),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Return a single page of at most this many configs",
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Resume after the page that returned this {NEXT_CURSOR_HEADER}",
+    ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    consistency: Optional[str] = Query(
+        None, regex=CONSISTENCY_REGEX, description=CONSISTENCY_DESCRIPTION
+    ),
+    watch: bool = Query(False, description=WATCH_SERVICE_DESCRIPTION),
+    version: Optional[int] = Query(
+        None, description=f"The {SERVICE_VERSION_HEADER} held by the client"
+    ),
+    timeout: Optional[float] = Query(None, ge=0, description=WATCH_TIMEOUT_DESCRIPTION),
+    since: Optional[str] = Query(None, description=SINCE_DESCRIPTION),
 ):
-    result = service_config_mgmt.get_all_service_config(service_id=service_id)
+    if since is not None:
+        return await _config_changes(since, limit, service_id)
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        logger.info("Invalid fields.", service_id=service_id, error=str(e))
+        response.status_code = 400
+        return EmptyResponse()
+    consistent_read = _consistent_read(consistency)
+    if watch and version is not None:
+        not_modified = await _watch_service(service_id, version, timeout)
+        if not_modified:
+            return not_modified
+        # The cache may not have seen the change yet
+        consistent_read = True
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return await _stream_service_config_all(
+            response, service_id, projection, consistent_read
+        )
+
+    if limit or cursor:
+        result = await _get_service_config_page(
+            response, service_id, limit, cursor, projection, consistent_read
+        )
+    else:
+        result = await _get_versioned_service_config(
+            response, service_id, projection, consistent_read
+        )
     if not result:
         logger.info(
             "No config entries found for the given service.", service_id=service_id,
@@ -94,34 +236,235 @@ async def get_service_config_all(
     return result
 
 
+async def _get_versioned_service_config(
+    response: Response,
+    service_id: str,
+    projection: Optional[list],
+    consistent_read: Optional[bool],
+):
+    """
+    Reads all the configs of the service, along with its service and sync versions
+    :param response:
+    :param service_id:
+    :param projection: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return: the configs
+    """
+
+    async def read():
+        # Taken before the read, the configs are at least as recent
+        sync_version = current_sync_version(settings.delta_sync_settle_seconds)
+        head, items = await service_config_mgmt.get_versioned_service_config_async(
+            service_id=service_id, fields=projection, consistent_read=consistent_read
+        )
+        return {
+            HEAD_VERSION_KEY: head,
+            SYNC_VERSION_KEY: sync_version,
+            CONFIG_ITEMS_KEY: items,
+        }
+
+    versioned, age = await service_config_mgmt.read_or_stale_async(
+        (service_id, None),
+        read,
+        remember=projection is None,
+        allow_stale=not consistent_read,
+    )
+    response.headers[SERVICE_VERSION_HEADER] = str(versioned[HEAD_VERSION_KEY])
+    response.headers[SYNC_VERSION_HEADER] = str(versioned[SYNC_VERSION_KEY])
+    if age is None:
+        return versioned[CONFIG_ITEMS_KEY]
+    _mark_stale(response, age)
+    return [project_item(item, projection) for item in versioned[CONFIG_ITEMS_KEY]]
+
+
+async def _config_changes(
+    since: str, limit: Optional[int], service_id: Optional[str] = None
+) -> Response:
+    """
+    Reads the configs changed after a sync version
+    :param since: the sync version, or an ISO 8601 timestamp
+    :param limit: the max number of changes, None for the default page size
+    :param service_id: the service to read the changes of, None for all the services
+    :return: the changes, 400 for an invalid since, 410 for one older than the
+        retention of the deleted configs
+    """
+    try:
+        (
+            changes,
+            sync_version,
+            more,
+        ) = await service_config_mgmt.get_config_changes_async(
+            since=parse_since(since), service_id=service_id, limit=limit
+        )
+    except ValueError as e:
+        logger.info("Invalid since.", since=since, error=str(e))
+        return JSONResponse(status_code=400, content={})
+    except SyncVersionExpiredError as e:
+        logger.info("Expired sync version.", since=since, service_id=service_id)
+        return JSONResponse(
+            status_code=e.status_code, content={"status": False, "message": e.message}
+        )
+    body = ConfigChangesResponse(changes=changes, sync_version=sync_version, more=more)
+    return Response(
+        body.json(),
+        media_type=JSON_MEDIA_TYPE,
+        headers={SYNC_VERSION_HEADER: str(sync_version)},
+    )
+
+
+async def _watch_service(
+    service_id: str, version: int, timeout: Optional[float]
+) -> Optional[Response]:
+    """
+    Waits for a config of the service to be written past the given service version
+    :param service_id:
+    :param version: the service version held by the client
+    :param timeout: the max number of seconds to wait, None for the default
+    :return: the 304 response if there was no write before the timeout
+    """
+    if await service_config_mgmt.watch_service_configs_async(
+        service_id, version, _watch_timeout(timeout)
+    ):
+        return None
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={SERVICE_VERSION_HEADER: str(version)},
+    )
+
+
+async def _get_service_config_page(
+    response: Response,
+    service_id: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+    projection: Optional[list],
+    consistent_read: Optional[bool],
+):
+    """
+    Reads a single page of the configs of the service
+    :param response:
+    :param service_id:
+    :param limit: the max number of configs, None for the default page size
+    :param cursor: the cursor of the page, None for the first page
+    :param projection: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return: the configs of the page, 400 if the cursor is invalid
+    """
+    try:
+        result, next_cursor = await service_config_mgmt.get_service_config_page_async(
+            service_id=service_id,
+            limit=limit or settings.config_page_size,
+            cursor=cursor,
+            fields=projection,
+            consistent_read=consistent_read,
+        )
+    except ValueError as e:
+        logger.info("Invalid cursor.", service_id=service_id, error=str(e))
+        response.status_code = 400
+        return EmptyResponse()
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return result
+
+
+async def _stream_service_config_all(
+    response: Response,
+    service_id: str,
+    projection: Optional[list] = None,
+    consistent_read: Optional[bool] = None,
+):
+    """
+    Streams the configs of the service as NDJSON, one page at a time
+    :param response:
+    :param service_id:
+    :param projection: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return:
+    """
+    items = service_config_mgmt.iter_service_config_async(
+        service_id=service_id, fields=projection, consistent_read=consistent_read
+    )
+    # Reading the first entry up front, so a missing service still gets a 404
+    try:
+        first_item = await items.__anext__()
+    except StopAsyncIteration:
+        logger.info(
+            "No config entries found for the given service.", service_id=service_id,
+        )
+        response.status_code = 404
+        return EmptyResponse()
+
+    async def ndjson_lines():
+        yield ServiceConfigResponse.parse_obj(first_item).json() + "\n"
+        async for item in items:
+            yield ServiceConfigResponse.parse_obj(item).json() + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
 @app.get(
     "/{service_id}/configs/{config_name}",
     status_code=status.HTTP_200_OK,
     summary="Fetch the specific config for the given service",
+    description=(
+        "With an If-None-Match header holding the ETag of the current config, "
+        "returns 304 without the config."
+    ),
     response_model=Union[ServiceConfigResponse, EmptyResponse],
     responses={
         status.HTTP_200_OK: {"model": ServiceConfigResponse},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not modified"},
         status.HTTP_404_NOT_FOUND: {"model": EmptyResponse},
         status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
     },
 )
 # @auth_check
-def get_service_config(
+async def get_service_config(
+    request: Request,
     response: Response,
     service_id: str = Path(
         ...,
         title="Service ID",
         description="The unique ID associated with the service",
+        regex=SERVICE_ID_REGEX,
     ),
     config_name: str = Path(
         title="The config name",
         description="The specific config name of the given service",
     ),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    consistency: Optional[str] = Query(
+        None, regex=CONSISTENCY_REGEX, description=CONSISTENCY_DESCRIPTION
+    ),
+    if_none_match: Optional[str] = Header(
+        None, description="The ETag of the config held by the client"
+    ),
+    watch: bool = Query(False, description=WATCH_DESCRIPTION),
+    version: Optional[int] = Query(None, description=WATCH_VERSION_DESCRIPTION),
+    timeout: Optional[float] = Query(None, ge=0, description=WATCH_TIMEOUT_DESCRIPTION),
 ):
-    result = service_config_mgmt.get_service_config_by_name(
-        service_id=service_id, config_name=config_name
+    try:
+        projection = parse_fields(fields)
+    except ValueError as e:
+        logger.info("Invalid fields.", service_id=service_id, error=str(e))
+        response.status_code = 400
+        return EmptyResponse()
+    item, age = await _read_config_item(
+        service_id, config_name, projection, _consistent_read(consistency)
     )
-    if not result:
+    if item is not None and watch and version is not None:
+        if int(item.get(VERSION_KEY, 0)) <= version:
+            if not await service_config_mgmt.watch_service_config_async(
+                service_id, config_name, version, _watch_timeout(timeout)
+            ):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers={"ETag": make_etag(item.get(VERSION_KEY, 0))},
+                )
+            item, age = await _read_config_item(
+                service_id, config_name, projection, True
+            )
+    if item is None:
         logger.info(
             "No config entries found for the given service.",
             service_id=service_id,
@@ -129,41 +472,540 @@ def get_service_config(
         )
         response.status_code = 404
         return EmptyResponse()
-    return result[0]
+    if etag_matches(if_none_match, int(item.get(VERSION_KEY, 0))):
+        result = Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": make_etag(item.get(VERSION_KEY, 0))},
+        )
+    else:
+        fields_key = tuple(map(tuple, projection)) if projection else None
+        result = _encoded_config_response(
+            request, (service_id, config_name, fields_key), item
+        )
+    return _mark_stale(result, age)
+
+
+async def _read_config_item(
+    service_id: str,
+    config_name: str,
+    projection: Optional[list],
+    consistent_read: Optional[bool],
+) -> Tuple[Optional[dict], Optional[float]]:
+    """
+    Reads a config, straight from the cache when it is there, so it is
+    served without leaving the event loop, or from its last known state
+    when the table can't be read in time
+    :param service_id:
+    :param config_name:
+    :param projection: the paths of the config to return, None for the whole config
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return: the config entry, None if there is no such config, and its age
+        in seconds when it is the last known one
+    """
+    if not consistent_read:
+        item = service_config_mgmt.peek_service_config(
+            service_id=service_id, config_name=config_name, fields=projection
+        )
+        if item is not None:
+            return item, None
+    result, age = await service_config_mgmt.read_or_stale_async(
+        (service_id, config_name),
+        lambda: service_config_mgmt.get_service_config_by_name_async(
+            service_id=service_id,
+            config_name=config_name,
+            fields=projection,
+            consistent_read=consistent_read,
+        ),
+        remember=projection is None,
+        allow_stale=not consistent_read,
+    )
+    if not result:
+        return None, age
+    if age is not None:
+        return project_item(result[0], projection), age
+    return result[0], None
+
+
+def _mark_stale(response: Response, age: Optional[float]) -> Response:
+    """
+    Marks a response holding the last known state of the configs as such
+    :param response:
+    :param age: the age of the configs in seconds, None if they are current
+    :return: the response
+    """
+    if age is not None:
+        response.headers["Age"] = str(int(age))
+        response.headers["Warning"] = STALE_WARNING
+    return response
+
+
+def _watch_timeout(timeout: Optional[float]) -> float:
+    if timeout is None:
+        return settings.watch_timeout_seconds
+    return min(timeout, settings.watch_max_timeout_seconds)
+
+
+def _encoded_config_response(request: Request, cache_key: tuple, item: dict):
+    """
+    Returns a config, re-using the bytes encoded for the same version of it
+    :param request:
+    :param cache_key: the service ID, config name and fields of the response
+    :param item: the config entry
+    :return:
+    """
+    version = int(item.get(VERSION_KEY, 0))
+    encoded = response_cache.get(cache_key, version)
+    if encoded is None:
+        body = ServiceConfigResponse.parse_obj(item).json(separators=(",", ":"))
+        encoded = response_cache.put(cache_key, version, body.encode("utf-8"))
+    headers = {"ETag": make_etag(version)}
+    if encoded.gzipped_body is None:
+        return Response(encoded.body, media_type=JSON_MEDIA_TYPE, headers=headers)
+    headers["Vary"] = "Accept-Encoding"
+    if GZIP_ENCODING not in request.headers.get("accept-encoding", ""):
+        return Response(encoded.body, media_type=JSON_MEDIA_TYPE, headers=headers)
+    headers["Content-Encoding"] = GZIP_ENCODING
+    return Response(encoded.gzipped_body, media_type=JSON_MEDIA_TYPE, headers=headers)
 
 
 @app.put(
     "/{service_id}/configs/{config_name}",
     status_code=status.HTTP_200_OK,
     summary="Update config for the given service",
+    description=(
+        "With an If-Match header holding the ETag of the config, the update only "
+        "applies if the config was not changed since, otherwise it fails with 412."
+    ),
     responses={
+        status.HTTP_400_BAD_REQUEST: {"model": EmptyResponse},
         status.HTTP_404_NOT_FOUND: {"model": EmptyResponse},
         status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
+        status.HTTP_412_PRECONDITION_FAILED: {"model": EmptyResponse},
     },
 )
 # @auth_check
-def update_service_configs(
+async def update_service_configs(
     response: Response,
     service_id: str = Path(
         ...,
         title="Service ID",
         description="The unique ID associated with the service",
+        regex=SERVICE_ID_REGEX,
     ),
     config_name: str = Path(
         title="The config name",
         description="The specific config name of the given service",
     ),
     config: ServiceConfigPayload = Body(..., title="The config payload"),
+    if_match: Optional[str] = Header(
+        None, description="The ETag the config is expected to be at"
+    ),
+):
+    try:
+        expected_version = parse_if_match(if_match)
+    except ValueError:
+        logger.info("Invalid If-Match header.", if_match=if_match)
+        response.status_code = 400
+        return EmptyResponse()
+    try:
+        result = await service_config_mgmt.update_service_config_async(
+            service_id=service_id,
+            config_name=config_name,
+            config=config.config,
+            expected_version=expected_version,
+        )
+    except ConfigVersionConflictError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"status": False, "message": e.message},
+            headers={"ETag": make_etag(e.current_version)},
+        )
+    if not result:
+        logger.info(
+            "No config entry found to update for the service.",
+            service_id=service_id,
+            config_name=config_name,
+        )
+        response.status_code = 404
+        return EmptyResponse()
+    return JSONResponse(
+        status_code=201,
+        content={"status": True},
+        headers={"ETag": make_etag(result[VERSION_KEY])},
+    )
+
+
+@app.delete(
+    "/{service_id}/configs/{config_name}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete the config of the given service",
+    description=(
+        "The deletion is returned by the delta sync, as a tombstone, for the "
+        "retention of the deleted configs."
+    ),
+    responses={
+        status.HTTP_404_NOT_FOUND: {"model": EmptyResponse},
+        status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
+    },
+)
+# @auth_check
+async def delete_service_config(
+    service_id: str = Path(
+        ...,
+        title="Service ID",
+        description="The unique ID associated with the service",
+        regex=SERVICE_ID_REGEX,
+    ),
+    config_name: str = Path(
+        title="The config name",
+        description="The specific config name of the given service",
+    ),
 ):
-    result = service_config_mgmt.update_service_config(
-        service_id=service_id, config_name=config_name, config=config.config
+    result = await service_config_mgmt.delete_service_config_async(
+        service_id=service_id, config_name=config_name
     )
     if not result:
         logger.info(
-            "Could not create the config for the service.",
+            "No config entry found to delete for the service.",
             service_id=service_id,
             config_name=config_name,
         )
+        return JSONResponse(status_code=404, content={})
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={"ETag": make_etag(result[VERSION_KEY])},
+    )
+
+
+@app.patch(
+    "/{service_id}/configs/{config_name}",
+    status_code=status.HTTP_200_OK,
+    summary="Partially update the config for the given service",
+    description=(
+        f"Takes a JSON Merge Patch ('{MERGE_PATCH_MEDIA_TYPE}') or a JSON Patch "
+        f"('{JSON_PATCH_MEDIA_TYPE}'). With 'application/json', an object is read "
+        "as a merge patch and an array as a JSON Patch. Supports If-Match like PUT."
+    ),
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": EmptyResponse},
+        status.HTTP_404_NOT_FOUND: {"model": EmptyResponse},
+        status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
+        status.HTTP_409_CONFLICT: {"model": EmptyResponse},
+        status.HTTP_412_PRECONDITION_FAILED: {"model": EmptyResponse},
+    },
+)
+# @auth_check
+async def patch_service_configs(
+    request: Request,
+    response: Response,
+    service_id: str = Path(
+        ...,
+        title="Service ID",
+        description="The unique ID associated with the service",
+        regex=SERVICE_ID_REGEX,
+    ),
+    config_name: str = Path(
+        title="The config name",
+        description="The specific config name of the given service",
+    ),
+    if_match: Optional[str] = Header(
+        None, description="The ETag the config is expected to be at"
+    ),
+):
+    try:
+        expected_version = parse_if_match(if_match)
+        patch = json.loads(await request.body())
+    except ValueError as e:
+        logger.info("Invalid patch request.", if_match=if_match, error=str(e))
         response.status_code = 400
         return EmptyResponse()
-    return JSONResponse(status_code=201, content={"status": True})
+    content_type = request.headers.get("content-type", "")
+    if MERGE_PATCH_MEDIA_TYPE in content_type:
+        patch_type = MERGE_PATCH
+    elif JSON_PATCH_MEDIA_TYPE in content_type:
+        patch_type = JSON_PATCH
+    else:
+        patch_type = JSON_PATCH if isinstance(patch, list) else MERGE_PATCH
+    try:
+        result = await service_config_mgmt.patch_service_config_async(
+            service_id=service_id,
+            config_name=config_name,
+            patch=patch,
+            patch_type=patch_type,
+            expected_version=expected_version,
+        )
+    except InvalidPatchError as e:
+        logger.info("Invalid patch.", error=str(e))
+        return JSONResponse(
+            status_code=400, content={"status": False, "message": str(e)}
+        )
+    except PatchConflictError as e:
+        return JSONResponse(
+            status_code=e.status_code, content={"status": False, "message": e.message}
+        )
+    except ConfigVersionConflictError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"status": False, "message": e.message},
+            headers={"ETag": make_etag(e.current_version)},
+        )
+    if not result:
+        logger.info(
+            "No config entry found to patch for the service.",
+            service_id=service_id,
+            config_name=config_name,
+        )
+        response.status_code = 404
+        return EmptyResponse()
+    return JSONResponse(
+        status_code=200,
+        content={"status": True},
+        headers={"ETag": make_etag(result[VERSION_KEY])},
+    )
+
+
+@app.post(
+    "/configs/batch-get",
+    status_code=status.HTTP_200_OK,
+    summary="Fetch many configs, across services, in a single request",
+    response_model=BatchGetResponse,
+    responses={status.HTTP_403_FORBIDDEN: {"model": EmptyResponse}},
+)
+# @auth_check
+async def batch_get_service_configs(
+    payload: BatchGetPayload = Body(..., title="The configs to fetch"),
+    consistency: Optional[str] = Query(
+        None, regex=CONSISTENCY_REGEX, description=CONSISTENCY_DESCRIPTION
+    ),
+):
+    found, missing = await service_config_mgmt.batch_get_service_config_async(
+        keys=[(key.service_id, key.config_name) for key in payload.keys],
+        consistent_read=_consistent_read(consistency),
+    )
+    return BatchGetResponse(
+        configs=found,
+        missing=[
+            ServiceConfigKey(service_id=service_id, config_name=config_name)
+            for service_id, config_name in missing
+        ],
+    )
+
+
+@app.post(
+    "/configs/heads",
+    status_code=status.HTTP_200_OK,
+    summary="Fetch the head versions of many services in a single request",
+    description=(
+        f"The head version of a service is its {SERVICE_VERSION_HEADER}: it moves "
+        "on every write to its configs, so the configs of a service only need to "
+        "be read again once its head version moved."
+    ),
+    response_model=ServiceHeadsResponse,
+    responses={status.HTTP_403_FORBIDDEN: {"model": EmptyResponse}},
+)
+# @auth_check
+async def get_service_heads(
+    payload: ServiceHeadsPayload = Body(..., title="The services"),
+    consistency: Optional[str] = Query(
+        None, regex=CONSISTENCY_REGEX, description=CONSISTENCY_DESCRIPTION
+    ),
+):
+    heads = await service_config_mgmt.get_service_heads_async(
+        service_ids=payload.service_ids, consistent_read=_consistent_read(consistency),
+    )
+    return ServiceHeadsResponse(heads=heads)
+
+
+@app.get(
+    "/configs/changes",
+    status_code=status.HTTP_200_OK,
+    summary="Fetch the configs changed after a sync version, across services",
+    description=(
+        "The deleted configs are returned as tombstones, flagged as deleted. "
+        "The response holds the sync version to ask from next time, and whether "
+        "more changes are there to fetch right away. Changes may be returned "
+        "more than once. A sync version older than the retention of the deleted "
+        "configs returns 410, all the configs must then be read again."
+    ),
+    response_model=ConfigChangesResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": EmptyResponse},
+        status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
+        status.HTTP_410_GONE: {"model": EmptyResponse},
+    },
+)
+# @auth_check
+async def get_config_changes(
+    since: str = Query(..., description=SINCE_DESCRIPTION),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="The max number of changes to return"
+    ),
+):
+    return await _config_changes(since, limit)
+
+
+@app.get(
+    "/configs/events",
+    status_code=status.HTTP_200_OK,
+    summary="Stream the changes of services and configs as Server-Sent Events",
+    description=(
+        "Every change is sent as a 'config_changed' event. A client too slow to "
+        "keep up gets a single 'resync' event instead of the events it missed, "
+        "and must then read the configs it follows again."
+    ),
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": EmptyResponse},
+        status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
+    },
+)
+# @auth_check
+async def stream_config_events(
+    response: Response,
+    service: List[str] = Query([], description=EVENT_SERVICES_DESCRIPTION),
+    config: List[str] = Query([], description=EVENT_CONFIGS_DESCRIPTION),
+):
+    try:
+        topics = _event_topics(service, config)
+    except ValueError as e:
+        logger.info("Invalid event subscription.", error=str(e))
+        response.status_code = 400
+        return EmptyResponse()
+    return StreamingResponse(
+        _server_sent_events(topics),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.websocket("/configs/events/ws")
+# @auth_check
+async def config_events_websocket(
+    websocket: WebSocket,
+    service: List[str] = Query([], description=EVENT_SERVICES_DESCRIPTION),
+    config: List[str] = Query([], description=EVENT_CONFIGS_DESCRIPTION),
+):
+    try:
+        topics = _event_topics(service, config)
+    except ValueError as e:
+        logger.info("Invalid event subscription.", error=str(e))
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = service_config_mgmt.event_bus.subscribe(topics)
+    pusher = asyncio.ensure_future(_push_events(websocket, subscription))
+    receiver = asyncio.ensure_future(_wait_for_disconnect(websocket))
+    try:
+        await asyncio.wait({pusher, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        pusher.cancel()
+        receiver.cancel()
+        service_config_mgmt.event_bus.unsubscribe(subscription)
+    if not receiver.done():
+        logger.error("Could not push the events.", error=str(pusher.exception()))
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+
+
+def _event_topics(services: List[str], configs: List[str]) -> List[Topic]:
+    """
+    Reads the topics of an event subscription
+    :param services: the service IDs
+    :param configs: the configs, as 'service_id/config_name'
+    :return: the topics
+    :raises ValueError: if a config is malformed or there is no topic
+    """
+    topics = [(service_id, None) for service_id in services]
+    for key in configs:
+        service_id, _, config_name = key.partition("/")
+        if not service_id or not config_name:
+            raise ValueError(f"Invalid config: {key}")
+        topics.append((service_id, config_name))
+    if not topics:
+        raise ValueError("Subscribe to at least one service or config")
+    return topics
+
+
+async def _server_sent_events(topics: List[Topic]):
+    """
+    Subscribes once the stream starts, so that the subscription always ends with it
+    :param topics:
+    :return:
+    """
+    subscription = service_config_mgmt.event_bus.subscribe(topics)
+    try:
+        yield ": subscribed\n\n"
+        while True:
+            event = await subscription.next_event(settings.events_heartbeat_seconds)
+            if event is None:
+                yield ": heartbeat\n\n"
+                continue
+            event_id = f"id: {event['id']}\n" if "id" in event else ""
+            yield f"{event_id}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        service_config_mgmt.event_bus.unsubscribe(subscription)
+
+
+async def _push_events(websocket: WebSocket, subscription: Subscription):
+    while True:
+        event = await subscription.next_event(settings.events_heartbeat_seconds)
+        await websocket.send_json(event or {"type": HEARTBEAT_EVENT})
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    # The messages of the client are ignored, only its disconnection matters
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@app.post(
+    "/configs/import",
+    status_code=status.HTTP_200_OK,
+    summary="Bulk import configs, across services",
+    description=(
+        "Takes a JSON array or, with the 'application/x-ndjson' content type, one "
+        "JSON item per line. Every item holds the service_id, config_name and config."
+    ),
+    response_model=ImportResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": EmptyResponse},
+        status.HTTP_403_FORBIDDEN: {"model": EmptyResponse},
+    },
+)
+# @auth_check
+async def import_service_configs(request: Request, response: Response):
+    if NDJSON_MEDIA_TYPE in request.headers.get("content-type", ""):
+        items = _ndjson_lines(request)
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError as e:
+            logger.info("Invalid import payload.", error=str(e))
+            response.status_code = 400
+            return EmptyResponse()
+        if not isinstance(body, list):
+            logger.info("The import payload is not a JSON array.")
+            response.status_code = 400
+            return EmptyResponse()
+        items = _async_iter(body)
+    return await service_config_mgmt.import_service_configs_async(items=items)
+
+
+async def _ndjson_lines(request: Request):
+    """
+    Splits the streamed request body into lines, as it arrives
+    :param request:
+    :return:
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _async_iter(items: list):
+    for item in items:
+        yield item
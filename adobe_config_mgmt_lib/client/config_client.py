@@ -0,0 +1,257 @@
+import json
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from structlog import get_logger
+
+from adobe_config_mgmt_lib.client.snapshot import Entry, Snapshot, write_snapshot
+from adobe_config_mgmt_lib.core.service_config.delta_sync import SyncVersionExpiredError
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_KEY,
+    CONFIG_NAME_KEY,
+    DELETED_KEY,
+    MODIFIED_AT_KEY,
+    UPDATED_AT_KEY,
+    VERSION_KEY,
+)
+
+"""
+Embeddable client of the config manager.
+
+The client keeps the configs of the services it subscribed to in a local
+snapshot file, and serves the reads from the snapshot loaded in memory, so
+a read makes no network call and keeps working while the config manager
+is unreachable. A background thread syncs the subscribed services every
+`poll_interval` seconds, reading only the configs changed since the
+previous sync, and writes a new snapshot whenever a config changed.
+A client started from the snapshot of a previous run serves it right away,
+before its first sync.
+"""
+
+logger = get_logger(__name__)
+
+# Returned by the delta sync only, not stored
+CHANGE_ONLY_KEYS = (DELETED_KEY, MODIFIED_AT_KEY)
+
+
+class ConfigClient:
+    def __init__(
+        self,
+        source,
+        service_ids: Iterable[str],
+        snapshot_path: str,
+        poll_interval: float = 10.0,
+        use_mmap: bool = False,
+    ):
+        """
+        :param source: reads the configs from the config manager, e.g. an HttpConfigSource
+        :param service_ids: the services to keep the configs of
+        :param snapshot_path: the snapshot file, loaded if it exists
+        :param poll_interval: the number of seconds between two syncs
+        :param use_mmap: True to map the snapshot and parse the configs on
+            first read, rather than all of them on load
+        """
+        self.source = source
+        self.service_ids = list(dict.fromkeys(service_ids))
+        self.snapshot_path = snapshot_path
+        self.poll_interval = poll_interval
+        self.use_mmap = use_mmap
+        self._snapshot = self._load_snapshot()
+        self._sync_versions = dict(self._snapshot.sync_versions)
+        self._refresh_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.changes = 0
+        # The time of the last successful sync, None if there was none yet
+        self.refreshed_at: Optional[float] = None
+
+    def __enter__(self) -> "ConfigClient":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get(self, service_id: str, config_name: str, default=None):
+        """
+        Method to read a config, from memory only
+        :param service_id:
+        :param config_name:
+        :param default: returned if the config is unknown
+        :return: the config
+        """
+        item = self._snapshot.get(service_id, config_name)
+        return default if item is None else item[CONFIG_KEY]
+
+    def get_item(self, service_id: str, config_name: str) -> Optional[dict]:
+        """
+        Method to read a config along with its version, from memory only
+        :param service_id:
+        :param config_name:
+        :return: the config entry, None if the config is unknown
+        """
+        return self._snapshot.get(service_id, config_name)
+
+    def get_all(self, service_id: str) -> Dict[str, dict]:
+        """
+        Method to read all the configs of a service, from memory only
+        :param service_id:
+        :return: the configs, by name
+        """
+        snapshot = self._snapshot
+        return {
+            config_name: snapshot.get(service_id, config_name)[CONFIG_KEY]
+            for config_name in snapshot.config_names(service_id)
+        }
+
+    def subscribe(self, service_id: str) -> None:
+        """
+        Method to keep the configs of one more service, from the next sync on
+        :param service_id:
+        """
+        if service_id not in self.service_ids:
+            self.service_ids.append(service_id)
+
+    def refresh(self) -> int:
+        """
+        Method to sync the subscribed services, writing a new snapshot if
+        any of their configs changed
+        :return: the number of changed configs
+        """
+        with self._refresh_lock:
+            changes = {}
+            for service_id in list(self.service_ids):
+                service_changes = self._sync_service(service_id)
+                if service_changes:
+                    changes[service_id] = service_changes
+            if changes:
+                self._write_snapshot(changes)
+            count = sum(len(service_changes) for service_changes in changes.values())
+            self.refreshes += 1
+            self.changes += count
+            self.refreshed_at = time.time()
+        if count:
+            logger.info("Configs changed.", changes=count, snapshot=self.snapshot_path)
+        return count
+
+    def start(self) -> None:
+        """
+        Method to sync the subscribed services in the background
+        """
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="config-client", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "services": len(self.service_ids),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "changes": self.changes,
+            "refreshed_at": self.refreshed_at,
+        }
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                # The snapshot keeps being served
+                logger.exception("Could not sync the configs.")
+                self.failures += 1
+            self._stopped.wait(self.poll_interval)
+
+    def _load_snapshot(self) -> Snapshot:
+        try:
+            return Snapshot.load(self.snapshot_path, self.use_mmap)
+        except FileNotFoundError:
+            return Snapshot.empty()
+        except (OSError, ValueError) as e:
+            logger.warning(
+                "Could not load the snapshot.", path=self.snapshot_path, error=str(e)
+            )
+            return Snapshot.empty()
+
+    def _sync_service(self, service_id: str) -> Dict[str, Optional[Entry]]:
+        """
+        Method to read what changed in a service since its previous sync
+        :param service_id:
+        :return: the entries of the changed configs, None for the removed ones
+        """
+        items, sync_version, full = self._read_service(service_id)
+        changes = {}
+        if full:
+            # The configs missing from a full read are gone
+            names = {item[CONFIG_NAME_KEY] for item in items}
+            for config_name in self._snapshot.config_names(service_id):
+                if config_name not in names:
+                    changes[config_name] = None
+        for item in items:
+            config_name = item[CONFIG_NAME_KEY]
+            entry = None if item.get(DELETED_KEY) else _entry(item)
+            if config_name in changes:
+                current = changes[config_name]
+            else:
+                current = self._snapshot.entry(service_id, config_name)
+            if _revision(current) != _revision(entry):
+                changes[config_name] = entry
+        self._sync_versions[service_id] = sync_version
+        return changes
+
+    def _read_service(self, service_id: str) -> Tuple[list, Optional[int], bool]:
+        """
+        Method to read the configs of a service changed since its previous
+        sync, or all of them when the changes aren't known
+        :param service_id:
+        :return: the configs, the sync version to resume from, and whether
+            all the configs were read
+        """
+        since = self._sync_versions.get(service_id)
+        if since is not None:
+            try:
+                items, sync_version = self.source.changes(service_id, since)
+                return items, sync_version, False
+            except SyncVersionExpiredError:
+                logger.info("Sync version expired.", service_id=service_id)
+        items, sync_version = self.source.configs(service_id)
+        return items, sync_version, True
+
+    def _write_snapshot(self, changes: Dict[str, Dict[str, Optional[Entry]]]) -> None:
+        snapshot = self._snapshot
+        entries = {}
+        for service_id in dict.fromkeys(snapshot.service_ids() + list(changes)):
+            configs = entries[service_id] = {
+                config_name: snapshot.entry(service_id, config_name)
+                for config_name in snapshot.config_names(service_id)
+            }
+            for config_name, entry in changes.get(service_id, {}).items():
+                if entry is None:
+                    configs.pop(config_name, None)
+                else:
+                    configs[config_name] = entry
+        write_snapshot(self.snapshot_path, dict(self._sync_versions), entries)
+        self._snapshot = Snapshot.load(self.snapshot_path, self.use_mmap)
+
+
+def _entry(item: dict) -> Entry:
+    stored = {key: value for key, value in item.items() if key not in CHANGE_ONLY_KEYS}
+    document = json.dumps(stored, separators=(",", ":")).encode()
+    return document, item.get(VERSION_KEY), item.get(UPDATED_AT_KEY)
+
+
+def _revision(entry: Optional[Entry]) -> Optional[tuple]:
+    return None if entry is None else entry[1:]
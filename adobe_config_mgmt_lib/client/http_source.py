@@ -0,0 +1,73 @@
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from adobe_config_mgmt_lib.core.service_config.delta_sync import SyncVersionExpiredError
+from adobe_config_mgmt_lib.resources.constants import SYNC_VERSION_HEADER
+
+"""
+Reads of the configs of a service from the config manager, in full or as
+the changes after a sync version.
+"""
+
+
+class HttpConfigSource:
+    def __init__(
+        self,
+        base_url: str,
+        session: requests.Session = None,
+        timeout: float = 5.0,
+        page_size: int = 1000,
+    ):
+        """
+        :param base_url: the URL the config APIs are served under, e.g. http://host/adobe/v1
+        :param session: the session to send the requests with, a new one if None
+        :param timeout: the max number of seconds to wait for a response
+        :param page_size: the max number of changes read at once
+        """
+        self.base_url = base_url.rstrip("/")
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.page_size = page_size
+
+    def configs(self, service_id: str) -> Tuple[List[dict], Optional[int]]:
+        """
+        Method to read all the configs of a service
+        :param service_id:
+        :return: the configs, and the sync version to read their changes
+            after, None for a service without configs
+        """
+        response = self.session.get(self._configs_url(service_id), timeout=self.timeout)
+        if response.status_code == 404:
+            return [], None
+        response.raise_for_status()
+        return response.json(), int(response.headers[SYNC_VERSION_HEADER])
+
+    def changes(self, service_id: str, since: int) -> Tuple[List[dict], int]:
+        """
+        Method to read the configs of a service changed after a sync version
+        :param service_id:
+        :param since: the sync version
+        :return: the changed configs, the deleted ones flagged as such, oldest
+            first, and the sync version to read the next changes after
+        :raises SyncVersionExpiredError: if the changes are no longer known
+        """
+        changes = []
+        while True:
+            response = self.session.get(
+                self._configs_url(service_id),
+                params={"since": since, "limit": self.page_size},
+                timeout=self.timeout,
+            )
+            if response.status_code == 410:
+                raise SyncVersionExpiredError(410, response.json().get("message", ""))
+            response.raise_for_status()
+            body = response.json()
+            changes.extend(body["changes"])
+            since = body["sync_version"]
+            if not body["more"]:
+                return changes, since
+
+    def _configs_url(self, service_id: str) -> str:
+        return f"{self.base_url}/{quote(service_id, safe='')}/configs"
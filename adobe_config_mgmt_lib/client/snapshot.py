@@ -0,0 +1,146 @@
+import json
+import mmap
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+"""
+Snapshot files of the configs of the subscribed services.
+
+A snapshot file starts with a line of JSON, the header, holding the sync
+version of every service, and the position and revision of every config in
+the rest of the file, where each config is a JSON document of its own. A config is thus
+read without parsing the others: a snapshot loaded through mmap only parses
+the configs read, and only maps the pages holding them.
+
+The files are written to a temporary file renamed over the previous one,
+so a reader, in this process or another, sees either the previous or the
+next snapshot, never a partial one.
+"""
+
+SNAPSHOT_FORMAT = 1
+
+# The JSON document of a config, its version and its update time
+Entry = Tuple[bytes, Optional[int], Optional[int]]
+
+
+class Snapshot:
+    def __init__(self, header: dict, body, offset: int = 0, eager: bool = True):
+        """
+        :param header: the sync versions and the index of the configs
+        :param body: the bytes holding the configs, or their mmap
+        :param offset: the position of the first config in the body
+        :param eager: whether to parse all the configs right away
+        """
+        self.sync_versions: Dict[str, Optional[int]] = header["sync_versions"]
+        self._index: Dict[str, Dict[str, list]] = header["index"]
+        self._offset = offset
+        self._body = body
+        self._parsed: Dict[tuple, dict] = {}
+        if eager:
+            for service_id, configs in self._index.items():
+                for config_name in configs:
+                    self.get(service_id, config_name)
+
+    @classmethod
+    def empty(cls) -> "Snapshot":
+        return cls({"sync_versions": {}, "index": {}}, b"")
+
+    @classmethod
+    def load(cls, path: str, use_mmap: bool = False) -> "Snapshot":
+        """
+        Method to load a snapshot file
+        :param path:
+        :param use_mmap: True to map the file and parse the configs on first read
+        :return: the snapshot
+        """
+        with open(path, "rb") as snapshot_file:
+            if use_mmap:
+                # The mapping outlives the file, and the file its replacement
+                body = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                body = snapshot_file.read()
+        end = body.find(b"\n")
+        header = json.loads(body[:end])
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unknown snapshot format {header.get('format')}")
+        return cls(header, body, offset=end + 1, eager=not use_mmap)
+
+    def get(self, service_id: str, config_name: str) -> Optional[dict]:
+        """
+        Method to read a config from the snapshot
+        :param service_id:
+        :param config_name:
+        :return: the config entry, None if the snapshot has none
+        """
+        key = (service_id, config_name)
+        item = self._parsed.get(key)
+        if item is None:
+            document = self.document(service_id, config_name)
+            if document is None:
+                return None
+            item = self._parsed[key] = json.loads(document)
+        return item
+
+    def document(self, service_id: str, config_name: str) -> Optional[bytes]:
+        """
+        Method to read the JSON document of a config, without parsing it
+        :param service_id:
+        :param config_name:
+        :return: the document, None if the snapshot has none
+        """
+        position = self._index.get(service_id, {}).get(config_name)
+        if position is None:
+            return None
+        start = self._offset + position[0]
+        return self._body[start : start + position[1]]
+
+    def entry(self, service_id: str, config_name: str) -> Optional[Entry]:
+        """
+        Method to read a config along with its revision, without parsing it
+        :param service_id:
+        :param config_name:
+        :return: the entry, None if the snapshot has none
+        """
+        document = self.document(service_id, config_name)
+        if document is None:
+            return None
+        _, _, version, updated_at = self._index[service_id][config_name]
+        return document, version, updated_at
+
+    def config_names(self, service_id: str) -> list:
+        return list(self._index.get(service_id, {}))
+
+    def service_ids(self) -> list:
+        return list(self._index)
+
+
+def write_snapshot(
+    path: str,
+    sync_versions: Dict[str, Optional[int]],
+    entries: Dict[str, Dict[str, Entry]],
+) -> None:
+    """
+    Method to write a snapshot file, replacing the previous one atomically
+    :param path:
+    :param sync_versions: the sync version of every service
+    :param entries: the entries of the configs, by service and name
+    """
+    index = {}
+    offset = 0
+    for service_id, configs in entries.items():
+        positions = index[service_id] = {}
+        for config_name, (document, version, updated_at) in configs.items():
+            positions[config_name] = [offset, len(document), version, updated_at]
+            offset += len(document)
+    header = {"format": SNAPSHOT_FORMAT, "sync_versions": sync_versions, "index": index}
+    # A temporary file per writer, several processes may share the snapshot
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(json.dumps(header).encode())
+        snapshot_file.write(b"\n")
+        for configs in entries.values():
+            snapshot_file.writelines(entry[0] for entry in configs.values())
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
@@ -5,6 +5,7 @@ import sys
 
 from pydantic.error_wrappers import ValidationError
 from starlette.config import Config
+from starlette.datastructures import CommaSeparatedStrings
 from structlog import get_logger  # type: ignore
 
 # Need to set log stream in addition to main since this executed before main.
@@ -42,6 +43,14 @@ class Settings:
         self.config = {}
         self.is_cron_running = False
 
+    def __getattr__(self, name: str):
+        # The infra configs are read from their files on first use rather
+        # than at import
+        if name in CLOUD_INFRA_BLOBS:
+            self.load_config()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
     def load_config(self) -> None:
         def set_from_file(f_path: str, blob_name: str):
             if os.path.isfile(f_path):
@@ -61,6 +70,18 @@ class Settings:
             file_path = f"{CONFIG_PATH}/infra_{infra_blob}.json"
             set_from_file(f_path=file_path, blob_name=infra_blob)
 
+    @property
+    def dal_backend(self):
+        # "dynamodb", "memory" to keep the configs in the process only, or
+        # "sqlite" to keep them in the database at sqlite_path
+        return config("DAL_BACKEND", cast=str, default="dynamodb")
+
+    @property
+    def sqlite_path(self):
+        return config(
+            "SQLITE_PATH", cast=str, default="/var/lib/config-mgmt/configs.sqlite3"
+        )
+
     @property
     def dynamodb_url(self):
         host = self.dynamodb.get("host", "localstack")  # type: ignore
@@ -86,6 +107,14 @@ class Settings:
     def dynamodb_region(self):
         return self.dynamodb.get("region", "us-west-2")
 
+    @property
+    def dynamodb_endpoint_url(self):
+        # The endpoint of the environment, or the host of the infra config
+        endpoint_url = config("DYNAMODB_ENDPOINT_URL", cast=str, default="")
+        if not endpoint_url and self.dynamodb.get("host"):
+            endpoint_url = self.dynamodb_url
+        return endpoint_url
+
     @property
     def dynamodb_init_complete(self):
         return self.DB_INIT_SUCCESS
@@ -102,10 +131,272 @@ class Settings:
         log_level = levels.get(os.environ.get("LOG_LEVEL", "").upper(), logging.INFO)
         return log_level
 
+    @property
+    def config_cache_enabled(self):
+        return config("CONFIG_CACHE_ENABLED", cast=bool, default=True)
+
+    @property
+    def config_cache_ttl_seconds(self):
+        return config("CONFIG_CACHE_TTL_SECONDS", cast=float, default=30.0)
+
+    @property
+    def config_cache_max_entries(self):
+        return config("CONFIG_CACHE_MAX_ENTRIES", cast=int, default=10000)
+
+    @property
+    def config_cache_max_bytes(self):
+        return config("CONFIG_CACHE_MAX_BYTES", cast=int, default=64 * 1024 * 1024)
+
+    @property
+    def single_flight_enabled(self):
+        # Concurrent identical eventually consistent reads share a single
+        # read of the table
+        return config("SINGLE_FLIGHT_ENABLED", cast=bool, default=True)
+
+    @property
+    def stale_serving_enabled(self):
+        # Reads failing, or past their latency budget, are answered with
+        # their last known result, marked as stale
+        return config("STALE_SERVING_ENABLED", cast=bool, default=True)
+
+    @property
+    def stale_read_budget_seconds(self):
+        # 0 to wait for the reads however long they take
+        return config("STALE_READ_BUDGET_SECONDS", cast=float, default=1.0)
+
+    @property
+    def stale_store_max_entries(self):
+        return config("STALE_STORE_MAX_ENTRIES", cast=int, default=10000)
+
+    @property
+    def stale_snapshot_path(self):
+        # Where the last known results are saved, and loaded from on start,
+        # empty to keep them in memory only
+        return config("STALE_SNAPSHOT_PATH", cast=str, default="")
+
+    @property
+    def stale_snapshot_interval_seconds(self):
+        return config("STALE_SNAPSHOT_INTERVAL_SECONDS", cast=float, default=60.0)
+
+    @property
+    def warm_start_max_age_seconds(self):
+        # The saved results younger than this are put in the config cache on
+        # start, where they are served as current until its TTL
+        return config("WARM_START_MAX_AGE_SECONDS", cast=float, default=300.0)
+
+    @property
+    def config_page_size(self):
+        return config("CONFIG_PAGE_SIZE", cast=int, default=100)
+
+    @property
+    def batch_write_workers(self):
+        return config("BATCH_WRITE_WORKERS", cast=int, default=8)
+
+    @property
+    def import_window_size(self):
+        return config("IMPORT_WINDOW_SIZE", cast=int, default=1000)
+
+    @property
+    def dal_max_workers(self):
+        return config("DAL_MAX_WORKERS", cast=int, default=64)
+
+    @property
+    def dynamodb_max_pool_connections(self):
+        # As many connections as threads calling dynamodb, past which the
+        # requests open connections of their own
+        return config(
+            "DYNAMODB_MAX_POOL_CONNECTIONS", cast=int, default=self.dal_max_workers
+        )
+
+    @property
+    def dynamodb_connect_timeout_seconds(self):
+        return config("DYNAMODB_CONNECT_TIMEOUT_SECONDS", cast=float, default=2.0)
+
+    @property
+    def dynamodb_read_timeout_seconds(self):
+        return config("DYNAMODB_READ_TIMEOUT_SECONDS", cast=float, default=10.0)
+
+    @property
+    def dynamodb_tcp_keepalive(self):
+        return config("DYNAMODB_TCP_KEEPALIVE", cast=bool, default=True)
+
+    @property
+    def dynamodb_retry_mode(self):
+        # "legacy", "standard" or "adaptive", the latter rate limits the
+        # client once throttled
+        return config("DYNAMODB_RETRY_MODE", cast=str, default="standard")
+
+    @property
+    def dynamodb_max_attempts(self):
+        return config("DYNAMODB_MAX_ATTEMPTS", cast=int, default=3)
+
+    @property
+    def dynamodb_bootstrap_retry_seconds(self):
+        # How often a failed check or creation of the config table is retried
+        return config("DYNAMODB_BOOTSTRAP_RETRY_SECONDS", cast=float, default=5.0)
+
+    @property
+    def read_consistency(self):
+        # "eventual" or "strong", for the reads which don't ask for either
+        return config("READ_CONSISTENCY", cast=str, default="eventual")
+
+    @property
+    def config_compression_codec(self):
+        # "none", "zlib" or "zstd", the latter needs the zstandard package
+        return config("CONFIG_COMPRESSION_CODEC", cast=str, default="none")
+
+    @property
+    def config_compression_threshold_bytes(self):
+        return config("CONFIG_COMPRESSION_THRESHOLD_BYTES", cast=int, default=4096)
+
+    @property
+    def return_consumed_capacity(self):
+        return config("RETURN_CONSUMED_CAPACITY", cast=bool, default=True)
+
+    @property
+    def response_cache_max_entries(self):
+        return config("RESPONSE_CACHE_MAX_ENTRIES", cast=int, default=10000)
+
+    @property
+    def response_cache_max_bytes(self):
+        return config("RESPONSE_CACHE_MAX_BYTES", cast=int, default=64 * 1024 * 1024)
+
+    @property
+    def response_cache_ttl_seconds(self):
+        # The cached responses are checked against the config version on
+        # every use, the TTL only releases the unused ones
+        return config("RESPONSE_CACHE_TTL_SECONDS", cast=float, default=300.0)
+
+    @property
+    def response_gzip_min_bytes(self):
+        return config("RESPONSE_GZIP_MIN_BYTES", cast=int, default=1024)
+
+    @property
+    def watch_poll_interval_seconds(self):
+        return config("WATCH_POLL_INTERVAL_SECONDS", cast=float, default=2.0)
+
+    @property
+    def watch_timeout_seconds(self):
+        return config("WATCH_TIMEOUT_SECONDS", cast=float, default=30.0)
+
+    @property
+    def watch_max_timeout_seconds(self):
+        return config("WATCH_MAX_TIMEOUT_SECONDS", cast=float, default=60.0)
+
+    @property
+    def events_queue_size(self):
+        # Pending events per push subscriber, before it is told to resync
+        return config("EVENTS_QUEUE_SIZE", cast=int, default=100)
+
+    @property
+    def events_heartbeat_seconds(self):
+        return config("EVENTS_HEARTBEAT_SECONDS", cast=float, default=15.0)
+
+    @property
+    def change_detection_key_diffs(self):
+        # Reports the changed keys of the configs, at the cost of reading
+        # and keeping the whole configs
+        return config("CHANGE_DETECTION_KEY_DIFFS", cast=bool, default=False)
+
+    @property
+    def change_watch_enabled(self):
+        return config("CHANGE_WATCH_ENABLED", cast=bool, default=False)
+
+    @property
+    def change_watch_services(self):
+        # Watched from the start, the services read are watched as well
+        return config("CHANGE_WATCH_SERVICES", cast=CommaSeparatedStrings, default="")
+
+    @property
+    def change_watch_min_interval_seconds(self):
+        return config("CHANGE_WATCH_MIN_INTERVAL_SECONDS", cast=float, default=5.0)
+
+    @property
+    def change_watch_max_interval_seconds(self):
+        return config("CHANGE_WATCH_MAX_INTERVAL_SECONDS", cast=float, default=300.0)
+
+    @property
+    def change_watch_max_concurrency(self):
+        # Checks running at once, each one queries dynamodb
+        return config("CHANGE_WATCH_MAX_CONCURRENCY", cast=int, default=16)
+
+    @property
+    def change_watch_max_services(self):
+        return config("CHANGE_WATCH_MAX_SERVICES", cast=int, default=10000)
+
+    @property
+    def stream_consumer_enabled(self):
+        # Tails the stream of the config table, enabling it if needed, to
+        # learn about the writes of the other replicas and regions
+        return config("STREAM_CONSUMER_ENABLED", cast=bool, default=False)
+
+    @property
+    def stream_poll_interval_seconds(self):
+        return config("STREAM_POLL_INTERVAL_SECONDS", cast=float, default=1.0)
+
+    @property
+    def stream_checkpoint_path(self):
+        # Where the positions in the stream are saved, empty to start from
+        # stream_start_position on every start
+        return config("STREAM_CHECKPOINT_PATH", cast=str, default="")
+
+    @property
+    def stream_start_position(self):
+        # "LATEST" or "TRIM_HORIZON", for the shards without a checkpoint
+        return config("STREAM_START_POSITION", cast=str, default="LATEST")
+
+    @property
+    def stream_batch_size(self):
+        return config("STREAM_BATCH_SIZE", cast=int, default=1000)
+
+    @property
+    def stream_published_changes_max_entries(self):
+        # The writes of this replica remembered, so that their records read
+        # back from the stream are not published twice
+        return config("STREAM_PUBLISHED_CHANGES_MAX_ENTRIES", cast=int, default=10000)
+
+    @property
+    def stream_published_changes_ttl_seconds(self):
+        return config("STREAM_PUBLISHED_CHANGES_TTL_SECONDS", cast=float, default=300.0)
+
+    @property
+    def delta_sync_page_size(self):
+        return config("DELTA_SYNC_PAGE_SIZE", cast=int, default=1000)
+
+    @property
+    def delta_sync_settle_seconds(self):
+        # How far behind the present the returned sync versions stay, to cover
+        # the lag of the indexes and the clock skew between replicas
+        return config("DELTA_SYNC_SETTLE_SECONDS", cast=float, default=5.0)
+
+    @property
+    def tombstone_retention_seconds(self):
+        # Deleted configs are reported by the delta sync for this long, older
+        # sync versions require a full read
+        return config("TOMBSTONE_RETENTION_SECONDS", cast=int, default=7 * 24 * 3600)
+
+    @property
+    def config_item_max_bytes(self):
+        # Stored configs above this size are offloaded, dynamodb items are
+        # limited to 400 KB
+        return config("CONFIG_ITEM_MAX_BYTES", cast=int, default=350 * 1024)
+
+    @property
+    def config_chunk_size_bytes(self):
+        return config("CONFIG_CHUNK_SIZE_BYTES", cast=int, default=350 * 1024)
+
+    @property
+    def config_offload_backend(self):
+        # "dynamodb" for chunk entries, "local" for files under config_blob_dir
+        return config("CONFIG_OFFLOAD_BACKEND", cast=str, default="dynamodb")
+
+    @property
+    def config_blob_dir(self):
+        return config("CONFIG_BLOB_DIR", cast=str, default="/var/lib/config-blobs")
+
 
 try:
     settings = Settings()
-    settings.load_config()
 except ValidationError as e:
     logger.exception(e)
     sys.exit(1)
@@ -1,53 +1,266 @@
-import asyncio
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from structlog import get_logger
 
-from adobe_config_mgmt_lib.models.configs.service_config import ServiceConfigResponse
+from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.core.cron.watch_scheduler import WatchScheduler
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_KEY,
+    CONFIG_NAME_KEY,
+    UPDATED_AT_KEY,
+    VERSION_KEY,
+)
+
+"""
+Detection of the config changes made outside of this replica.
+
+The detector keeps the last snapshot of every service it checked, indexed by
+config name, and compares each new snapshot against it in a single pass: a
+config is added, removed, or modified when its version moved. The configs of
+a service are only read when its head version moved. When asked to,
+it keeps the configs themselves too, to report which of their keys changed.
+The changes are handed to the registered callbacks.
+
+The services listed in CHANGE_WATCH_SERVICES, and the ones read through
+the service listing, are checked by the watch scheduler.
+"""
 
 logger = get_logger(__name__)
 
-prev_configs = None
-
-
-def _is_config_changed(config1, config2):
-    for config in config1:
-        match = False
-        for prev_config in config2:
-            if config['updated_at'] == prev_config['updated_at']:
-                match = True
-        if not match:
-            return True
-    return False
-
-
-def check_for_config_change(service_id: str):
-    from adobe_config_mgmt_lib.core.service_config.service_config_mgmt import get_all_service_config
-    global prev_configs
-    curr_configs: List[ServiceConfigResponse] = get_all_service_config(service_id=service_id)
-    config_change_res = _is_config_changed(config1=prev_configs, config2=curr_configs)
-    prev_configs = curr_configs
-    return config_change_res
-
-
-def config_change_listener(service_id: str, config_file_destination: str, interval: int = 5):
-    from adobe_config_mgmt_lib.core.service_config.service_config_mgmt import get_all_service_config
-    global prev_configs
-    if prev_configs is None:
-        prev_configs = get_all_service_config(service_id=service_id)
-    res = check_for_config_change(service_id=service_id)
-    if res:
-        logger.info("Config changed")
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+
+
+class ConfigChange:
+    __slots__ = ("kind", "service_id", "config_name", "version", "diff")
+
+    def __init__(
+        self,
+        kind: str,
+        service_id: str,
+        config_name: str,
+        version: Optional[int],
+        diff: Optional[dict] = None,
+    ):
+        self.kind = kind
+        self.service_id = service_id
+        self.config_name = config_name
+        # None for a removed config
+        self.version = version
+        # The JSON pointers of the added, removed and modified keys, when
+        # the key-level diffs are enabled
+        self.diff = diff
+
+    def __repr__(self):
+        return (
+            f"ConfigChange({self.kind!r}, {self.service_id!r}, "
+            f"{self.config_name!r}, {self.version!r})"
+        )
+
+
+# The revision of a config, and the config itself when diffing keys
+_Snapshot = Tuple[Tuple[Any, Any], Optional[dict]]
+
+
+def diff_config(old: dict, new: dict) -> dict:
+    """
+    Method to compute which keys of a config changed, nested ones included
+    :param old: the previous config
+    :param new: the current config
+    :return: the sorted JSON pointers of the added, removed and modified keys
+    """
+    diff = {ADDED: [], REMOVED: [], MODIFIED: []}
+    _diff_keys(old, new, [], diff)
+    for pointers in diff.values():
+        pointers.sort()
+    return diff
+
+
+def _diff_keys(old: dict, new: dict, path: List[str], diff: dict) -> None:
+    for key in new.keys() - old.keys():
+        diff[ADDED].append(_pointer(path + [key]))
+    for key in old.keys() - new.keys():
+        diff[REMOVED].append(_pointer(path + [key]))
+    for key in old.keys() & new.keys():
+        if isinstance(old[key], dict) and isinstance(new[key], dict):
+            _diff_keys(old[key], new[key], path + [key], diff)
+        elif old[key] != new[key]:
+            diff[MODIFIED].append(_pointer(path + [key]))
+
+
+def _pointer(path: List[str]) -> str:
+    tokens = (str(key).replace("~", "~0").replace("/", "~1") for key in path)
+    return "".join(f"/{token}" for token in tokens)
+
+
+class ChangeDetector:
+    def __init__(self, key_diffs: bool = False):
+        self.key_diffs = key_diffs
+        self._snapshots: Dict[str, Dict[str, _Snapshot]] = {}
+        self._heads: Dict[str, int] = {}
+        self._callbacks: List[Callable[[ConfigChange], None]] = []
+
+    def register(self, callback: Callable[[ConfigChange], None]) -> None:
+        """
+        Method to have a callback called with every detected change
+        :param callback:
+        """
+        self._callbacks.append(callback)
+
+    def is_current(self, service_id: str, head: int) -> bool:
+        """
+        Method to tell whether a service is unchanged since its previous check,
+        without reading its configs
+        :param service_id:
+        :param head: the current head version of the service
+        :return: True if the previous check saw the same head version
+        """
+        # A zero head is the one of a service not written since heads exist
+        return bool(head) and self._heads.get(service_id) == head
+
+    def detect(
+        self, service_id: str, items: Iterable[dict], head: Optional[int] = None
+    ) -> List[ConfigChange]:
+        """
+        Method to compare the current configs of a service with the ones
+        seen by the previous call. The first call for a service only records them.
+        :param service_id:
+        :param items: all the current configs of the service
+        :param head: the head version of the service, read before the configs
+        :return: the changes
+        """
+        current = {item[CONFIG_NAME_KEY]: self._snapshot(item) for item in items}
+        previous = self._snapshots.get(service_id)
+        self._snapshots[service_id] = current
+        self._heads[service_id] = head
+        if previous is None:
+            return []
+        changes = [
+            change
+            for config_name, snapshot in current.items()
+            for change in self._compare(
+                service_id, config_name, previous.get(config_name), snapshot
+            )
+        ]
+        changes.extend(
+            ConfigChange(REMOVED, service_id, config_name, None)
+            for config_name in previous.keys() - current.keys()
+        )
+        for change in changes:
+            self._notify(change)
+        return changes
+
+    def forget(self, service_id: str) -> None:
+        self._snapshots.pop(service_id, None)
+        self._heads.pop(service_id, None)
+
+    def _snapshot(self, item: dict) -> _Snapshot:
+        # The update time tells apart the changes of the entries written
+        # before configs were versioned
+        revision = (item.get(VERSION_KEY), item.get(UPDATED_AT_KEY))
+        return revision, item.get(CONFIG_KEY) if self.key_diffs else None
+
+    def _compare(
+        self,
+        service_id: str,
+        config_name: str,
+        previous: Optional[_Snapshot],
+        current: _Snapshot,
+    ) -> List[ConfigChange]:
+        # The versions read from the database are decimals
+        version = None if current[0][0] is None else int(current[0][0])
+        if previous is None:
+            return [ConfigChange(ADDED, service_id, config_name, version)]
+        if previous[0] == current[0]:
+            return []
+        diff = None
+        if self.key_diffs:
+            diff = diff_config(previous[1] or {}, current[1] or {})
+        return [ConfigChange(MODIFIED, service_id, config_name, version, diff)]
+
+    def _notify(self, change: ConfigChange) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(change)
+            except Exception:
+                logger.exception("Change callback failed.", change=repr(change))
+
+
+change_detector = ChangeDetector(key_diffs=settings.change_detection_key_diffs)
+
+
+def check_for_config_change(service_id: str) -> List[ConfigChange]:
+    """
+    Method to detect the changes of a service since its previous check
+    :param service_id:
+    :return: the changes, none on the first check of the service
+    """
+    from adobe_config_mgmt_lib.core.service_config.service_config_mgmt import (
+        get_service_heads,
+        iter_service_config,
+    )
+
+    head = get_service_heads([service_id])[service_id]
+    if change_detector.is_current(service_id, head):
+        return []
+    # Without key-level diffs, the configs themselves need not be read
+    fields = None if change_detector.key_diffs else []
+    items = iter_service_config(service_id=service_id, fields=fields)
+    return change_detector.detect(service_id, items, head)
+
+
+async def check_for_config_change_async(service_id: str) -> List[ConfigChange]:
+    """
+    Non-blocking variant of `check_for_config_change`
+    :param service_id:
+    :return: the changes, none on the first check of the service
+    """
+    from adobe_config_mgmt_lib.core.service_config.service_config_mgmt import (
+        get_service_heads_async,
+        iter_service_config_async,
+    )
+
+    head = (await get_service_heads_async([service_id]))[service_id]
+    if change_detector.is_current(service_id, head):
+        return []
+    fields = None if change_detector.key_diffs else []
+    items = [
+        item
+        async for item in iter_service_config_async(
+            service_id=service_id, fields=fields
+        )
+    ]
+    return change_detector.detect(service_id, items, head)
+
+
+def config_change_listener(service_id: str):
+    changes = check_for_config_change(service_id=service_id)
+    if changes:
+        logger.info("Config changed", service_id=service_id, changes=len(changes))
     else:
-        logger.info("No changes to the config")
+        logger.info("No changes to the config", service_id=service_id)
+
+
+watch_scheduler = WatchScheduler(
+    check_for_config_change_async,
+    min_interval=settings.change_watch_min_interval_seconds,
+    max_interval=settings.change_watch_max_interval_seconds,
+    max_concurrency=settings.change_watch_max_concurrency,
+    max_services=settings.change_watch_max_services,
+)
 
 
-async def start(service_id="abc", config_file_destination="/var/data/test/"):
+def start_watching() -> None:
     """
-    A background task which keeps checking
-    for newly published youtube videos after a
-    given interval of time
+    Method to start checking the configured services for changes, from the event loop
     """
-    while True:
-        config_change_listener(service_id, config_file_destination)
-        await asyncio.sleep(20)
+    if not settings.change_watch_enabled:
+        return
+    for service_id in settings.change_watch_services:
+        watch_scheduler.register(service_id)
+    watch_scheduler.start()
+
+
+async def stop_watching() -> None:
+    await watch_scheduler.stop()
@@ -0,0 +1,182 @@
+import asyncio
+from typing import Callable, List, Optional
+
+from structlog import get_logger
+
+from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal.dynamodb import (
+    get_dynamodb,
+    services_config_table_name,
+    table_bootstrap,
+)
+from adobe_config_mgmt_lib.dal.dynamodb.streams import (
+    StreamChange,
+    StreamReader,
+    open_stream_reader,
+    stream_change,
+)
+from adobe_config_mgmt_lib.resources.constants import DYNAMODB_BACKEND
+
+"""
+Consumption of the changes of the configs from the DynamoDB Stream.
+
+The records read from the stream, those of the writes of every replica and
+region included, are turned into changes and handed to the registered
+callbacks, which keep the local cache and the change events current within
+about `poll_interval` seconds. The checkpoints are saved once the callbacks
+handled the records, so a record is handled at least once.
+"""
+
+logger = get_logger(__name__)
+
+
+class StreamConsumer:
+    def __init__(
+        self, open_reader: Callable[[], Optional[StreamReader]], poll_interval: float
+    ):
+        """
+        :param open_reader: builds the reader of the stream, None if there is no stream
+        :param poll_interval: the number of seconds to wait once the stream is caught up
+        """
+        self.open_reader = open_reader
+        self.poll_interval = poll_interval
+        self.reader: Optional[StreamReader] = None
+        self._callbacks: List[Callable[[StreamChange], None]] = []
+        self._resync_callbacks: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._trimmed = 0
+        self.changes = 0
+        self.failed = 0
+        self.resyncs = 0
+
+    def register(self, callback: Callable[[StreamChange], None]) -> None:
+        """
+        Method to have a callback called, from the event loop, with every change read
+        :param callback:
+        """
+        self._callbacks.append(callback)
+
+    def register_resync(self, callback: Callable[[], None]) -> None:
+        """
+        Method to have a callback called, from the event loop, whenever
+        records were trimmed from the stream before they could be read, so
+        that the changes they held are unknown
+        :param callback:
+        """
+        self._resync_callbacks.append(callback)
+
+    def start(self) -> None:
+        """
+        Method to start tailing the stream, from the event loop
+        """
+        if self._task is not None:
+            return
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("Stream consumer stopped.")
+
+    def stats(self) -> dict:
+        stats = {
+            "changes": self.changes,
+            "failed": self.failed,
+            "resyncs": self.resyncs,
+        }
+        if self.reader is not None:
+            stats.update(self.reader.stats())
+        return stats
+
+    def handle(self, records: List[dict]) -> int:
+        """
+        Method to hand the changes of stream records to the callbacks
+        :param records: the stream records
+        :return: the number of changes
+        """
+        changes = [
+            change
+            for change in (stream_change(record) for record in records)
+            if change is not None
+        ]
+        for change in changes:
+            for callback in self._callbacks:
+                try:
+                    callback(change)
+                except Exception:
+                    logger.exception("Stream callback failed.", change=repr(change))
+        self.changes += len(changes)
+        return len(changes)
+
+    def resync_if_trimmed(self) -> bool:
+        """
+        Method to call the resync callbacks if records were trimmed from the
+        stream since the last call
+        :return: True if the callbacks were called
+        """
+        if self.reader is None or self.reader.trimmed == self._trimmed:
+            return False
+        self._trimmed = self.reader.trimmed
+        self.resyncs += 1
+        logger.warning("Stream changes were lost, resyncing.")
+        for callback in self._resync_callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Stream resync callback failed.")
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            self.reader = await loop.run_in_executor(None, self.open_reader)
+        except Exception:
+            logger.exception("Could not open the stream.")
+        if self.reader is None:
+            return
+        logger.info("Stream consumer started.", stream_arn=self.reader.stream_arn)
+        while True:
+            try:
+                records = await loop.run_in_executor(None, self.reader.read)
+                self.resync_if_trimmed()
+                if records:
+                    self.handle(records)
+                    await loop.run_in_executor(None, self.reader.checkpoints.save)
+            except Exception:
+                logger.exception("Could not read the stream.")
+                self.failed += 1
+                records = []
+            if not records:
+                await asyncio.sleep(self.poll_interval)
+
+
+def _open_reader() -> Optional[StreamReader]:
+    # The stream is enabled along with the set up of the table
+    table_bootstrap.ensure()
+    return open_stream_reader(
+        get_dynamodb().Table(services_config_table_name()),
+        checkpoint_path=settings.stream_checkpoint_path,
+        start_position=settings.stream_start_position,
+        batch_size=settings.stream_batch_size,
+    )
+
+
+stream_consumer = StreamConsumer(
+    _open_reader, poll_interval=settings.stream_poll_interval_seconds
+)
+
+
+def start_consuming() -> None:
+    """
+    Method to start tailing the stream of the config table, from the event loop
+    """
+    # Only the dynamodb table has a stream to tail
+    if settings.stream_consumer_enabled and settings.dal_backend == DYNAMODB_BACKEND:
+        stream_consumer.start()
+
+
+async def stop_consuming() -> None:
+    await stream_consumer.stop()
@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import random
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from structlog import get_logger
+
+"""
+Scheduling of the change checks of the watched services.
+
+Every service is checked on its own interval, jittered so that the checks of
+services registered together spread out. A check finding changes halves the
+interval of its service, down to `min_interval`, one finding none doubles it,
+up to `max_interval`: idle services cost little however many there are, and
+the checks go where the changes are. At most `max_concurrency` checks run at
+once, the due ones waiting for a slot.
+"""
+
+logger = get_logger(__name__)
+
+JITTER = 0.1
+TIGHTEN_FACTOR = 0.5
+BACKOFF_FACTOR = 2.0
+
+
+class WatchScheduler:
+    def __init__(
+        self,
+        check: Callable[[str], Awaitable[list]],
+        min_interval: float,
+        max_interval: float,
+        max_concurrency: int,
+        max_services: int,
+    ):
+        """
+        :param check: the coroutine checking a service, returning its changes
+        :param min_interval: the min number of seconds between two checks of a service
+        :param max_interval: the max number of seconds between two checks of a service
+        :param max_concurrency: the max number of checks running at once
+        :param max_services: the max number of watched services
+        """
+        self.check = check
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_concurrency = max_concurrency
+        self.max_services = max_services
+        self._intervals: Dict[str, float] = {}
+        # The time a service is due, None while it is being checked. The
+        # heap entries not matching it are stale and skipped.
+        self._next_due: Dict[str, Optional[float]] = {}
+        self._due: List[Tuple[float, str]] = []
+        self._checks: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self.checked = 0
+        self.changed = 0
+        self.failed = 0
+
+    def register(self, service_id: str) -> bool:
+        """
+        Method to start watching a service, from the event loop
+        :param service_id:
+        :return: False if too many services are watched already
+        """
+        if service_id in self._intervals:
+            return True
+        if len(self._intervals) >= self.max_services:
+            logger.warning("Too many watched services.", service_id=service_id)
+            return False
+        self._intervals[service_id] = self.min_interval
+        # Spreads out the first checks of the services registered together
+        self._schedule(service_id, random.uniform(0, self.min_interval))
+        return True
+
+    def unregister(self, service_id: str) -> None:
+        self._intervals.pop(service_id, None)
+        self._next_due.pop(service_id, None)
+
+    def start(self) -> None:
+        """
+        Method to start checking the watched services, from the event loop
+        """
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._task = asyncio.ensure_future(self._run())
+        logger.info("Watch scheduler started.", services=len(self._intervals))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        tasks = [self._task, *self._checks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        logger.info("Watch scheduler stopped.")
+
+    def stats(self) -> dict:
+        return {
+            "services": len(self._intervals),
+            "running": len(self._checks),
+            "checked": self.checked,
+            "changed": self.changed,
+            "failed": self.failed,
+        }
+
+    def _schedule(self, service_id: str, delay: float) -> None:
+        due = _now() + delay
+        self._next_due[service_id] = due
+        heapq.heappush(self._due, (due, service_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop_due(self) -> Optional[str]:
+        while self._due and self._due[0][0] <= _now():
+            due, service_id = heapq.heappop(self._due)
+            if self._next_due.get(service_id) == due:
+                self._next_due[service_id] = None
+                return service_id
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            service_id = self._pop_due()
+            if service_id is not None:
+                await self._slots.acquire()
+                task = asyncio.ensure_future(self._check(service_id))
+                self._checks.add(task)
+                task.add_done_callback(self._checks.discard)
+                continue
+            delay = self._due[0][0] - _now() if self._due else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _check(self, service_id: str) -> None:
+        try:
+            changes = await self.check(service_id)
+        except Exception:
+            logger.exception("Could not check the service.", service_id=service_id)
+            changes = None
+            self.failed += 1
+        finally:
+            self._slots.release()
+        self.checked += 1
+        if service_id not in self._intervals:
+            return
+        if changes:
+            self.changed += 1
+            interval = self._intervals[service_id] * TIGHTEN_FACTOR
+        else:
+            interval = self._intervals[service_id] * BACKOFF_FACTOR
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        self._intervals[service_id] = interval
+        self._schedule(service_id, interval * random.uniform(1 - JITTER, 1 + JITTER))
+
+
+def _now() -> float:
+    return asyncio.get_event_loop().time()
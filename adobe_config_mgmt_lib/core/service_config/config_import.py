@@ -0,0 +1,95 @@
+import json
+from typing import Dict, List, Tuple, Union
+
+from pydantic import ValidationError
+
+from adobe_config_mgmt_lib.models.configs.service_config import (
+    ImportItemResult,
+    ImportResponse,
+    ServiceConfigImportItem,
+)
+
+"""
+Book-keeping of a bulk import of configs.
+
+The items are validated as they arrive and grouped in windows, which are
+written with a single batch call each. Every item gets a result in the
+final report, in the order it was received.
+"""
+
+WRITTEN = "written"
+FAILED = "failed"
+INVALID = "invalid"
+SUPERSEDED = "superseded"
+
+
+class ConfigImporter:
+    def __init__(self, window_size: int):
+        self.window_size = window_size
+        self.results: List[ImportItemResult] = []
+        self._window: Dict[Tuple[str, str], Tuple[int, ServiceConfigImportItem]] = {}
+        self._pending: Dict[Tuple[str, str], int] = {}
+
+    def add(self, raw_item: Union[dict, str, bytes]) -> bool:
+        """
+        Validates an item and queues it in the current window
+        :param raw_item: the item, or its JSON encoding
+        :return: True once the window is full and should be written
+        """
+        index = len(self.results)
+        try:
+            if isinstance(raw_item, (str, bytes)):
+                raw_item = json.loads(raw_item)
+            item = ServiceConfigImportItem.parse_obj(raw_item)
+        except (ValueError, ValidationError) as e:
+            self.results.append(
+                ImportItemResult(index=index, status=INVALID, error=str(e))
+            )
+            return False
+
+        result = ImportItemResult(
+            index=index,
+            service_id=item.service_id,
+            config_name=item.config_name,
+            status=WRITTEN,
+        )
+        self.results.append(result)
+        key = (item.service_id, item.config_name)
+        # A batch can't hold the same key twice, the last occurrence wins
+        if key in self._window:
+            self.results[self._window[key][0]].status = SUPERSEDED
+        self._window[key] = (index, item)
+        return len(self._window) >= self.window_size
+
+    def take_window(self) -> List[ServiceConfigImportItem]:
+        """
+        Hands over the queued items, emptying the window
+        :return: the items to write
+        """
+        window = self._window
+        self._window = {}
+        self._pending = {key: index for key, (index, _) in window.items()}
+        return [item for _, item in window.values()]
+
+    def complete_window(self, failed: Dict[Tuple[str, str], str]) -> None:
+        """
+        Records the outcome of writing the last window taken
+        :param failed: the keys which could not be written, with the reason
+        """
+        for key, error in failed.items():
+            result = self.results[self._pending[key]]
+            result.status = FAILED
+            result.error = error
+        self._pending = {}
+
+    def has_pending_items(self) -> bool:
+        return bool(self._window)
+
+    def report(self) -> ImportResponse:
+        """
+        :return: the per-item results along with the totals of every status
+        """
+        response = ImportResponse(results=self.results)
+        for result in self.results:
+            setattr(response, result.status, getattr(response, result.status) + 1)
+        return response
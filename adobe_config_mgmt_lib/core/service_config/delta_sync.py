@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timezone
+
+"""
+Delta sync of the configs.
+
+A client holding a sync version reads only the configs changed after it,
+the deleted ones included as tombstones, along with the sync version to
+resume from next time. Sync versions are modification times in
+microseconds, so a client may also start from a timestamp.
+
+The latest changes may not be indexed yet, or may have been stamped by a
+replica whose clock is behind, so the sync version returned stays
+`settle_seconds` behind the present: the changes within that window are
+returned again by the next sync, which clients apply idempotently.
+Tombstones expire, a sync version older than their retention would miss
+deletions and requires a full read instead.
+"""
+
+MICROS = 1000000
+
+
+class SyncVersionExpiredError(RuntimeError):
+    """
+    The sync version is older than the retention of the tombstones
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(status_code, message)
+        self.status_code = status_code
+        self.message = message
+
+
+def parse_since(since: str) -> int:
+    """
+    Method to read the point a delta sync starts from
+    :param since: a sync version, or an ISO 8601 timestamp
+    :return: the sync version
+    :raises ValueError: if it is neither
+    """
+    since = since.strip()
+    if since.isdigit():
+        return int(since)
+    timestamp = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp() * MICROS)
+
+
+def current_sync_version(settle_seconds: float) -> int:
+    """
+    Method to get the sync version a full read is at least as recent as
+    :param settle_seconds: how far behind the present sync versions stay
+    :return: the sync version
+    """
+    return time.time_ns() // 1000 - int(settle_seconds * MICROS)
+
+
+def next_sync_version(
+    since: int, last_modified_at: int, more: bool, settle_seconds: float
+) -> int:
+    """
+    Method to get the sync version to resume a delta sync from
+    :param since: the sync version the delta sync started from
+    :param last_modified_at: the modification time of the last change returned
+    :param more: whether the changes were cut at the page size
+    :param settle_seconds: how far behind the present sync versions stay
+    :return: the sync version
+    """
+    if more:
+        # A page holds all the changes stamped with the time of its last one,
+        # the next one resumes right after it
+        return last_modified_at
+    return max(since, current_sync_version(settle_seconds))
+
+
+def check_retention(since: int, retention_seconds: int) -> None:
+    """
+    Method to check that the deletions after a sync version are still known
+    :param since: the sync version
+    :param retention_seconds: how long the tombstones are kept
+    :raises SyncVersionExpiredError: if the sync version is older than the retention
+    """
+    if since < time.time_ns() // 1000 - retention_seconds * MICROS:
+        raise SyncVersionExpiredError(
+            410,
+            "The sync version is older than the retention of the deleted configs, "
+            "read all the configs again instead",
+        )
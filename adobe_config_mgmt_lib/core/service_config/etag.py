@@ -0,0 +1,51 @@
+from typing import Optional
+
+"""
+Entity tags of the configs, derived from their version.
+"""
+
+ANY_ETAG = "*"
+WEAK_ETAG_PREFIX = "W/"
+
+
+def make_etag(version: int) -> str:
+    """
+    Method to build the strong ETag of a config
+    :param version: the version of the config
+    :return: the quoted ETag
+    """
+    return f'"{int(version)}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """
+    Method to read the version a write is conditioned on
+    :param header: the value of the If-Match header
+    :return: the expected version, None if any version is accepted
+    :raises ValueError: if the header doesn't hold a config ETag
+    """
+    if header is None or header.strip() == ANY_ETAG:
+        return None
+    etag = header.strip()
+    if etag.startswith(WEAK_ETAG_PREFIX):
+        etag = etag[len(WEAK_ETAG_PREFIX) :]
+    return int(etag.strip('"'))
+
+
+def etag_matches(header: Optional[str], version: int) -> bool:
+    """
+    Method to check an If-None-Match header against the current version of a config
+    :param header: the value of the If-None-Match header
+    :param version: the current version of the config
+    :return: True if the client already holds this version
+    """
+    if not header:
+        return False
+    current = make_etag(version)
+    for etag in header.split(","):
+        etag = etag.strip()
+        if etag.startswith(WEAK_ETAG_PREFIX):
+            etag = etag[len(WEAK_ETAG_PREFIX) :]
+        if etag in (ANY_ETAG, current):
+            return True
+    return False
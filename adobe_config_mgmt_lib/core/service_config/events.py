@@ -0,0 +1,158 @@
+import asyncio
+import itertools
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from structlog import get_logger
+
+"""
+Fan-out of the config change events to the push subscribers.
+
+Every subscriber has a bounded queue and subscribes to services, to configs,
+or to both. Publishing only visits the subscribers of the changed config and
+of its service. A subscriber too slow to keep up has its pending events
+dropped and replaced by a single resync event, telling it to re-read the
+configs it follows, so a slow consumer never holds events or memory back.
+"""
+
+logger = get_logger()
+
+CHANGE_EVENT = "config_changed"
+RESYNC_EVENT = "resync"
+
+# A topic is a (service ID, config name) pair, the config name being None
+# for all the configs of the service
+Topic = Tuple[str, Optional[str]]
+
+
+def change_event(
+    service_id: str,
+    config_name: Optional[str],
+    version: Optional[int] = None,
+    change: Optional[str] = None,
+    diff: Optional[dict] = None,
+) -> dict:
+    """
+    Method to build the event of a config change
+    :param service_id:
+    :param config_name: the changed config, None if unknown
+    :param version: the new version of the config, None if unknown
+    :param change: whether the config was added, removed or modified, None if unknown
+    :param diff: the changed keys of the config, None if unknown
+    :return: the event
+    """
+    return {
+        "type": CHANGE_EVENT,
+        "service_id": service_id,
+        "config_name": config_name,
+        # The versions read from the database are decimals
+        "version": None if version is None else int(version),
+        "change": change,
+        "diff": diff,
+    }
+
+
+class Subscription:
+    def __init__(self, topics: Iterable[Topic], max_queue_size: int):
+        self.topics: Set[Topic] = set(topics)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+
+    def offer(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Dropping everything pending rather than the newest event only,
+            # the subscriber has to re-read its configs either way
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": RESYNC_EVENT})
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        """
+        Method to wait for the next event
+        :param timeout: the max number of seconds to wait
+        :return: the event, None if there was none before the timeout
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    def __init__(self, max_queue_size: int):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[Topic, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, topics: Iterable[Topic]) -> Subscription:
+        """
+        Method to subscribe to the changes of services and configs,
+        from the event loop
+        :param topics: the (service ID, config name) pairs, with a None
+            config name for all the configs of the service
+        :return: the subscription
+        """
+        self._loop = asyncio.get_event_loop()
+        subscription = Subscription(topics, self.max_queue_size)
+        for topic in subscription.topics:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def publish(self, event: dict) -> None:
+        """
+        Method to publish a change event, from any thread
+        :param event: the event, see `change_event`
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if self._loop is not None and self._loop.is_closed():
+            self._loop = None
+        if self._loop is not None and running_loop is not self._loop:
+            self._loop.call_soon_threadsafe(self._dispatch, event)
+        else:
+            self._dispatch(event)
+
+    def publish_resync(self) -> None:
+        """
+        Method to tell every subscriber to re-read the configs it follows,
+        when the changes it may have missed are unknown, from the event loop
+        """
+        subscriptions = set().union(*self._subscribers.values())
+        for subscription in subscriptions:
+            subscription.offer({"type": RESYNC_EVENT})
+
+    def stats(self) -> dict:
+        subscriptions = set().union(*self._subscribers.values())
+        return {
+            "subscribers": len(subscriptions),
+            "topics": len(self._subscribers),
+            "published": self.published,
+            "dropped": sum(subscription.dropped for subscription in subscriptions),
+        }
+
+    def _dispatch(self, event: dict) -> None:
+        event = dict(event, id=next(self._ids))
+        self.published += 1
+        topics = [(event["service_id"], None)]
+        if event.get("config_name") is not None:
+            topics.append((event["service_id"], event["config_name"]))
+        # A subscriber of both the config and its service gets the event once
+        subscriptions = set()
+        for topic in topics:
+            subscriptions.update(self._subscribers.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.offer(event)
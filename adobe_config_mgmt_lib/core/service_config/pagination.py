@@ -0,0 +1,40 @@
+import base64
+import json
+from typing import Optional
+
+"""
+Opaque cursors for paging through the configs of a service.
+
+A cursor wraps the key of the last entry returned, so the next page can
+resume right after it.
+"""
+
+
+def encode_cursor(last_key: Optional[dict]) -> Optional[str]:
+    """
+    Method to build the cursor of the next page
+    :param last_key: the key of the last entry returned, None on the last page
+    :return: the url-safe cursor, None on the last page
+    """
+    if not last_key:
+        return None
+    raw = json.dumps(last_key, separators=(",", ":"), sort_keys=True, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """
+    Method to read back the key wrapped by a cursor
+    :param cursor: the cursor returned with the previous page
+    :return: the key to resume after
+    :raises ValueError: if the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(last_key, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_key
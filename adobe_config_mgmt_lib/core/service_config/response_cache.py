@@ -0,0 +1,74 @@
+import gzip
+from typing import Hashable, Optional
+
+from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal.cache.lru_cache import LRUCache
+
+"""
+Cache of the encoded config responses.
+
+The JSON bytes of a response, and their gzip encoding when large enough,
+are kept along with the version of the config they were encoded from. A
+cached response is only served for that same version, so the cache never
+needs to be invalidated: a write makes its entries unusable.
+"""
+
+GZIP_LEVEL = 6
+
+
+class EncodedResponse:
+    __slots__ = ("version", "body", "gzipped_body")
+
+    def __init__(self, version: int, body: bytes, gzipped_body: Optional[bytes]):
+        self.version = version
+        self.body = body
+        self.gzipped_body = gzipped_body
+
+
+class ResponseCache:
+    def __init__(self, cache: LRUCache, gzip_min_bytes: int):
+        self.cache = cache
+        self.gzip_min_bytes = gzip_min_bytes
+
+    def get(self, key: Hashable, version: int) -> Optional[EncodedResponse]:
+        """
+        Method to fetch the response encoded from a version of a config
+        :param key: the cache key of the response
+        :param version: the current version of the config
+        :return: the encoded response, None if absent or encoded from another version
+        """
+        encoded = self.cache.get(key)
+        if encoded is None or encoded.version != version:
+            return None
+        return encoded
+
+    def put(self, key: Hashable, version: int, body: bytes) -> EncodedResponse:
+        """
+        Method to cache the encoded response of a version of a config
+        :param key: the cache key of the response
+        :param version: the version of the config the response was encoded from
+        :param body: the JSON encoded response
+        :return: the cached response, along with its gzip encoding if large enough
+        """
+        gzipped_body = None
+        if len(body) >= self.gzip_min_bytes:
+            gzipped_body = gzip.compress(body, GZIP_LEVEL)
+        encoded = EncodedResponse(version, body, gzipped_body)
+        self.cache.put(key, encoded, size=len(body) + len(gzipped_body or b""))
+        return encoded
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+response_cache = ResponseCache(
+    LRUCache(
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+    ),
+    gzip_min_bytes=settings.response_gzip_min_bytes,
+)
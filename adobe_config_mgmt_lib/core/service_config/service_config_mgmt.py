@@ -1,15 +1,75 @@
 import asyncio
+import time
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
 from fastapi.encoders import jsonable_encoder
 from structlog import get_logger
 
 from adobe_config_mgmt_lib.core.config import settings
-from adobe_config_mgmt_lib.core.cron.config_change_listener import start
-from adobe_config_mgmt_lib.dal import dynamodb_dal_instance
-from adobe_config_mgmt_lib.models.configs.service_config import ServiceConfigPayload
+from adobe_config_mgmt_lib.core.cron.config_change_listener import (
+    ADDED,
+    MODIFIED,
+    REMOVED,
+    ConfigChange,
+    change_detector,
+    watch_scheduler,
+)
+from adobe_config_mgmt_lib.core.cron.stream_consumer import stream_consumer
+from adobe_config_mgmt_lib.core.service_config.config_import import (
+    WRITTEN,
+    ConfigImporter,
+)
+from adobe_config_mgmt_lib.core.service_config.delta_sync import (
+    check_retention,
+    next_sync_version,
+)
+from adobe_config_mgmt_lib.core.service_config.events import EventBus, change_event
+from adobe_config_mgmt_lib.core.service_config.pagination import (
+    decode_cursor,
+    encode_cursor,
+)
+from adobe_config_mgmt_lib.core.service_config.response_cache import response_cache
+from adobe_config_mgmt_lib.core.service_config.single_flight import SingleFlight
+from adobe_config_mgmt_lib.core.service_config.stale_store import StaleStore
+from adobe_config_mgmt_lib.core.service_config.watch import WatchHub
+from adobe_config_mgmt_lib.dal import async_dal_instance, config_cache, dal_instance
+from adobe_config_mgmt_lib.dal.cache.cached_db_handler import CachedDBHandler
+from adobe_config_mgmt_lib.dal.cache.lru_cache import LRUCache
+from adobe_config_mgmt_lib.dal.config_patch import validate_patch
+from adobe_config_mgmt_lib.dal.dynamodb.streams import INSERT_EVENT, StreamChange
+from adobe_config_mgmt_lib.dal.projection import project_item
+from adobe_config_mgmt_lib.models.configs.service_config import (
+    ImportResponse,
+    ServiceConfigPayload,
+)
 from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_ITEMS_KEY,
     CONFIG_KEY,
+    CONFIG_KEYS_KEY,
     CONFIG_NAME_KEY,
+    CONSISTENT_READ_KEY,
+    EXCLUSIVE_START_KEY,
+    EXPECTED_VERSION_KEY,
+    HEAD_VERSION_KEY,
+    LIMIT_KEY,
+    PATCH_KEY,
+    PATCH_TYPE_KEY,
+    PROJECTION_KEY,
     SERVICE_ID_KEY,
+    SERVICE_IDS_KEY,
+    SINCE_KEY,
+    STRONG_CONSISTENCY,
+    VERSION_KEY,
 )
 
 logger = get_logger()
@@ -25,15 +85,124 @@ def add_service_config(
     :param config_data:
     :return:
     """
-    payload_json = jsonable_encoder(config_data)
-    res = dynamodb_dal_instance.add_configs(
-        data={
-            SERVICE_ID_KEY: service_id,
-            CONFIG_NAME_KEY: config_name,
-            CONFIG_KEY: payload_json,
-        },
-        execution_context=None,
+    res = dal_instance.add_configs(
+        data=_config_item(service_id, config_name, config_data), execution_context=None,
+    )
+    _log_add_result(res, service_id, config_name)
+    if res:
+        _notify_change(service_id, config_name)
+    return res
+
+
+async def add_service_config_async(
+    service_id: str, config_name: str, config_data: ServiceConfigPayload
+):
+    """
+    Non-blocking variant of `add_service_config`
+    :param service_id:
+    :param config_name:
+    :param config_data:
+    :return:
+    """
+    res = await async_dal_instance.add_configs(
+        data=_config_item(service_id, config_name, config_data), execution_context=None,
+    )
+    _log_add_result(res, service_id, config_name)
+    if res:
+        _notify_change(service_id, config_name)
+    return res
+
+
+def import_service_configs(items: Iterable):
+    """
+    Method to bulk import configs, across services, with batch writes
+    :param items: the items to import, as dicts or JSON encoded lines, each
+        with the service_id, config_name and config
+    :return: the report of the import, with the result of every item
+    """
+    importer = ConfigImporter(window_size=settings.import_window_size)
+    for raw_item in items:
+        if importer.add(raw_item):
+            importer.complete_window(
+                dal_instance.batch_add_configs(
+                    data=_import_window(importer), execution_context=None
+                )
+            )
+    if importer.has_pending_items():
+        importer.complete_window(
+            dal_instance.batch_add_configs(
+                data=_import_window(importer), execution_context=None
+            )
+        )
+    return _publish_import_changes(_log_import_report(importer))
+
+
+async def import_service_configs_async(items: AsyncIterable):
+    """
+    Non-blocking variant of `import_service_configs`, writing each window as
+    soon as it is full, while the rest of the items are still arriving
+    :param items: the items to import, as dicts or JSON encoded lines
+    :return: the report of the import, with the result of every item
+    """
+    importer = ConfigImporter(window_size=settings.import_window_size)
+    async for raw_item in items:
+        if importer.add(raw_item):
+            importer.complete_window(
+                await async_dal_instance.batch_add_configs(
+                    data=_import_window(importer), execution_context=None
+                )
+            )
+    if importer.has_pending_items():
+        importer.complete_window(
+            await async_dal_instance.batch_add_configs(
+                data=_import_window(importer), execution_context=None
+            )
+        )
+    return _publish_import_changes(_log_import_report(importer))
+
+
+def _import_window(importer: ConfigImporter):
+    return {
+        CONFIG_ITEMS_KEY: [
+            _config_item(
+                item.service_id,
+                item.config_name,
+                ServiceConfigPayload(config=item.config),
+            )
+            for item in importer.take_window()
+        ]
+    }
+
+
+def _log_import_report(importer: ConfigImporter):
+    report = importer.report()
+    logger.info(
+        "Imported the configs",
+        written=report.written,
+        failed=report.failed,
+        invalid=report.invalid,
+        superseded=report.superseded,
     )
+    return report
+
+
+def _publish_import_changes(report: ImportResponse) -> ImportResponse:
+    for result in report.results:
+        if result.status == WRITTEN:
+            _notify_change(result.service_id, result.config_name)
+    return report
+
+
+def _config_item(service_id: str, config_name: str, config_data: ServiceConfigPayload):
+    payload_json = jsonable_encoder(config_data)
+    return {
+        SERVICE_ID_KEY: service_id,
+        CONFIG_NAME_KEY: config_name,
+        CONFIG_KEY: payload_json,
+    }
+
+
+def _log_add_result(res, service_id: str, config_name: str):
     if res:
         logger.info(
             "Added the configs successfully",
@@ -47,52 +216,746 @@ def add_service_config(
             config_name=config_name,
             status=res,
         )
-    return res
 
 
-def get_all_service_config(service_id: str):
+def get_all_service_config(
+    service_id: str, fields: List[List[str]] = None, consistent_read: bool = None
+):
     """
     Method to get all the configs for a given service
     :param service_id:
+    :param fields: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for a strongly consistent read, None for the default
     :return:
     """
-    # if not settings.is_cron_running:
-    #     logger.info("Starting the cron to check for any updates in the service config.")
-    #     asyncio.create_task(start(service_id=service_id))
-    #     settings.is_cron_running = True
+    return _get_configs(
+        data={SERVICE_ID_KEY: service_id},
+        execution_context={
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
+    )
+
 
-    return dynamodb_dal_instance.get_configs(
-        data={SERVICE_ID_KEY: service_id}, execution_context=None
+async def get_all_service_config_async(
+    service_id: str, fields: List[List[str]] = None, consistent_read: bool = None
+):
+    """
+    Non-blocking variant of `get_all_service_config`
+    :param service_id:
+    :param fields: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return:
+    """
+    _watch_service_changes(service_id)
+    return await _get_configs_async(
+        data={SERVICE_ID_KEY: service_id},
+        execution_context={
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
     )
 
 
-def get_service_config_by_name(service_id: str, config_name: str):
+def iter_service_config(
+    service_id: str,
+    page_size: int = None,
+    fields: List[List[str]] = None,
+    consistent_read: bool = None,
+):
+    """
+    Generator over all the configs of a given service, reading one page at a time
+    :param service_id:
+    :param page_size: the max number of configs read per page
+    :param fields: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return:
+    """
+    for page in dal_instance.iter_config_pages(
+        data={SERVICE_ID_KEY: service_id},
+        execution_context={
+            LIMIT_KEY: page_size or settings.config_page_size,
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
+    ):
+        yield from page
+
+
+async def iter_service_config_async(
+    service_id: str,
+    page_size: int = None,
+    fields: List[List[str]] = None,
+    consistent_read: bool = None,
+):
+    """
+    Non-blocking variant of `iter_service_config`
+    :param service_id:
+    :param page_size: the max number of configs read per page
+    :param fields: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return:
+    """
+    async for page in async_dal_instance.iter_config_pages(
+        data={SERVICE_ID_KEY: service_id},
+        execution_context={
+            LIMIT_KEY: page_size or settings.config_page_size,
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
+    ):
+        for item in page:
+            yield item
+
+
+async def get_service_config_page_async(
+    service_id: str,
+    limit: int,
+    cursor: str = None,
+    fields: List[List[str]] = None,
+    consistent_read: bool = None,
+):
+    """
+    Method to get a single page of the configs of a given service
+    :param service_id:
+    :param limit: the max number of configs in the page
+    :param cursor: the cursor returned with the previous page, if any
+    :param fields: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return: the configs of the page and the cursor of the next page, None on the last page
+    :raises ValueError: if the cursor is malformed
+    """
+    exclusive_start_key = decode_cursor(cursor)
+    _watch_service_changes(service_id)
+    if exclusive_start_key and exclusive_start_key.get(SERVICE_ID_KEY) != service_id:
+        raise ValueError(f"The cursor does not belong to the service: {service_id}")
+    items, last_key = await async_dal_instance.get_config_page(
+        data={SERVICE_ID_KEY: service_id},
+        execution_context={
+            LIMIT_KEY: limit,
+            EXCLUSIVE_START_KEY: exclusive_start_key,
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
+    )
+    return items, encode_cursor(last_key)
+
+
+def get_service_config_by_name(
+    service_id: str,
+    config_name: str,
+    fields: List[List[str]] = None,
+    consistent_read: bool = None,
+):
     """
     Method to get the specific configs for a given service
     :param service_id:
     :param config_name:
+    :param fields: the paths of the config to return, None for the whole config
+    :param consistent_read: True for a strongly consistent read, None for the default
     :return:
     """
-    # if not settings.is_cron_running:
-    #     logger.info("Starting the cron to check for any updates in the service config.")
-    #     asyncio.create_task(start(service_id=service_id))
-    #     settings.is_cron_running = True
+    return _get_configs(
+        data={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+        execution_context={
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
+    )
 
-    return dynamodb_dal_instance.get_configs(
+
+async def get_service_config_by_name_async(
+    service_id: str,
+    config_name: str,
+    fields: List[List[str]] = None,
+    consistent_read: bool = None,
+):
+    """
+    Non-blocking variant of `get_service_config_by_name`
+    :param service_id:
+    :param config_name:
+    :param fields: the paths of the config to return, None for the whole config
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return:
+    """
+    return await _get_configs_async(
         data={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
-        execution_context=None,
+        execution_context={
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+        },
     )
 
 
-def update_service_config(service_id: str, config_name: str, config: dict):
+def peek_service_config(
+    service_id: str, config_name: str, fields: List[List[str]] = None
+) -> Optional[dict]:
     """
+    Method to fetch a config from the in-process cache only, without blocking
+    :param service_id:
+    :param config_name:
+    :param fields: the paths of the config to return, None for the whole config
+    :return: the cached entry, None if the config isn't cached
+    """
+    if not isinstance(dal_instance, CachedDBHandler):
+        return None
+    item = dal_instance.peek_config(service_id, config_name)
+    if item is None:
+        return None
+    if fields is None and settings.stale_serving_enabled:
+        # The hot configs are served from the cache, their last known
+        # state is kept all the same
+        stale_store.remember((service_id, config_name), [item])
+    return project_item(item, fields)
+
+
+def batch_get_service_config(keys: List[Tuple[str, str]], consistent_read: bool = None):
+    """
+    Method to get many configs, across services, in as few round trips as possible
+    :param keys: the (service_id, config_name) pairs to fetch
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return: the configs found, in the order of the keys, and the keys not found
+    """
+    keys = list(dict.fromkeys(keys))
+    items = dal_instance.batch_get_configs(
+        data={CONFIG_KEYS_KEY: keys},
+        execution_context={CONSISTENT_READ_KEY: consistent_read},
+    )
+    return _order_batch_result(keys, items)
+
+
+async def batch_get_service_config_async(
+    keys: List[Tuple[str, str]], consistent_read: bool = None
+):
+    """
+    Non-blocking variant of `batch_get_service_config`
+    :param keys: the (service_id, config_name) pairs to fetch
+    :param consistent_read: True for strongly consistent reads, None for the default
+    :return: the configs found, in the order of the keys, and the keys not found
+    """
+    keys = list(dict.fromkeys(keys))
+    items = await async_dal_instance.batch_get_configs(
+        data={CONFIG_KEYS_KEY: keys},
+        execution_context={CONSISTENT_READ_KEY: consistent_read},
+    )
+    return _order_batch_result(keys, items)
+
+
+def _order_batch_result(keys: List[Tuple[str, str]], items: list):
+    items_by_key = {
+        (item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY]): item for item in items
+    }
+    found = [items_by_key[key] for key in keys if key in items_by_key]
+    missing = [key for key in keys if key not in items_by_key]
+    return found, missing
+
 
+def update_service_config(
+    service_id: str, config_name: str, config: dict, expected_version: int = None
+):
+    """
+    Method to update the config of a given service
     :param service_id:
     :param config_name:
     :param config:
-    :return:
+    :param expected_version: only update the config if it is at this version
+    :return: the updated config, None if there is no such config
+    :raises ConfigVersionConflictError: if the config is not at the expected version
     """
-    return dynamodb_dal_instance.update_configs(
+    result = dal_instance.update_configs(
         data={"service_id": service_id, "config_name": config_name, "config": config},
+        execution_context={EXPECTED_VERSION_KEY: expected_version},
+    )
+    if result:
+        _notify_change(service_id, config_name, result)
+    return result
+
+
+async def update_service_config_async(
+    service_id: str, config_name: str, config: dict, expected_version: int = None
+):
+    """
+    Non-blocking variant of `update_service_config`
+    :param service_id:
+    :param config_name:
+    :param config:
+    :param expected_version: only update the config if it is at this version
+    :return: the updated config, None if there is no such config
+    :raises ConfigVersionConflictError: if the config is not at the expected version
+    """
+    result = await async_dal_instance.update_configs(
+        data={"service_id": service_id, "config_name": config_name, "config": config},
+        execution_context={EXPECTED_VERSION_KEY: expected_version},
+    )
+    if result:
+        _notify_change(service_id, config_name, result)
+    return result
+
+
+def patch_service_config(
+    service_id: str,
+    config_name: str,
+    patch,
+    patch_type: str,
+    expected_version: int = None,
+):
+    """
+    Method to partially update the config of a given service
+    :param service_id:
+    :param config_name:
+    :param patch: a JSON Merge Patch object or a JSON Patch array
+    :param patch_type: MERGE_PATCH or JSON_PATCH
+    :param expected_version: only patch the config if it is at this version
+    :return: the updated config, None if there is no such config
+    :raises InvalidPatchError: if the patch is malformed
+    :raises PatchConflictError: if the patch can't be applied to the config
+    :raises ConfigVersionConflictError: if the config is not at the expected version
+    """
+    validate_patch(patch, patch_type)
+    result = dal_instance.patch_configs(
+        data=_patch_data(service_id, config_name, patch, patch_type),
+        execution_context={EXPECTED_VERSION_KEY: expected_version},
+    )
+    if result:
+        _notify_change(service_id, config_name, result)
+    return result
+
+
+async def patch_service_config_async(
+    service_id: str,
+    config_name: str,
+    patch,
+    patch_type: str,
+    expected_version: int = None,
+):
+    """
+    Non-blocking variant of `patch_service_config`
+    :param service_id:
+    :param config_name:
+    :param patch: a JSON Merge Patch object or a JSON Patch array
+    :param patch_type: MERGE_PATCH or JSON_PATCH
+    :param expected_version: only patch the config if it is at this version
+    :return: the updated config, None if there is no such config
+    :raises InvalidPatchError: if the patch is malformed
+    :raises PatchConflictError: if the patch can't be applied to the config
+    :raises ConfigVersionConflictError: if the config is not at the expected version
+    """
+    validate_patch(patch, patch_type)
+    result = await async_dal_instance.patch_configs(
+        data=_patch_data(service_id, config_name, patch, patch_type),
+        execution_context={EXPECTED_VERSION_KEY: expected_version},
+    )
+    if result:
+        _notify_change(service_id, config_name, result)
+    return result
+
+
+def delete_service_config(service_id: str, config_name: str):
+    """
+    Method to delete the config of a given service
+    :param service_id:
+    :param config_name:
+    :return: the tombstone of the config, None if there is no such config
+    """
+    result = dal_instance.delete_configs(
+        data={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+        execution_context=None,
+    )
+    if result:
+        _forget_config(service_id, config_name)
+        _notify_change(service_id, config_name, result, change=REMOVED)
+    return result
+
+
+async def delete_service_config_async(service_id: str, config_name: str):
+    """
+    Non-blocking variant of `delete_service_config`
+    :param service_id:
+    :param config_name:
+    :return: the tombstone of the config, None if there is no such config
+    """
+    result = await async_dal_instance.delete_configs(
+        data={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
         execution_context=None,
     )
+    if result:
+        _forget_config(service_id, config_name)
+        _notify_change(service_id, config_name, result, change=REMOVED)
+    return result
+
+
+def _patch_data(service_id: str, config_name: str, patch, patch_type: str) -> dict:
+    return {
+        SERVICE_ID_KEY: service_id,
+        CONFIG_NAME_KEY: config_name,
+        PATCH_KEY: patch,
+        PATCH_TYPE_KEY: patch_type,
+    }
+
+
+def get_service_heads(service_ids: List[str], consistent_read: bool = None) -> dict:
+    """
+    Method to get the head versions of many services at once. The head of a
+    service moves on every write to its configs, so comparing heads tells
+    which services need their configs read again.
+    :param service_ids:
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return: the head version of every service
+    """
+    data = {SERVICE_IDS_KEY: service_ids}
+    execution_context = {CONSISTENT_READ_KEY: consistent_read}
+    key = _flight_key(data, execution_context)
+    if key is None:
+        return dal_instance.get_service_heads(data, execution_context)
+    return read_flight.do(
+        key, lambda: dal_instance.get_service_heads(data, execution_context)
+    )
+
+
+async def get_service_heads_async(
+    service_ids: List[str], consistent_read: bool = None
+) -> dict:
+    """
+    Non-blocking variant of `get_service_heads`
+    :param service_ids:
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return: the head version of every service
+    """
+    data = {SERVICE_IDS_KEY: service_ids}
+    execution_context = {CONSISTENT_READ_KEY: consistent_read}
+    key = _flight_key(data, execution_context)
+    if key is None:
+        return await async_dal_instance.get_service_heads(data, execution_context)
+    return await read_flight.do_async(
+        key, lambda: async_dal_instance.get_service_heads(data, execution_context)
+    )
+
+
+async def get_versioned_service_config_async(
+    service_id: str, fields: List[List[str]] = None, consistent_read: bool = None
+) -> Tuple[int, list]:
+    """
+    Method to get all the configs of a service, along with its head version
+    :param service_id:
+    :param fields: the paths of the configs to return, None for the whole configs
+    :param consistent_read: True for a strongly consistent read, None for the default
+    :return: the head version, which the configs are at least as recent as, and the configs
+    """
+    # Read first, so that a write landing in between makes the head older
+    # than the configs rather than newer
+    heads = await get_service_heads_async([service_id], consistent_read)
+    _watch_service_changes(service_id)
+    items = await _get_configs_async(
+        data={SERVICE_ID_KEY: service_id},
+        execution_context={
+            PROJECTION_KEY: fields,
+            CONSISTENT_READ_KEY: consistent_read,
+            HEAD_VERSION_KEY: heads[service_id],
+        },
+    )
+    return heads[service_id], items
+
+
+async def get_config_changes_async(
+    since: int, service_id: str = None, limit: int = None
+) -> Tuple[list, int, bool]:
+    """
+    Method to get the configs changed after a sync version, the deleted ones
+    included as tombstones, of a service or across services
+    :param since: the sync version to get the changes after
+    :param service_id: the service to get the changes of, None for all the services
+    :param limit: the max number of changes, None for the default page size
+    :return: the changes, oldest first, the sync version to resume from,
+        and whether there are more changes to get right away
+    :raises SyncVersionExpiredError: if the sync version is older than the
+        retention of the tombstones
+    """
+    check_retention(since, settings.tombstone_retention_seconds)
+    data = {} if service_id is None else {SERVICE_ID_KEY: service_id}
+    items, last_modified_at, more = await async_dal_instance.get_config_changes(
+        data=data, execution_context={SINCE_KEY: since, LIMIT_KEY: limit}
+    )
+    sync_version = next_sync_version(
+        since, last_modified_at, more, settings.delta_sync_settle_seconds
+    )
+    return items, sync_version, more
+
+
+async def watch_service_config_async(
+    service_id: str, config_name: str, version: int, timeout: float
+) -> Optional[int]:
+    """
+    Method to wait for a config to be written past a version
+    :param service_id:
+    :param config_name:
+    :param version: the version held by the client
+    :param timeout: the max number of seconds to wait
+    :return: the newer version, None if there was none before the timeout
+    """
+    return await watch_hub.wait((service_id, config_name), version, timeout)
+
+
+async def watch_service_configs_async(
+    service_id: str, version: int, timeout: float
+) -> Optional[int]:
+    """
+    Method to wait for any config of a service to be written past a service version
+    :param service_id:
+    :param version: the head version held by the client, see `get_service_heads`
+    :param timeout: the max number of seconds to wait
+    :return: the newer head version, None if there was none before the timeout
+    """
+    return await watch_hub.wait((service_id, None), version, timeout)
+
+
+async def _read_watched_version(key: Tuple[str, Optional[str]]) -> Optional[int]:
+    service_id, config_name = key
+    # Strongly consistent, so that the local cache is bypassed, and without
+    # the configs themselves
+    if config_name is None:
+        heads = await get_service_heads_async([service_id], consistent_read=True)
+        return heads[service_id]
+    items = await get_service_config_by_name_async(
+        service_id=service_id, config_name=config_name, fields=[], consistent_read=True
+    )
+    return int(items[0].get(VERSION_KEY, 0)) if items else None
+
+
+async def read_or_stale_async(
+    key: tuple,
+    read: Callable[[], Awaitable],
+    remember: bool = True,
+    allow_stale: bool = True,
+) -> Tuple[Any, Optional[float]]:
+    """
+    Method to run a read, answered with its last known result instead when
+    the read fails or outlasts the latency budget. The read left running
+    past the budget still refreshes the last known result.
+    :param key: identifies the read, see `StaleStore`
+    :param read: runs the read, its result is JSON serializable, None or
+        empty when there is nothing to read
+    :param remember: whether to keep the result, False for the partial reads
+    :param allow_stale: False for the reads which must see the latest writes
+    :return: the result, and its age in seconds when it is the last known
+        one, None when it is current
+    """
+    stale = None
+    if allow_stale and settings.stale_serving_enabled:
+        stale = stale_store.recall(key)
+    task = asyncio.ensure_future(read())
+    task.add_done_callback(partial(_remember_read, key, remember))
+    if stale is None:
+        return await task, None
+    try:
+        budget = settings.stale_read_budget_seconds or None
+        return await asyncio.wait_for(asyncio.shield(task), budget), None
+    except asyncio.TimeoutError:
+        logger.warning("Read past its budget, serving its last result.", key=key)
+    except Exception as e:
+        logger.warning("Read failed, serving its last result.", key=key, error=str(e))
+    return stale_store.serve(key)
+
+
+def _remember_read(key: tuple, remember: bool, task: asyncio.Future) -> None:
+    # Retrieves the error of the reads no longer awaited, for it not to be
+    # reported as unhandled
+    if task.cancelled() or task.exception() is not None:
+        return
+    if not task.result():
+        # Nothing to read any more, nothing to serve when the reads fail
+        stale_store.forget(key)
+    elif remember:
+        stale_store.remember(key, task.result())
+
+
+def _forget_config(service_id: str, config_name: str) -> None:
+    # The last known results of a removed config, and of its service which
+    # still lists it, are not to be served again
+    stale_store.forget((service_id, config_name))
+    stale_store.forget((service_id, None))
+
+
+def warm_start() -> int:
+    """
+    Method to load the last known results saved by the previous run, and to
+    cache the recent ones so that they are served before the table is read
+    :return: the number of results loaded
+    """
+    path = settings.stale_snapshot_path
+    if not path:
+        return 0
+    try:
+        count = stale_store.load(path)
+    except (OSError, ValueError) as e:
+        logger.warning(
+            "Could not load the last known results.", path=path, error=str(e)
+        )
+        return 0
+    warmed = 0
+    if isinstance(dal_instance, CachedDBHandler):
+        oldest = time.time() - settings.warm_start_max_age_seconds
+        for (service_id, config_name), value, read_at in stale_store.items():
+            if read_at >= oldest:
+                _prime_cache(service_id, config_name, value)
+                warmed += 1
+    logger.info(
+        "Loaded the last known results.", path=path, loaded=count, cached=warmed
+    )
+    return count
+
+
+def _prime_cache(service_id: str, config_name: Optional[str], value) -> None:
+    if config_name is None:
+        dal_instance.prime(
+            service_id, None, value[CONFIG_ITEMS_KEY], value[HEAD_VERSION_KEY]
+        )
+    else:
+        dal_instance.prime(service_id, config_name, value)
+
+
+def save_stale_results() -> bool:
+    """
+    Method to save the last known results, for the next run to start from
+    :return: True if they were saved, False if there was nothing new to save
+    """
+    if not settings.stale_snapshot_path:
+        return False
+    return stale_store.save(settings.stale_snapshot_path)
+
+
+def _get_configs(data: dict, execution_context: dict):
+    key = _flight_key(data, execution_context)
+    if key is None:
+        return dal_instance.get_configs(data, execution_context)
+    return read_flight.do(
+        key, lambda: dal_instance.get_configs(data, execution_context)
+    )
+
+
+async def _get_configs_async(data: dict, execution_context: dict):
+    key = _flight_key(data, execution_context)
+    if key is None:
+        return await async_dal_instance.get_configs(data, execution_context)
+    return await read_flight.do_async(
+        key, lambda: async_dal_instance.get_configs(data, execution_context)
+    )
+
+
+def _flight_key(data: dict, execution_context: dict) -> Optional[tuple]:
+    """
+    Method to identify a read, for the concurrent identical ones to be coalesced
+    :param data: the keys read
+    :param execution_context: the projection, consistency and head of the read
+    :return: the key of the read, None for a read not to be coalesced
+    """
+    if not settings.single_flight_enabled:
+        return None
+    consistent_read = execution_context.get(CONSISTENT_READ_KEY)
+    if consistent_read is None:
+        consistent_read = settings.read_consistency == STRONG_CONSISTENCY
+    if consistent_read:
+        # A strongly consistent read has to see the writes made before it
+        # started, which a read already in flight may not
+        return None
+    if SERVICE_IDS_KEY in data:
+        return SERVICE_IDS_KEY, tuple(data[SERVICE_IDS_KEY])
+    fields = execution_context.get(PROJECTION_KEY)
+    return (
+        data[SERVICE_ID_KEY],
+        data.get(CONFIG_NAME_KEY),
+        None if fields is None else tuple(tuple(path) for path in fields),
+        execution_context.get(HEAD_VERSION_KEY),
+    )
+
+
+def _watch_service_changes(service_id: str) -> None:
+    # The services read through this replica are checked for the changes
+    # made by the other ones
+    if settings.change_watch_enabled:
+        watch_scheduler.register(service_id)
+
+
+def _notify_change(
+    service_id: str, config_name: str, item: dict = None, change: str = None
+) -> None:
+    # From any thread, for the writes of this replica. Those of the other
+    # replicas come from the stream, the pollers and the change detector
+    watch_hub.poke((service_id, config_name))
+    watch_hub.poke((service_id, None))
+    version = item[VERSION_KEY] if item else None
+    if version is not None:
+        published_changes.put((service_id, config_name, version), True, size=1)
+    event_bus.publish(change_event(service_id, config_name, version, change=change))
+
+
+def _publish_detected_change(change: ConfigChange) -> None:
+    if change.kind == REMOVED:
+        _forget_config(change.service_id, change.config_name)
+    event_bus.publish(
+        change_event(
+            change.service_id,
+            change.config_name,
+            change.version,
+            change=change.kind,
+            diff=change.diff,
+        )
+    )
+
+
+def _apply_stream_change(change: StreamChange) -> None:
+    # The writes of this replica come back through the stream too, they
+    # were published already
+    published = (change.service_id, change.config_name, change.version)
+    if published_changes.get(published):
+        published_changes.invalidate(published)
+        return
+    if isinstance(dal_instance, CachedDBHandler):
+        cached = dal_instance.peek_config(change.service_id, change.config_name)
+        # An entry cached by a read may already be as recent as the record
+        if (
+            cached is None
+            or change.version is None
+            or int(cached.get(VERSION_KEY, 0)) < change.version
+        ):
+            dal_instance.invalidate(change.service_id, change.config_name)
+    if change.deleted:
+        kind = REMOVED
+        _forget_config(change.service_id, change.config_name)
+    else:
+        kind = ADDED if change.event_name == INSERT_EVENT else MODIFIED
+    watch_hub.poke((change.service_id, change.config_name))
+    watch_hub.poke((change.service_id, None))
+    event_bus.publish(
+        change_event(change.service_id, change.config_name, change.version, kind)
+    )
+
+
+def _resync_stream() -> None:
+    # Records were trimmed from the stream unread: whatever is cached may
+    # have been changed by another replica, and the subscribers may have
+    # missed changes
+    config_cache.clear()
+    response_cache.clear()
+    event_bus.publish_resync()
+
+
+watch_hub = WatchHub(
+    _read_watched_version, poll_interval=settings.watch_poll_interval_seconds
+)
+
+event_bus = EventBus(max_queue_size=settings.events_queue_size)
+
+read_flight = SingleFlight()
+
+stale_store = StaleStore(max_entries=settings.stale_store_max_entries)
+
+# The (service ID, config name, version) of the writes published by this replica
+published_changes = LRUCache(
+    max_entries=settings.stream_published_changes_max_entries,
+    max_bytes=settings.stream_published_changes_max_entries,
+    ttl_seconds=settings.stream_published_changes_ttl_seconds,
+)
+
+change_detector.register(_publish_detected_change)
+stream_consumer.register(_apply_stream_change)
+stream_consumer.register_resync(_resync_stream)
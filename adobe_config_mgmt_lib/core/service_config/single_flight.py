@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+"""
+Coalescing of the concurrent identical reads.
+
+The first caller reading a key, the leader, runs the read; the callers asking
+for the same key while it runs wait for it and share its result, or its
+error, instead of reading again. A burst of identical requests, as when many
+clients poll the same config or a cache entry expires, then costs a single
+read of the table. The blocking and the non-blocking callers each have
+their own flights, so a thread never waits on the event loop.
+
+The result is shared as is, the callers must not modify it, as with the
+entries of the cache.
+"""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, read: Callable[[], Any]) -> Any:
+        """
+        Method to run a read, or to wait for the identical one in flight
+        :param key: identifies the read
+        :param read: runs the read
+        :return: the result of the read
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = read()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, read: Callable[[], Awaitable]) -> Any:
+        """
+        Non-blocking variant of `do`, from the event loop
+        :param key: identifies the read
+        :param read: starts the read
+        :return: the result of the read
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._futures.get(key)
+            if future is not None:
+                self.coalesced += 1
+        if future is None:
+            future = self._futures[key] = asyncio.ensure_future(read())
+            future.add_done_callback(lambda done: self._land(key, done))
+        # A cancelled caller leaves the read running for the others
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._futures),
+        }
+
+    def _land(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._futures.get(key) is future:
+            del self._futures[key]
+        if not future.cancelled():
+            # Retrieved, so that an error is not reported as never retrieved
+            # when every caller was cancelled
+            future.exception()
@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+from structlog import get_logger
+
+"""
+Last known results of the reads, to serve while the backend fails.
+
+The store keeps the latest successful result of every read it was given,
+along with the time it was read, the least recently read ones dropped past
+`max_entries`. A read failing, or slower than its latency budget, is then
+answered from the store, its answer marked with its age rather than passed
+off as current.
+
+The store is saved to a file, replaced atomically, and loaded back on
+start, so a restarted replica has the results of the previous one to serve
+and to warm its cache with before its first read of the table.
+"""
+
+logger = get_logger()
+
+SNAPSHOT_FORMAT = 1
+
+
+class StaleStore:
+    def __init__(self, max_entries: int, clock: Callable[[], float] = time.time):
+        """
+        :param max_entries: the max number of results kept
+        :param clock: the wall clock, the ages outlive the process
+        """
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._dirty = False
+        self.served = 0
+        self.loaded = 0
+
+    def remember(self, key: Hashable, value: Any, read_at: float = None) -> None:
+        """
+        Method to keep the result of a read, replacing the previous one
+        :param key: identifies the read, a tuple of strings and None
+        :param value: the result, JSON serializable, not to be modified after
+        :param read_at: the time of the read, now if None
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, self._clock() if read_at is None else read_at)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Method to drop the last result of a read, which no longer exists
+        :param key: identifies the read
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def recall(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Method to get the last result of a read
+        :param key: identifies the read
+        :return: the result and the time it was read, None if there is none
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def serve(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Method to get the last result of a read, to answer the read with
+        :param key: identifies the read
+        :return: the result and its age in seconds, None if there is none
+        """
+        entry = self.recall(key)
+        if entry is None:
+            return None
+        with self._lock:
+            self.served += 1
+        value, read_at = entry
+        return value, max(0.0, self._clock() - read_at)
+
+    def items(self) -> Iterator[Tuple[Hashable, Any, float]]:
+        """
+        Method to list the results kept, the least recently read first
+        :return: the keys, results and times of the reads
+        """
+        with self._lock:
+            entries = list(self._entries.items())
+        for key, (value, read_at) in entries:
+            yield key, value, read_at
+
+    def save(self, path: str) -> bool:
+        """
+        Method to write the results kept to a file, replacing it atomically
+        :param path:
+        :return: True if the file was written, False if nothing changed since
+            the last save
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            entries = list(self._entries.items())
+            self._dirty = False
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as snapshot_file:
+            snapshot_file.write(json.dumps({"format": SNAPSHOT_FORMAT}) + "\n")
+            for key, (value, read_at) in entries:
+                line = json.dumps([list(key), read_at, value], default=_json_default)
+                snapshot_file.write(line + "\n")
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary_path, path)
+        return True
+
+    def load(self, path: str) -> int:
+        """
+        Method to add the results saved to a file, if it exists, to the ones kept
+        :param path:
+        :return: the number of results loaded
+        """
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        with open(path) as snapshot_file:
+            header = json.loads(snapshot_file.readline() or "{}")
+            if header.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"Unknown snapshot format {header.get('format')}")
+            for line in snapshot_file:
+                key, read_at, value = json.loads(line, parse_float=Decimal)
+                self.remember(tuple(key), value, float(read_at))
+                count += 1
+        with self._lock:
+            self.loaded += count
+            self._dirty = False
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "served": self.served,
+                "loaded": self.loaded,
+            }
+
+
+def _json_default(value: Any) -> Any:
+    # The numbers read from dynamodb are Decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
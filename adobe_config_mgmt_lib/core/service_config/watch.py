@@ -0,0 +1,116 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from structlog import get_logger
+
+"""
+Long-poll watches of the configs.
+
+Every watched key, a config or a whole service, has a single poller reading
+its current version, however many clients are watching it. The poller runs
+while at least one client waits, every `poll_interval` seconds or as soon as
+it is poked by a local write, and wakes up the clients once the version they
+hold is outdated.
+"""
+
+logger = get_logger()
+
+
+class _Watch:
+    __slots__ = ("version", "changed", "wakeup", "waiters", "task")
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        # Replaced by a new event on every change
+        self.changed = asyncio.Event()
+        self.wakeup = asyncio.Event()
+        self.waiters = 0
+        self.task = None
+
+
+class WatchHub:
+    def __init__(
+        self,
+        read_version: Callable[[Hashable], Awaitable[Optional[int]]],
+        poll_interval: float,
+    ):
+        self.read_version = read_version
+        self.poll_interval = poll_interval
+        self._watches: Dict[Hashable, _Watch] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def wait(self, key: Hashable, version: int, timeout: float) -> Optional[int]:
+        """
+        Method to wait for a key to be written past a version
+        :param key: the watched key
+        :param version: the version held by the client
+        :param timeout: the max number of seconds to wait
+        :return: the newer version, None if there was none before the timeout
+        """
+        self._loop = asyncio.get_event_loop()
+        watch = self._watches.get(key)
+        if watch is None:
+            watch = self._watches[key] = _Watch()
+            watch.task = asyncio.ensure_future(self._poll(key, watch))
+        watch.waiters += 1
+        try:
+            return await asyncio.wait_for(self._newer_version(watch, version), timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            watch.waiters -= 1
+            if not watch.waiters:
+                watch.task.cancel()
+                del self._watches[key]
+
+    def poke(self, key: Hashable) -> None:
+        """
+        Method to have the poller of a key, if any, read it straight away,
+        from any thread
+        :param key: the written key
+        """
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if self._loop is not None and self._loop.is_closed():
+            self._loop = None
+        if self._loop is not None and running_loop is not self._loop:
+            self._loop.call_soon_threadsafe(self._wake_up, key)
+        else:
+            self._wake_up(key)
+
+    def _wake_up(self, key: Hashable) -> None:
+        watch = self._watches.get(key)
+        if watch is not None:
+            watch.wakeup.set()
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._watches),
+            "waiters": sum(watch.waiters for watch in self._watches.values()),
+        }
+
+    @staticmethod
+    async def _newer_version(watch: _Watch, version: int) -> int:
+        while watch.version is None or watch.version <= version:
+            await watch.changed.wait()
+        return watch.version
+
+    async def _poll(self, key: Hashable, watch: _Watch) -> None:
+        while True:
+            try:
+                current = await self.read_version(key)
+            except Exception as e:
+                # Whatever the error, the poller keeps running for its waiters
+                logger.warning("Could not read the watched key.", key=key, error=str(e))
+            else:
+                if current is not None and current != watch.version:
+                    watch.version = current
+                    watch.changed.set()
+                    watch.changed = asyncio.Event()
+            try:
+                await asyncio.wait_for(watch.wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            watch.wakeup.clear()
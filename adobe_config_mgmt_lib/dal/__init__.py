@@ -1,15 +1,51 @@
 from structlog import get_logger
 
 from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal.cache.cached_db_handler import CachedDBHandler
+from adobe_config_mgmt_lib.dal.cache.lru_cache import LRUCache
 
 # Setting up logger
 from adobe_config_mgmt_lib.dal.dynamodb.dynamodb_dal import DynamodbDAL
+from adobe_config_mgmt_lib.dal.thread_pool.thread_pool_dal import ThreadPoolDAL
+from adobe_config_mgmt_lib.resources.constants import MEMORY_BACKEND, SQLITE_BACKEND
 
 logger = get_logger(__name__)
 
+config_cache = LRUCache(
+    max_entries=settings.config_cache_max_entries,
+    max_bytes=settings.config_cache_max_bytes,
+    ttl_seconds=settings.config_cache_ttl_seconds,
+)
+
+
+def _backend_dal():
+    """
+    The DAL of the configured backend
+    """
+    if settings.dal_backend == MEMORY_BACKEND:
+        from adobe_config_mgmt_lib.dal.memory.memory_dal import InMemoryDAL
+
+        return InMemoryDAL()
+    if settings.dal_backend == SQLITE_BACKEND:
+        from adobe_config_mgmt_lib.dal.sqlite.sqlite_dal import SqliteDAL
+
+        return SqliteDAL(settings.sqlite_path)
+    # The config table is set up on first use, or by the start of the service
+    return DynamodbDAL()
+
+
 try:
-    logger.info("DynamoDB table init started.", status="In-progress")
-    dynamodb_dal_instance = DynamodbDAL()
-    logger.info("DynamoDB table init.", status=True)
+    backend_dal_instance = _backend_dal()
+    # Former name, kept for the importers of the library, whatever the backend
+    dynamodb_dal_instance = backend_dal_instance
+    # All the reads/writes of the service go through `dal_instance`,
+    # which fronts the DAL with the in-process config cache when enabled.
+    dal_instance = backend_dal_instance
+    if settings.config_cache_enabled:
+        dal_instance = CachedDBHandler(backend_dal_instance, config_cache)
+    # Non-blocking access to the same DAL for the async API handlers
+    async_dal_instance = ThreadPoolDAL(
+        dal_instance, max_workers=settings.dal_max_workers
+    )
 except Exception as e:
     logger.exception(str(e))
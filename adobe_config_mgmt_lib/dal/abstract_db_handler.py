@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from adobe_config_mgmt_lib.resources.constants import EXCLUSIVE_START_KEY
+
 
 class AbstractDBHandler(ABC):
     """
@@ -24,6 +26,81 @@ class AbstractDBHandler(ABC):
             execution_context: any additional data/info required for performing the operation
         """
 
+    @abstractmethod
+    def batch_add_configs(self, data: dict, execution_context: dict):
+        """
+        Method to create many entries, across services, in the database
+        Args:
+            data: the entries to create
+            execution_context: any additional data/info required for performing the operation
+        Returns:
+            The (service ID, config name) pairs which could not be created, with the reason
+        """
+
+    @abstractmethod
+    def batch_get_configs(self, data: dict, execution_context: dict):
+        """
+        Method to read many entries, across services, from the database
+        Args:
+            data: the (service ID, config name) pairs to read
+            execution_context: any additional data/info required for performing the operation
+        Returns:
+            The entries found
+        """
+
+    @abstractmethod
+    def get_config_page(self, data: dict, execution_context: dict):
+        """
+        Method to read a single page of the entries of a service from the database
+        Args:
+            data: the filtering/query data
+            execution_context: the page size and the key to resume after, if any
+        Returns:
+            The entries of the page and the key to resume after, None on the last page
+        """
+
+    def iter_config_pages(self, data: dict, execution_context: dict):
+        """
+        Generator over all the pages of the entries of a service
+        Args:
+            data: the filtering/query data
+            execution_context: the page size and the key to resume after, if any
+        """
+        execution_context = dict(execution_context or {})
+        while True:
+            items, last_key = self.get_config_page(
+                data=data, execution_context=execution_context
+            )
+            yield items
+            if not last_key:
+                return
+            execution_context[EXCLUSIVE_START_KEY] = last_key
+
+    @abstractmethod
+    def get_service_heads(self, data: dict, execution_context: dict):
+        """
+        Method to read the head versions of many services, which move on
+        every write to their configs
+        Args:
+            data: the service IDs
+            execution_context: any additional data/info required for performing the operation
+        Returns:
+            The head version of every service
+        """
+
+    @abstractmethod
+    def get_config_changes(self, data: dict, execution_context: dict):
+        """
+        Method to read the entries changed after a modification time, the
+        deleted ones included, from the database
+        Args:
+            data: the service ID, if the changes of a single service are read
+            execution_context: the modification time and the max number of changes
+        Returns:
+            The changed entries, the modification time of the last change read,
+            and whether there may be more changes
+        """
+
     @abstractmethod
     def update_configs(self, data: dict, execution_context: dict):
         """
@@ -33,6 +110,15 @@ class AbstractDBHandler(ABC):
             execution_context: any additional data/info required for performing the operation
         """
 
+    @abstractmethod
+    def patch_configs(self, data: dict, execution_context: dict):
+        """
+        Method to apply a partial update to the config of an entry in the database
+        Args:
+            data: the filtering/query data, along with the patch and its type
+            execution_context: any additional data/info required for performing the operation
+        """
+
     @abstractmethod
     def delete_configs(self, data: dict, execution_context: dict):
         """
@@ -41,3 +127,129 @@ class AbstractDBHandler(ABC):
             data: the filtering/query data
             execution_context: any additional data/info required for performing the operation
         """
+
+
+class AsyncAbstractDBHandler(ABC):
+    """
+    Abstract model for all the non-blocking DAL(Data access layer) to extend
+    """
+
+    @abstractmethod
+    async def add_configs(self, data: dict, execution_context: dict):
+        """
+        Method to create an entry in the database
+        Args:
+            data: the filtering/query data
+            execution_context: any additional data/info required for performing the operation
+        """
+
+    @abstractmethod
+    async def get_configs(self, data: dict, execution_context: dict):
+        """
+        Method to read an entry from the database
+        Args:
+            data: the filtering/query data
+            execution_context: any additional data/info required for performing the operation
+        """
+
+    @abstractmethod
+    async def batch_add_configs(self, data: dict, execution_context: dict):
+        """
+        Method to create many entries, across services, in the database
+        Args:
+            data: the entries to create
+            execution_context: any additional data/info required for performing the operation
+        Returns:
+            The (service ID, config name) pairs which could not be created, with the reason
+        """
+
+    @abstractmethod
+    async def batch_get_configs(self, data: dict, execution_context: dict):
+        """
+        Method to read many entries, across services, from the database
+        Args:
+            data: the (service ID, config name) pairs to read
+            execution_context: any additional data/info required for performing the operation
+        Returns:
+            The entries found
+        """
+
+    @abstractmethod
+    async def get_config_page(self, data: dict, execution_context: dict):
+        """
+        Method to read a single page of the entries of a service from the database
+        Args:
+            data: the filtering/query data
+            execution_context: the page size and the key to resume after, if any
+        Returns:
+            The entries of the page and the key to resume after, None on the last page
+        """
+
+    async def iter_config_pages(self, data: dict, execution_context: dict):
+        """
+        Async generator over all the pages of the entries of a service
+        Args:
+            data: the filtering/query data
+            execution_context: the page size and the key to resume after, if any
+        """
+        execution_context = dict(execution_context or {})
+        while True:
+            items, last_key = await self.get_config_page(
+                data=data, execution_context=execution_context
+            )
+            yield items
+            if not last_key:
+                return
+            execution_context[EXCLUSIVE_START_KEY] = last_key
+
+    @abstractmethod
+    async def get_service_heads(self, data: dict, execution_context: dict):
+        """
+        Method to read the head versions of many services, which move on
+        every write to their configs
+        Args:
+            data: the service IDs
+            execution_context: any additional data/info required for performing the operation
+        Returns:
+            The head version of every service
+        """
+
+    @abstractmethod
+    async def get_config_changes(self, data: dict, execution_context: dict):
+        """
+        Method to read the entries changed after a modification time, the
+        deleted ones included, from the database
+        Args:
+            data: the service ID, if the changes of a single service are read
+            execution_context: the modification time and the max number of changes
+        Returns:
+            The changed entries, the modification time of the last change read,
+            and whether there may be more changes
+        """
+
+    @abstractmethod
+    async def update_configs(self, data: dict, execution_context: dict):
+        """
+        Method to update an entry in the database
+        Args:
+            data: the filtering/query data
+            execution_context: any additional data/info required for performing the operation
+        """
+
+    @abstractmethod
+    async def patch_configs(self, data: dict, execution_context: dict):
+        """
+        Method to apply a partial update to the config of an entry in the database
+        Args:
+            data: the filtering/query data, along with the patch and its type
+            execution_context: any additional data/info required for performing the operation
+        """
+
+    @abstractmethod
+    async def delete_configs(self, data: dict, execution_context: dict):
+        """
+        Method to delete an entry from the database
+        Args:
+            data: the filtering/query data
+            execution_context: any additional data/info required for performing the operation
+        """
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Iterator, List
+
+from structlog import get_logger  # type: ignore
+
+"""
+Stores of the configs too large for a database entry.
+
+The entry of an offloaded config only keeps its manifest, the payload
+lives in a blob store under a reference which is never reused, so a blob
+is written once and deleted once the entry no longer refers to it.
+"""
+
+logger = get_logger()
+
+LOCAL_READ_BLOCK_BYTES = 256 * 1024
+
+
+class BlobNotFoundError(Exception):
+    """
+    The blob is missing, or incomplete
+    """
+
+
+class BlobStore(ABC):
+    @abstractmethod
+    def put(
+        self, service_id: str, config_name: str, ref: str, pieces: List[bytes]
+    ) -> None:
+        """
+        Stores the payload of a config.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            ref: The unique reference of the blob
+            pieces: The payload, in order
+        """
+        pass
+
+    @abstractmethod
+    def iter_pieces(
+        self, service_id: str, config_name: str, ref: str, piece_count: int
+    ) -> Iterator[bytes]:
+        """
+        Reads the payload of a config, piece by piece.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            ref: The unique reference of the blob
+            piece_count: The number of pieces it was stored as
+        Returns:
+            The pieces of the payload, in order
+        Raises:
+            BlobNotFoundError: if the blob is missing
+        """
+        pass
+
+    @abstractmethod
+    def delete(
+        self, service_id: str, config_name: str, ref: str, piece_count: int
+    ) -> None:
+        """
+        Deletes the payload of a config, if present.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            ref: The unique reference of the blob
+            piece_count: The number of pieces it was stored as
+        """
+        pass
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Stores the payloads as files. All the replicas must share the directory,
+    e.g. a mounted network volume.
+    """
+
+    def __init__(self, root_dir: str, block_size: int = LOCAL_READ_BLOCK_BYTES):
+        self.root_dir = root_dir
+        self.block_size = block_size
+
+    def put(
+        self, service_id: str, config_name: str, ref: str, pieces: List[bytes]
+    ) -> None:
+        path = self._path(service_id, config_name, ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as blob_file:
+                for piece in pieces:
+                    blob_file.write(piece)
+                blob_file.flush()
+                os.fsync(blob_file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def iter_pieces(
+        self, service_id: str, config_name: str, ref: str, piece_count: int
+    ) -> Iterator[bytes]:
+        try:
+            blob_file = open(self._path(service_id, config_name, ref), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(ref)
+        with blob_file:
+            while True:
+                block = blob_file.read(self.block_size)
+                if not block:
+                    return
+                yield block
+
+    def delete(
+        self, service_id: str, config_name: str, ref: str, piece_count: int
+    ) -> None:
+        try:
+            os.remove(self._path(service_id, config_name, ref))
+        except FileNotFoundError:
+            logger.debug("Blob already deleted.", ref=ref)
+
+    def _path(self, service_id: str, config_name: str, ref: str) -> str:
+        # Service IDs and config names are free-form, the directory name is
+        # derived from them rather than being them
+        key = hashlib.sha256(f"{service_id}\0{config_name}".encode("utf-8"))
+        return os.path.join(self.root_dir, key.hexdigest(), os.path.basename(ref))
@@ -0,0 +1,331 @@
+from typing import Optional
+
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.dal.abstract_db_handler import AbstractDBHandler
+from adobe_config_mgmt_lib.dal.cache.lru_cache import LRUCache
+from adobe_config_mgmt_lib.dal.projection import project_item
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_ITEMS_KEY,
+    CONFIG_KEYS_KEY,
+    CONFIG_NAME_KEY,
+    CONSISTENT_READ_KEY,
+    HEAD_VERSION_KEY,
+    PROJECTION_KEY,
+    SERVICE_ID_KEY,
+)
+
+"""
+Read-through cache in front of any AbstractDBHandler implementation.
+
+Reads of a whole service and of a single config are cached under separate
+keys. Writes go to the wrapped handler first and then invalidate the keys
+they affect, so a replica always reads its own writes.
+Partial reads are served from the cached entries when present, and are
+never cached themselves. Strongly consistent reads always go to the wrapped
+handler, and refresh the cache with what they read.
+The configs of a service are cached along with the head version of the
+service they were read at, when known. A read given a newer head version
+reads them through again, however recent the cached ones are.
+"""
+
+logger = get_logger()
+
+SERVICE_CACHE_KEY_PREFIX = "service"
+CONFIG_CACHE_KEY_PREFIX = "config"
+HEAD_CACHE_KEY_PREFIX = "head"
+
+
+def service_cache_key(service_id: str) -> tuple:
+    return SERVICE_CACHE_KEY_PREFIX, service_id
+
+
+def config_cache_key(service_id: str, config_name: str) -> tuple:
+    return CONFIG_CACHE_KEY_PREFIX, service_id, config_name
+
+
+def head_cache_key(service_id: str) -> tuple:
+    return HEAD_CACHE_KEY_PREFIX, service_id
+
+
+class CachedDBHandler(AbstractDBHandler):
+    def __init__(self, db_handler: AbstractDBHandler, cache: LRUCache):
+        self.db_handler = db_handler
+        self.cache = cache
+
+    def add_configs(self, data: dict, execution_context: dict):
+        """
+        Adds the config through the wrapped handler and invalidates the cache.
+
+        Args:
+            data: contains all the required fields/attributes for inserting
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The result of the wrapped handler
+        """
+        result = self.db_handler.add_configs(
+            data=data, execution_context=execution_context
+        )
+        self.invalidate(data.get(SERVICE_ID_KEY), data.get(CONFIG_NAME_KEY))
+        return result
+
+    def peek_config(self, service_id: str, config_name: str) -> Optional[dict]:
+        """
+        Looks a config up in the cache only, without ever reading through.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+        Returns:
+            The cached entry, None on a miss
+        """
+        cached = self.cache.get(config_cache_key(service_id, config_name))
+        return cached[0] if cached else None
+
+    def get_configs(self, data: dict, execution_context: dict):
+        """
+        Serves the configs from the cache, reading through to the wrapped
+        handler on a miss.
+
+        Args:
+            data: contains the service ID and optionally the config name
+            execution_context: may contain the paths of the config to return,
+                the read consistency and the current head version of the service
+        Returns:
+            The matching config entries
+        """
+        execution_context = execution_context or {}
+        projection = execution_context.get(PROJECTION_KEY)
+        head = execution_context.get(HEAD_VERSION_KEY)
+        if SERVICE_ID_KEY not in data:
+            return self.db_handler.get_configs(
+                data=data, execution_context=execution_context
+            )
+        if CONFIG_NAME_KEY in data:
+            key = config_cache_key(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY])
+            head = None
+        else:
+            key = service_cache_key(data[SERVICE_ID_KEY])
+
+        cached = self._cached(key, data[SERVICE_ID_KEY], execution_context)
+        if cached is not None:
+            return [project_item(item, projection) for item in cached]
+        result = self.db_handler.get_configs(
+            data=data, execution_context=execution_context
+        )
+        # Empty results are not cached so that configs created by other
+        # replicas become visible straight away.
+        if result and projection is None:
+            self.cache.put(key, result)
+            if head is not None:
+                self.cache.put(head_cache_key(data[SERVICE_ID_KEY]), head)
+        return result
+
+    def _cached(self, key: tuple, service_id: str, execution_context: dict):
+        if execution_context.get(CONSISTENT_READ_KEY):
+            return None
+        head = execution_context.get(HEAD_VERSION_KEY)
+        if (
+            key[0] == SERVICE_CACHE_KEY_PREFIX
+            and head is not None
+            and self.cache.get(head_cache_key(service_id)) != head
+        ):
+            return None
+        return self.cache.get(key)
+
+    def batch_add_configs(self, data: dict, execution_context: dict):
+        """
+        Adds the configs through the wrapped handler and invalidates the cache.
+
+        Args:
+            data: contains the items to write
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The result of the wrapped handler
+        """
+        result = self.db_handler.batch_add_configs(
+            data=data, execution_context=execution_context
+        )
+        for item in data[CONFIG_ITEMS_KEY]:
+            self.invalidate(item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY])
+        return result
+
+    def batch_get_configs(self, data: dict, execution_context: dict):
+        """
+        Serves the cached configs and reads only the missing ones through
+        the wrapped handler.
+
+        Args:
+            data: contains the (service ID, config name) pairs to fetch
+            execution_context: may contain the read consistency
+        Returns:
+            The entries found
+        """
+        consistent_read = (execution_context or {}).get(CONSISTENT_READ_KEY)
+        items = []
+        missing_keys = []
+        for service_id, config_name in data[CONFIG_KEYS_KEY]:
+            if consistent_read:
+                missing_keys.append((service_id, config_name))
+                continue
+            cached = self.cache.get(config_cache_key(service_id, config_name))
+            if cached is not None:
+                items.extend(cached)
+            else:
+                missing_keys.append((service_id, config_name))
+        if not missing_keys:
+            return items
+
+        fetched = self.db_handler.batch_get_configs(
+            data={CONFIG_KEYS_KEY: missing_keys}, execution_context=execution_context
+        )
+        for item in fetched:
+            self.cache.put(
+                config_cache_key(item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY]), [item]
+            )
+        return items + fetched
+
+    def get_config_page(self, data: dict, execution_context: dict):
+        """
+        Pages are read from the wrapped handler, they are not cached.
+
+        Args:
+            data: contains the service ID
+            execution_context: the page size and the key to resume after, if any
+        Returns:
+            The entries of the page and the key to resume after
+        """
+        return self.db_handler.get_config_page(
+            data=data, execution_context=execution_context
+        )
+
+    def get_service_heads(self, data: dict, execution_context: dict):
+        """
+        Heads are read from the wrapped handler, they are what tells whether
+        the cached entries are still current.
+
+        Args:
+            data: contains the service IDs
+            execution_context: may contain the read consistency
+        Returns:
+            The head version of every service
+        """
+        return self.db_handler.get_service_heads(
+            data=data, execution_context=execution_context
+        )
+
+    def get_config_changes(self, data: dict, execution_context: dict):
+        """
+        Changes are read from the wrapped handler, they are not cached.
+
+        Args:
+            data: may contain the service ID
+            execution_context: the modification time and the max number of changes
+        Returns:
+            The result of the wrapped handler
+        """
+        return self.db_handler.get_config_changes(
+            data=data, execution_context=execution_context
+        )
+
+    def update_configs(self, data: dict, execution_context: dict):
+        """
+        Updates the config through the wrapped handler and caches the updated entry.
+
+        Args:
+            data: contains the keys of the config and the new config
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The result of the wrapped handler
+        """
+        result = self.db_handler.update_configs(
+            data=data, execution_context=execution_context
+        )
+        self.write_through(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY], result)
+        return result
+
+    def patch_configs(self, data: dict, execution_context: dict):
+        """
+        Patches the config through the wrapped handler and caches the updated entry.
+
+        Args:
+            data: contains the keys of the config, the patch and its type
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The result of the wrapped handler
+        """
+        try:
+            result = self.db_handler.patch_configs(
+                data=data, execution_context=execution_context
+            )
+        except RuntimeError:
+            # The entry may have changed even though the patch failed
+            self.invalidate(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY])
+            raise
+        self.write_through(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY], result)
+        return result
+
+    def delete_configs(self, data: dict, execution_context: dict):
+        """
+        Deletes the config through the wrapped handler and invalidates the cache.
+
+        Args:
+            data: contains the keys of the config
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The result of the wrapped handler
+        """
+        result = self.db_handler.delete_configs(
+            data=data, execution_context=execution_context
+        )
+        self.invalidate(data.get(SERVICE_ID_KEY), data.get(CONFIG_NAME_KEY))
+        return result
+
+    def invalidate(self, service_id: str, config_name: str = None) -> None:
+        """
+        Drops the cached entries of the service and, if given, of the config.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+        """
+        self.cache.invalidate(service_cache_key(service_id))
+        self.cache.invalidate(head_cache_key(service_id))
+        if config_name is not None:
+            self.cache.invalidate(config_cache_key(service_id, config_name))
+
+    def prime(
+        self, service_id: str, config_name: Optional[str], items: list, head=None
+    ) -> None:
+        """
+        Caches entries read elsewhere, as by a previous run, unless entries
+        are cached for them already.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config, None for all the configs of the service
+            items: The entries, whole rather than projected
+            head: The head version of the service the entries were read at, if known
+        """
+        if config_name is None:
+            key = service_cache_key(service_id)
+        else:
+            key = config_cache_key(service_id, config_name)
+        if not items or self.cache.get(key) is not None:
+            return
+        self.cache.put(key, items)
+        if config_name is None and head is not None:
+            self.cache.put(head_cache_key(service_id), head)
+
+    def write_through(self, service_id: str, config_name: str, item: dict) -> None:
+        """
+        Caches the entry returned by a write, dropping the stale service entry.
+
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            item: The entry as written, if any
+        """
+        self.invalidate(service_id, config_name)
+        if item:
+            self.cache.put(config_cache_key(service_id, config_name), [item])
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from structlog import get_logger  # type: ignore
+
+"""
+Bounded in-process LRU cache used in front of the data access layer.
+
+Entries expire after a TTL and the cache is bounded both by the number
+of entries and by the (approximate) serialised size of the cached values.
+"""
+
+logger = get_logger()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate size of a value in bytes, based on its compact JSON encoding.
+    Args:
+        value: the value to measure
+    Returns:
+        The size in bytes
+    """
+    return len(json.dumps(value, default=str, separators=(",", ":")).encode("utf-8"))
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value: Any, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a TTL and entry/byte limits.
+
+    Cached values are shared between readers and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Fetch a value from the cache.
+        Args:
+            key: the cache key
+        Returns:
+            The cached value, or None if it is absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= self._clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> bool:
+        """
+        Store a value in the cache, evicting the least recently used entries
+        if the entry or byte limits are exceeded.
+        Args:
+            key: the cache key
+            value: the value to store
+            size: the size of the value in bytes, estimated if not given
+        Returns:
+            True if the value was cached, False if it is larger than the cache
+        """
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug("Value too large to be cached.", key=key, size=size)
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(
+                value, size, self._clock() + self.ttl_seconds
+            )
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+        return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop a key from the cache, if present.
+        Args:
+            key: the cache key
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Drop every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the cache counters.
+        Returns:
+            The hit/miss/eviction counters along with the current usage
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
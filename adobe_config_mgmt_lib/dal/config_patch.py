@@ -0,0 +1,277 @@
+import copy
+from typing import Any, List, Optional, Tuple
+
+from adobe_config_mgmt_lib.dal.exceptions import PatchConflictError
+
+"""
+Partial updates of the configs.
+
+Supports JSON Merge Patch (RFC 7396) and JSON Patch (RFC 6902) documents.
+Patches are applied in memory by `apply_patch`, and `patch_operations`
+translates them, when possible, into path level operations a database
+can apply in place without reading the config first.
+"""
+
+MERGE_PATCH = "merge-patch"
+JSON_PATCH = "json-patch"
+PATCH_TYPES = (MERGE_PATCH, JSON_PATCH)
+
+MERGE_PATCH_MEDIA_TYPE = "application/merge-patch+json"
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+
+# Path level operations, see `patch_operations`
+SET = "set"
+REMOVE = "remove"
+APPEND = "append"
+ASSERT_EXISTS = "assert_exists"
+ASSERT_EQUALS = "assert_equals"
+ASSERTIONS = (ASSERT_EXISTS, ASSERT_EQUALS)
+
+JSON_PATCH_OPS = ("add", "remove", "replace", "move", "copy", "test")
+APPEND_TOKEN = "-"
+
+# Path level operations of the JSON patch operations, but move and copy
+_JSON_PATCH_TRANSLATIONS = {
+    "add": lambda path, value: [(SET, path, value)],
+    "replace": lambda path, value: [(ASSERT_EXISTS, path), (SET, path, value)],
+    "remove": lambda path, value: [(ASSERT_EXISTS, path), (REMOVE, path)],
+    "test": lambda path, value: [(ASSERT_EQUALS, path, value)],
+}
+
+
+class InvalidPatchError(ValueError):
+    """
+    The patch document is malformed
+    """
+
+
+def validate_patch(patch: Any, patch_type: str) -> None:
+    """
+    Method to check the shape of a patch document
+    :param patch: the patch document
+    :param patch_type: MERGE_PATCH or JSON_PATCH
+    :raises InvalidPatchError: if the document is malformed
+    """
+    if patch_type == MERGE_PATCH:
+        # The config itself is always an object, so is its merge patch
+        if not isinstance(patch, dict):
+            raise InvalidPatchError("A config merge patch must be a JSON object")
+        return
+    if patch_type != JSON_PATCH:
+        raise InvalidPatchError(f"Unknown patch type: {patch_type}")
+    if not isinstance(patch, list):
+        raise InvalidPatchError("A JSON patch must be a JSON array")
+    for operation in patch:
+        _validate_operation(operation)
+
+
+def _validate_operation(operation: Any) -> None:
+    if not isinstance(operation, dict) or operation.get("op") not in JSON_PATCH_OPS:
+        raise InvalidPatchError(f"Invalid JSON patch operation: {operation}")
+    parse_pointer(operation.get("path"))
+    if operation["op"] in ("add", "replace", "test") and "value" not in operation:
+        raise InvalidPatchError(f"Missing value in operation: {operation}")
+    if operation["op"] in ("move", "copy"):
+        parse_pointer(operation.get("from"))
+
+
+def parse_pointer(pointer: Any) -> List[str]:
+    """
+    Method to split a JSON pointer (RFC 6901) into its reference tokens
+    :param pointer: the JSON pointer
+    :return: the unescaped tokens, empty for the whole document
+    :raises InvalidPatchError: if the pointer is malformed
+    """
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise InvalidPatchError(f"Invalid JSON pointer: {pointer}")
+    if not pointer:
+        return []
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")
+    ]
+
+
+def apply_patch(config: dict, patch: Any, patch_type: str) -> dict:
+    """
+    Method to apply a patch to a config, in memory
+    :param config: the current config, left untouched
+    :param patch: the patch document
+    :param patch_type: MERGE_PATCH or JSON_PATCH
+    :return: the patched config
+    :raises PatchConflictError: if the patch can't be applied to this config
+    """
+    if patch_type == MERGE_PATCH:
+        return _merge(config, patch)
+    document = copy.deepcopy(config)
+    for operation in patch:
+        document = _apply_operation(document, operation)
+    if not isinstance(document, dict):
+        raise PatchConflictError(409, "The patched config must remain an object")
+    return document
+
+
+def patch_operations(patch: Any, patch_type: str) -> Optional[List[Tuple]]:
+    """
+    Method to translate a patch into path level operations on the config.
+
+    Every operation is a tuple of the operation type, the path tokens and,
+    for SET, APPEND and ASSERT_EQUALS, the value. The ASSERT operations are
+    the conditions the other operations depend on. All the operations refer
+    to the config before the patch, so they can be applied at once.
+    :param patch: the patch document
+    :param patch_type: MERGE_PATCH or JSON_PATCH
+    :return: the operations, None if the patch can only be applied in memory
+    """
+    if patch_type == MERGE_PATCH:
+        operations = _merge_patch_operations(patch, [])
+    else:
+        operations = _json_patch_operations(patch)
+    if not operations or _has_overlapping_paths(operations):
+        return None
+    return operations
+
+
+def _merge(target: Any, patch: Any) -> Any:
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = _merge(result.get(key), value)
+    return result
+
+
+def _merge_patch_operations(patch: dict, path: List[str]) -> Optional[List[Tuple]]:
+    operations = []
+    for key, value in patch.items():
+        if value is None:
+            operations.append((REMOVE, path + [key]))
+        elif isinstance(value, dict):
+            # An empty object only replaces members which are not objects,
+            # which can't be told without reading the config
+            if not value:
+                return None
+            nested = _merge_patch_operations(value, path + [key])
+            if nested is None:
+                return None
+            # Merging into a missing member creates it, which needs the config
+            operations.append((ASSERT_EXISTS, path + [key]))
+            operations.extend(nested)
+        else:
+            operations.append((SET, path + [key], value))
+    return operations
+
+
+def _json_patch_operations(patch: list) -> Optional[List[Tuple]]:
+    operations = []
+    for operation in patch:
+        path_operations = _json_patch_operation(operation)
+        if path_operations is None:
+            return None
+        operations.extend(path_operations)
+    return operations
+
+
+def _json_patch_operation(operation: dict) -> Optional[List[Tuple]]:
+    path = parse_pointer(operation["path"])
+    # The whole config, and numeric tokens which may either be array
+    # indexes or object members, need the current config
+    if not path or any(token.isdigit() for token in path):
+        return None
+    op = operation["op"]
+    if op == "add" and path[-1] == APPEND_TOKEN and APPEND_TOKEN not in path[:-1]:
+        return [(APPEND, path[:-1], operation["value"])]
+    if APPEND_TOKEN in path or op not in _JSON_PATCH_TRANSLATIONS:
+        return None
+    return _JSON_PATCH_TRANSLATIONS[op](path, operation.get("value"))
+
+
+def _has_overlapping_paths(operations: List[Tuple]) -> bool:
+    """
+    The operations are applied at once and their conditions are checked
+    against the config before the patch. This only matches applying them
+    in order if no operation depends on an earlier write.
+    """
+    for i, first in enumerate(operations):
+        if first[0] in ASSERTIONS:
+            continue
+        for second in operations[i + 1 :]:
+            shortest = min(len(first[1]), len(second[1]))
+            if first[1][:shortest] == second[1][:shortest]:
+                return True
+    return False
+
+
+def _apply_operation(document: Any, operation: dict) -> Any:
+    op = operation["op"]
+    path = parse_pointer(operation["path"])
+    if op == "add":
+        return _add(document, path, copy.deepcopy(operation["value"]))
+    if op == "remove":
+        return _remove(document, path)[0]
+    if op == "replace":
+        document, _ = _remove(document, path)
+        return _add(document, path, copy.deepcopy(operation["value"]))
+    if op == "test":
+        if _get(document, path) != operation["value"]:
+            raise PatchConflictError(409, f"Test failed at {operation['path']}")
+        return document
+    from_path = parse_pointer(operation["from"])
+    value = copy.deepcopy(_get(document, from_path))
+    if op == "move":
+        if path[: len(from_path)] == from_path and path != from_path:
+            raise PatchConflictError(409, "Can't move a value into one of its children")
+        document, _ = _remove(document, from_path)
+    return _add(document, path, value)
+
+
+def _get(document: Any, path: List[str]) -> Any:
+    for token in path:
+        document = _child(document, token)
+    return document
+
+
+def _child(document: Any, token: str) -> Any:
+    if isinstance(document, dict) and token in document:
+        return document[token]
+    if isinstance(document, list):
+        index = _index(document, token, allow_end=False)
+        return document[index]
+    raise PatchConflictError(409, f"Path not found: {token}")
+
+
+def _index(array: list, token: str, allow_end: bool) -> int:
+    if token == APPEND_TOKEN and allow_end:
+        return len(array)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchConflictError(409, f"Invalid array index: {token}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise PatchConflictError(409, f"Array index out of range: {token}")
+    return index
+
+
+def _add(document: Any, path: List[str], value: Any) -> Any:
+    if not path:
+        return value
+    parent = _get(document, path[:-1])
+    if isinstance(parent, dict):
+        parent[path[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, path[-1], allow_end=True), value)
+    else:
+        raise PatchConflictError(409, f"Can't add a member to a scalar: {path[-1]}")
+    return document
+
+
+def _remove(document: Any, path: List[str]) -> Tuple[Any, Any]:
+    if not path:
+        return None, document
+    parent = _get(document, path[:-1])
+    if isinstance(parent, dict) and path[-1] in parent:
+        return document, parent.pop(path[-1])
+    if isinstance(parent, list):
+        return document, parent.pop(_index(parent, path[-1], allow_end=False))
+    raise PatchConflictError(409, f"Path not found: {path[-1]}")
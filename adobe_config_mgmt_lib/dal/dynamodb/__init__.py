@@ -1,29 +1,200 @@
-import boto3
+import os
+import threading
+import time
+from typing import Callable, Optional
+
 import botocore
 from structlog import get_logger  # type: ignore
 
 from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal.dynamodb import clients
+from adobe_config_mgmt_lib.dal.dynamodb.changes import (
+    CHANGES_INDEX,
+    SERVICE_CHANGES_INDEX,
+)
 from adobe_config_mgmt_lib.resources.constants import (  # attributes
+    CHANGE_BUCKET_KEY,
     CONFIG_KEY,
     CONFIG_NAME_KEY,
     CREATED_AT_KEY,
+    EXPIRES_AT_KEY,
+    MODIFIED_AT_KEY,
     SERVICE_ID_KEY,
     UPDATED_AT_KEY,
 )
 
+"""
+The dynamodb resource and the config table are set up on first use, not at
+import: importing the library costs no network round trip, and the service
+starts serving, not ready, while the table is checked or created.
+"""
+
 # setting up the logger
 logger = get_logger()
 
-# Creating dynamodb resource
-dynamodb = boto3.resource("dynamodb")
+_dynamodb = None
+_dynamodb_lock = threading.Lock()
+_deserializer = None
 
+INDEX_THROUGHPUT = {"ReadCapacityUnits": 50, "WriteCapacityUnits": 50}
+# The indexes of the delta sync, keeping only the keys of the changed entries
+CHANGE_INDEXES = {
+    SERVICE_CHANGES_INDEX: (SERVICE_ID_KEY, "S"),
+    CHANGES_INDEX: (CHANGE_BUCKET_KEY, "N"),
+}
+
+
+def get_dynamodb():
+    """
+    Returns:
+        The dynamodb resource, created on first use
+    """
+    global _dynamodb
+    if _dynamodb is None:
+        with _dynamodb_lock:
+            if _dynamodb is None:
+                _dynamodb = clients.create_resource("dynamodb")
+    return _dynamodb
+
+
+def _reset_after_fork() -> None:
+    # The connections of the parent are not to be shared
+    global _dynamodb, _dynamodb_lock
+    _dynamodb = None
+    _dynamodb_lock = threading.Lock()
+    clients.reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def deserialize(value: dict):
+    """
+    Args:
+        value: an attribute value in the format of the low-level API
+    Returns:
+        The python value
+    """
+    global _deserializer
+    if _deserializer is None:
+        from boto3.dynamodb.types import TypeDeserializer
+
+        _deserializer = TypeDeserializer()
+    return _deserializer.deserialize(value)
+
+
+def services_config_table_name() -> str:
+    """
+    Returns:
+        The name of the config table, <cluster_name>_configs unless
+        SERVICES_CONFIG_TABLE was assigned
+    """
+    return (
+        globals().get("SERVICES_CONFIG_TABLE")
+        or settings.dynamodb_table_prefix + "_" + "configs"
+    )
+
+
+def __getattr__(name: str):
+    # The module attributes of the eager set up, kept for the callers
+    if name == "dynamodb":
+        return get_dynamodb()
+    if name == "SERVICES_CONFIG_TABLE":
+        return services_config_table_name()
+    raise AttributeError(name)
+
+
+def _change_index(index_name: str) -> dict:
+    partition_key = CHANGE_INDEXES[index_name][0]
+    return {
+        "IndexName": index_name,
+        "KeySchema": [
+            {"KeyType": "HASH", "AttributeName": partition_key},
+            {"KeyType": "RANGE", "AttributeName": MODIFIED_AT_KEY},
+        ],
+        "Projection": {"ProjectionType": "KEYS_ONLY"},
+        "ProvisionedThroughput": INDEX_THROUGHPUT,
+    }
 
-logger.info(
-    "Created boto3 client.", region_name=settings.dynamodb_region,
-)
 
-# Syntax <cluster_name>-configs table.
-SERVICES_CONFIG_TABLE = settings.dynamodb_table_prefix + "_" + "configs"
+def _change_index_attributes(index_name: str) -> list:
+    partition_key, attribute_type = CHANGE_INDEXES[index_name]
+    return [
+        {"AttributeName": partition_key, "AttributeType": attribute_type},
+        {"AttributeName": MODIFIED_AT_KEY, "AttributeType": "N"},
+    ]
+
+
+def add_missing_change_indexes(table) -> None:
+    """
+    Adds the delta sync indexes to a table created without them. Dynamodb
+    builds a single index at a time, the next one is added by a later start
+    Args:
+        table: the services config table
+    """
+    existing = {index["IndexName"] for index in table.global_secondary_indexes or []}
+    for index_name in CHANGE_INDEXES:
+        if index_name in existing:
+            continue
+        try:
+            table.meta.client.update_table(
+                TableName=table.name,
+                AttributeDefinitions=_change_index_attributes(index_name),
+                GlobalSecondaryIndexUpdates=[{"Create": _change_index(index_name)}],
+            )
+            logger.info("Adding the index.", TableName=table.name, index=index_name)
+        except botocore.exceptions.ClientError as e:
+            logger.warning(
+                "Could not add the index.", index=index_name, error=str(e),
+            )
+            return
+
+
+def enable_stream(table) -> None:
+    """
+    Enables the stream of the table, if the stream consumer is
+    Args:
+        table: the services config table
+    """
+    if not settings.stream_consumer_enabled:
+        return
+    if (table.stream_specification or {}).get("StreamEnabled"):
+        return
+    try:
+        # The view global tables require
+        table.meta.client.update_table(
+            TableName=table.name,
+            StreamSpecification={
+                "StreamEnabled": True,
+                "StreamViewType": "NEW_AND_OLD_IMAGES",
+            },
+        )
+        logger.info("Enabled the stream of the table.", TableName=table.name)
+    except botocore.exceptions.ClientError as e:
+        logger.warning("Could not enable the stream of the table.", error=str(e))
+
+
+def enable_tombstone_expiry(table) -> None:
+    """
+    Has dynamodb delete the tombstones of the deleted configs once expired
+    Args:
+        table: the services config table
+    """
+    client = table.meta.client
+    try:
+        description = client.describe_time_to_live(TableName=table.name)
+        if description["TimeToLiveDescription"]["TimeToLiveStatus"] in (
+            "ENABLED",
+            "ENABLING",
+        ):
+            return
+        client.update_time_to_live(
+            TableName=table.name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": EXPIRES_AT_KEY},
+        )
+    except botocore.exceptions.ClientError as e:
+        logger.warning("Could not enable the expiry of the tombstones.", error=str(e))
 
 
 def create_services_config_table() -> bool:
@@ -32,14 +203,14 @@ def create_services_config_table() -> bool:
     Returns:
         True if table is created/present, False in case of any error
     """
-    table = dynamodb.Table(SERVICES_CONFIG_TABLE)
+    dynamodb = get_dynamodb()
+    table_name = services_config_table_name()
+    table = dynamodb.Table(table_name)
     table_exist = True
     try:
         table.creation_date_time
     except Exception:
-        logger.info(
-            "Table does not exist. Creating table.", TableName=SERVICES_CONFIG_TABLE
-        )
+        logger.info("Table does not exist. Creating table.", TableName=table_name)
         table_exist = False
     if not table_exist:
         try:
@@ -47,6 +218,8 @@ def create_services_config_table() -> bool:
                 AttributeDefinitions=[
                     {"AttributeName": SERVICE_ID_KEY, "AttributeType": "S"},
                     {"AttributeName": CONFIG_NAME_KEY, "AttributeType": "S"},
+                    {"AttributeName": CHANGE_BUCKET_KEY, "AttributeType": "N"},
+                    {"AttributeName": MODIFIED_AT_KEY, "AttributeType": "N"},
                 ],
                 KeySchema=[
                     {"KeyType": "HASH", "AttributeName": SERVICE_ID_KEY},
@@ -56,12 +229,17 @@ def create_services_config_table() -> bool:
                     "ReadCapacityUnits": 100,
                     "WriteCapacityUnits": 100,
                 },
-                TableName=SERVICES_CONFIG_TABLE,
+                GlobalSecondaryIndexes=[
+                    _change_index(index_name) for index_name in CHANGE_INDEXES
+                ],
+                TableName=table_name,
             )
             services_config_table.meta.client.get_waiter("table_exists").wait(
-                TableName=SERVICES_CONFIG_TABLE
+                TableName=table_name
             )
-            logger.info("Created dynamodb table.", TableName=SERVICES_CONFIG_TABLE)
+            enable_tombstone_expiry(services_config_table)
+            enable_stream(services_config_table)
+            logger.info("Created dynamodb table.", TableName=table_name)
             return True
         except (
             botocore.exceptions.EndpointConnectionError,
@@ -74,8 +252,57 @@ def create_services_config_table() -> bool:
             logger.error("Unexpected error", error=str(e))
             return False
     else:
-        logger.info("Table already exists.", TableName=SERVICES_CONFIG_TABLE)
+        logger.info("Table already exists.", TableName=table_name)
+        add_missing_change_indexes(table)
+        enable_tombstone_expiry(table)
+        enable_stream(table)
         return True
 
 
-create_services_config_table()
+class TableBootstrap:
+    def __init__(self, create_table: Callable[[], bool], retry_interval: float):
+        """
+        Args:
+            create_table: checks the table, creating it if missing, True once usable
+            retry_interval: the min number of seconds between two failed attempts
+        """
+        self.create_table = create_table
+        self.retry_interval = retry_interval
+        self.ready = False
+        self.attempts = 0
+        self._lock = threading.Lock()
+        self._attempted_at: Optional[float] = None
+
+    def ensure(self) -> bool:
+        """
+        Checks or creates the table unless done already, or attempted within
+        the retry interval. Concurrent callers wait for the attempt in progress.
+        Returns:
+            True if the table is usable
+        """
+        if self.ready:
+            return True
+        with self._lock:
+            if self.ready or (
+                self._attempted_at is not None
+                and time.monotonic() - self._attempted_at < self.retry_interval
+            ):
+                return self.ready
+            self._attempted_at = time.monotonic()
+            self.attempts += 1
+            logger.info("DynamoDB table init started.", status="In-progress")
+            try:
+                self.ready = self.create_table()
+            except Exception as e:
+                logger.exception(str(e))
+            logger.info("DynamoDB table init.", status=self.ready)
+        return self.ready
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "attempts": self.attempts}
+
+
+table_bootstrap = TableBootstrap(
+    create_services_config_table,
+    retry_interval=settings.dynamodb_bootstrap_retry_seconds,
+)
@@ -0,0 +1,83 @@
+import threading
+from typing import Optional
+
+from structlog import get_logger  # type: ignore
+
+"""
+Accounting of the capacity consumed by the dynamodb requests.
+
+The requests ask for their consumed capacity and record it here, per
+operation and per read consistency, so the cost of the strongly and of
+the eventually consistent reads can be compared.
+"""
+
+logger = get_logger()
+
+CONSUMED_CAPACITY_KEY = "ConsumedCapacity"
+CAPACITY_UNITS_KEY = "CapacityUnits"
+WRITE_MODE = "write"
+
+
+class CapacityMeter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+
+    def record(self, operation: str, mode: str, response: dict) -> float:
+        """
+        Adds the capacity consumed by a request to the totals
+        Args:
+            operation: the dynamodb operation, e.g. "query"
+            mode: the read consistency of the request, or WRITE_MODE
+            response: the response of the request
+        Returns:
+            The capacity units consumed by the request, 0 if not reported
+        """
+        units = consumed_units(response)
+        with self._lock:
+            totals = self._totals.setdefault(
+                (operation, mode), {"requests": 0, "capacity_units": 0.0}
+            )
+            totals["requests"] += 1
+            totals["capacity_units"] += units
+        logger.debug(
+            "Consumed dynamodb capacity.",
+            operation=operation,
+            mode=mode,
+            capacity_units=units,
+        )
+        return units
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals = {}
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the consumed capacity
+        Returns:
+            The number of requests and the capacity units, by operation and mode
+        """
+        with self._lock:
+            result = {}
+            for (operation, mode), totals in self._totals.items():
+                result.setdefault(operation, {})[mode] = dict(totals)
+            return result
+
+
+def consumed_units(response: Optional[dict]) -> float:
+    """
+    Capacity units reported by a response, summed over the tables for the
+    batch operations
+    Args:
+        response: the response of a request made with ReturnConsumedCapacity
+    Returns:
+        The capacity units, 0 if not reported
+    """
+    consumed = (response or {}).get(CONSUMED_CAPACITY_KEY) or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return float(sum(entry.get(CAPACITY_UNITS_KEY, 0) for entry in consumed))
+
+
+capacity_meter = CapacityMeter()
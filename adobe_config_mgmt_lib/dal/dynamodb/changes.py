@@ -0,0 +1,50 @@
+import threading
+import time
+
+from adobe_config_mgmt_lib.resources.constants import CHANGE_BUCKET_KEY, MODIFIED_AT_KEY
+
+"""
+Modification times of the entries, for the delta sync.
+
+Every write stamps the entry it writes with its modification time in
+microseconds, which never goes backwards within a process, and with the day
+of that time. Two sparse indexes, holding only the entries written since,
+sort the entries by modification time: one per service, one per day across
+services. Reading what changed since a point in time then costs a query
+over the changed entries only.
+"""
+
+SERVICE_CHANGES_INDEX = "service_changes"
+CHANGES_INDEX = "changes_by_time"
+CHANGE_BUCKET_MICROS = 24 * 3600 * 1000000
+
+
+class ModificationClock:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def now(self) -> int:
+        """
+        Returns:
+            The current time in microseconds, greater than any returned before
+        """
+        with self._lock:
+            self._last = max(time.time_ns() // 1000, self._last + 1)
+            return self._last
+
+
+modification_clock = ModificationClock()
+
+
+def change_bucket(modified_at: int) -> int:
+    return modified_at // CHANGE_BUCKET_MICROS
+
+
+def modification_attributes() -> dict:
+    """
+    Returns:
+        The attributes stamping an entry written now
+    """
+    modified_at = modification_clock.now()
+    return {MODIFIED_AT_KEY: modified_at, CHANGE_BUCKET_KEY: change_bucket(modified_at)}
@@ -0,0 +1,95 @@
+from typing import Iterator, List
+
+from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal.blob_store import BlobNotFoundError, BlobStore
+from adobe_config_mgmt_lib.dal.dynamodb.capacity import capacity_meter
+from adobe_config_mgmt_lib.resources.constants import (
+    CHUNK_DATA_KEY,
+    CONFIG_NAME_KEY,
+    RESERVED_KEY_SEPARATOR,
+    SERVICE_ID_KEY,
+    STRONG_CONSISTENCY,
+)
+
+"""
+Chunk entries of the offloaded configs.
+
+The payload of a config is split into ordered chunk entries, written with
+BatchWriteItem and read back with a single, paginated, range query. The
+chunks of a service live under a partition of their own, next to the one of
+the service, so that listing the configs of a service never reads them.
+"""
+
+CHUNK_PARTITION_SUFFIX = f"{RESERVED_KEY_SEPARATOR}chunks"
+CHUNK_INDEX_DIGITS = 5
+
+
+def chunk_partition_key(service_id: str) -> str:
+    return f"{service_id}{CHUNK_PARTITION_SUFFIX}"
+
+
+def chunk_sort_key(config_name: str, ref: str, index: int) -> str:
+    # Zero-padded, so that the chunks sort in order
+    return f"{config_name}#{ref}#{index:0{CHUNK_INDEX_DIGITS}d}"
+
+
+class DynamodbChunkStore(BlobStore):
+    def __init__(self, table):
+        self.table = table
+
+    def put(
+        self, service_id: str, config_name: str, ref: str, pieces: List[bytes]
+    ) -> None:
+        # The batch writer resends the unprocessed items on its own
+        with self.table.batch_writer() as writer:
+            for index, piece in enumerate(pieces):
+                writer.put_item(
+                    Item={
+                        SERVICE_ID_KEY: chunk_partition_key(service_id),
+                        CONFIG_NAME_KEY: chunk_sort_key(config_name, ref, index),
+                        CHUNK_DATA_KEY: piece,
+                    }
+                )
+
+    def iter_pieces(
+        self, service_id: str, config_name: str, ref: str, piece_count: int
+    ) -> Iterator[bytes]:
+        query_kwargs = {
+            # The chunks are written before the entry refers to them
+            "ConsistentRead": True,
+            "KeyConditionExpression": (
+                "service_id = :service_id AND config_name BETWEEN :first AND :last"
+            ),
+            "ExpressionAttributeValues": {
+                ":service_id": chunk_partition_key(service_id),
+                ":first": chunk_sort_key(config_name, ref, 0),
+                ":last": chunk_sort_key(config_name, ref, piece_count - 1),
+            },
+            "ReturnConsumedCapacity": "TOTAL"
+            if settings.return_consumed_capacity
+            else "NONE",
+        }
+        read = 0
+        while True:
+            response = self.table.query(**query_kwargs)
+            capacity_meter.record("query", STRONG_CONSISTENCY, response)
+            for item in response["Items"]:
+                read += 1
+                yield bytes(item[CHUNK_DATA_KEY].value)
+            if not response.get("LastEvaluatedKey"):
+                break
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        if read != piece_count:
+            raise BlobNotFoundError(ref)
+
+    def delete(
+        self, service_id: str, config_name: str, ref: str, piece_count: int
+    ) -> None:
+        with self.table.batch_writer() as writer:
+            for index in range(piece_count):
+                writer.delete_item(
+                    Key={
+                        SERVICE_ID_KEY: chunk_partition_key(service_id),
+                        CONFIG_NAME_KEY: chunk_sort_key(config_name, ref, index),
+                    }
+                )
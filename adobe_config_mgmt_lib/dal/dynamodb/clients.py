@@ -0,0 +1,182 @@
+import threading
+from functools import partial
+
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.core.config import settings
+
+"""
+Creation of the dynamodb clients.
+
+The clients share a session of their own, rather than the default session
+of boto3, and are configured from the settings: the size of their
+connection pool, their timeouts, the TCP keep-alive of their connections,
+their retries, and the endpoint and region of the infra config. A client is
+safe to share between threads; it is not between processes, so a forked
+worker creates its own.
+
+Every client reports its requests to the pool meter. A request sent while
+the whole pool is in use opens a connection of its own, discarded after the
+request: the meter counts them, a steady count means the pool is too small.
+"""
+
+logger = get_logger()
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ConnectionPoolMeter:
+    def __init__(self, max_connections: int):
+        """
+        Args:
+            max_connections: the size of the connection pool of every client
+        """
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def attach(self, client, name: str) -> None:
+        """
+        Has the requests of a client, retries included, reported to the meter
+        Args:
+            client: a botocore client
+            name: the name the client is reported under
+        """
+        with self._lock:
+            self._counters[name] = {
+                "in_flight": 0,
+                "peak_in_flight": 0,
+                "requests": 0,
+                "saturated": 0,
+            }
+        client.meta.events.register("before-send", partial(self._sending, name))
+        client.meta.events.register("response-received", partial(self._received, name))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_connections": self.max_connections,
+                "clients": {
+                    name: dict(counters) for name, counters in self._counters.items()
+                },
+            }
+
+    def _sending(self, name: str, **kwargs) -> None:
+        # Returns None, for the request to be sent
+        with self._lock:
+            counters = self._counters[name]
+            counters["in_flight"] += 1
+            counters["requests"] += 1
+            counters["peak_in_flight"] = max(
+                counters["peak_in_flight"], counters["in_flight"]
+            )
+            if counters["in_flight"] > self.max_connections:
+                counters["saturated"] += 1
+
+    def _received(self, name: str, **kwargs) -> None:
+        with self._lock:
+            self._counters[name]["in_flight"] -= 1
+
+
+pool_meter = ConnectionPoolMeter(settings.dynamodb_max_pool_connections)
+
+
+def client_config():
+    """
+    Returns:
+        The botocore config of the clients, from the settings
+    """
+    from botocore.config import Config
+
+    options = {
+        "max_pool_connections": settings.dynamodb_max_pool_connections,
+        "connect_timeout": settings.dynamodb_connect_timeout_seconds,
+        "read_timeout": settings.dynamodb_read_timeout_seconds,
+        "retries": {
+            "mode": settings.dynamodb_retry_mode,
+            "max_attempts": settings.dynamodb_max_attempts,
+        },
+    }
+    # Only known to the recent versions of botocore
+    if "tcp_keepalive" in Config.OPTION_DEFAULTS:
+        options["tcp_keepalive"] = settings.dynamodb_tcp_keepalive
+    return Config(**options)
+
+
+def _client_kwargs() -> dict:
+    kwargs = {"config": client_config()}
+    endpoint_url = settings.dynamodb_endpoint_url
+    if endpoint_url:
+        kwargs["endpoint_url"] = endpoint_url
+    # Without a region in the infra config, the one of the environment
+    region_name = settings.dynamodb.get("region")
+    if region_name:
+        kwargs["region_name"] = region_name
+    return kwargs
+
+
+def get_session():
+    """
+    Returns:
+        The session of the clients, created on first use
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import boto3
+
+                _session = boto3.session.Session()
+    return _session
+
+
+def create_resource(service_name: str = "dynamodb"):
+    """
+    Builds a resource, its client configured and metered
+    Args:
+        service_name: the name of the AWS service
+    Returns:
+        The resource
+    """
+    kwargs = _client_kwargs()
+    session = get_session()
+    # Sessions are not thread safe, unlike the clients they create
+    with _session_lock:
+        resource = session.resource(service_name, **kwargs)
+    pool_meter.attach(resource.meta.client, service_name)
+    logger.info(
+        "Created boto3 client.",
+        service=service_name,
+        endpoint_url=kwargs.get("endpoint_url"),
+        region_name=resource.meta.client.meta.region_name,
+        max_pool_connections=settings.dynamodb_max_pool_connections,
+    )
+    return resource
+
+
+def create_client(service_name: str):
+    """
+    Builds a client, configured and metered
+    Args:
+        service_name: the name of the AWS service, e.g. "dynamodbstreams"
+    Returns:
+        The client
+    """
+    kwargs = _client_kwargs()
+    session = get_session()
+    with _session_lock:
+        client = session.client(service_name, **kwargs)
+    pool_meter.attach(client, service_name)
+    return client
+
+
+def reset() -> None:
+    """
+    Forgets the session, for a forked process not to use the connections of
+    its parent
+    """
+    global _session, _session_lock
+    _session = None
+    # Held by a thread of the parent, the lock would never be released
+    _session_lock = threading.Lock()
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import zlib
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.dal.projection import project_item
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_BLOB_KEY,
+    CONFIG_CODEC_KEY,
+    CONFIG_KEY,
+)
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+"""
+Storage codecs of the configs.
+
+Configs whose JSON encoding reaches a size threshold are stored compressed,
+as a binary attribute next to the name of the codec, instead of as a map.
+The entries are decoded as soon as they are read, so the rest of the
+service, the caches included, only ever sees the configs as maps.
+
+Configs too large for an entry are always compressed, and their payload is
+stored in pieces which `PayloadDecoder` decodes as they are read.
+"""
+
+logger = get_logger()
+
+NO_CODEC = "none"
+ZLIB_CODEC = "zlib"
+ZSTD_CODEC = "zstd"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def available_codecs() -> List[str]:
+    """
+    Returns:
+        The compression codecs usable in this environment
+    """
+    codecs = [ZLIB_CODEC]
+    if zstandard is not None:
+        codecs.append(ZSTD_CODEC)
+    return codecs
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == ZLIB_CODEC:
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == ZSTD_CODEC and zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == ZLIB_CODEC:
+        return zlib.decompress(data)
+    if codec == ZSTD_CODEC and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+def serialize_config(config: Any) -> bytes:
+    """
+    Compact JSON encoding of a config, as read from or written to dynamodb
+    Args:
+        config: the config, whose numbers may be Decimals
+    Returns:
+        The encoded config
+    """
+    return json.dumps(config, separators=(",", ":"), default=_json_default).encode(
+        "utf-8"
+    )
+
+
+def encode_config(
+    config: Any, codec: str, threshold: int
+) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Compresses a config if it is large enough for it to pay off
+    Args:
+        config: the config
+        codec: the codec to use, NO_CODEC to always store the config as a map
+        threshold: the size of the encoded config, in bytes, from which it is compressed
+    Returns:
+        The compressed config and its codec, (None, None) to store it as a map
+    """
+    if codec == NO_CODEC:
+        return None, None
+    if codec not in available_codecs():
+        logger.warning("Config codec unavailable, using zlib.", codec=codec)
+        codec = ZLIB_CODEC
+    data = serialize_config(config)
+    if len(data) < threshold:
+        return None, None
+    blob = compress(data, codec)
+    if len(blob) >= len(data):
+        return None, None
+    return blob, codec
+
+
+def encode_payload(config: Any, codec: str) -> Tuple[bytes, str]:
+    """
+    Compresses a config to be offloaded, whatever its size
+    Args:
+        config: the config
+        codec: the preferred codec, zlib is used if it is NO_CODEC or unavailable
+    Returns:
+        The compressed config and its codec
+    """
+    if codec not in available_codecs():
+        codec = ZLIB_CODEC
+    return compress(serialize_config(config), codec), codec
+
+
+def payload_hash(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+class PayloadDecoder:
+    """
+    Incremental decoder of an offloaded config.
+
+    The pieces of the payload are hashed and decompressed as they are fed,
+    so the compressed payload is never assembled in memory.
+    """
+
+    def __init__(self, codec: str):
+        if codec == ZLIB_CODEC:
+            self._decompressor = zlib.decompressobj()
+        elif codec == ZSTD_CODEC and zstandard is not None:
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise ValueError(f"Unsupported codec: {codec}")
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self._parts: List[bytes] = []
+
+    def feed(self, piece: bytes) -> None:
+        self._hash.update(piece)
+        self._size += len(piece)
+        self._parts.append(self._decompressor.decompress(piece))
+
+    def result(self, expected_hash: str, expected_size: int) -> Any:
+        """
+        Args:
+            expected_hash: the SHA-256 of the whole payload
+            expected_size: the size of the whole payload, in bytes
+        Returns:
+            The config, with its non-integer numbers as Decimals
+        Raises:
+            ValueError: if the payload fed doesn't match
+        """
+        flush = getattr(self._decompressor, "flush", None)
+        if flush is not None:
+            self._parts.append(flush())
+        if self._size != expected_size or self._hash.hexdigest() != expected_hash:
+            raise ValueError("The offloaded config doesn't match its manifest")
+        data = b"".join(self._parts)
+        self._parts = []
+        return json.loads(data, parse_float=Decimal)
+
+
+def decode_config(blob: Any, codec: str) -> Any:
+    """
+    Args:
+        blob: the compressed config, as bytes or as a boto3 Binary
+        codec: the codec it was compressed with
+    Returns:
+        The config, with its non-integer numbers as Decimals like any
+        other number read from dynamodb
+    """
+    data = decompress(bytes(getattr(blob, "value", blob)), codec)
+    return json.loads(data, parse_float=Decimal)
+
+
+def decode_item(item: dict, projection: Optional[list] = None) -> dict:
+    """
+    Replaces the compressed config of an entry, if any, with the config itself
+    Args:
+        item: the entry as read from dynamodb, updated in place
+        projection: the paths of the config which were asked for, if any
+    Returns:
+        The entry
+    """
+    blob = item.pop(CONFIG_BLOB_KEY, None)
+    codec = item.pop(CONFIG_CODEC_KEY, None)
+    if blob is not None:
+        config = decode_config(blob, codec)
+        if projection is not None:
+            config = project_item({CONFIG_KEY: config}, projection)[CONFIG_KEY]
+        item[CONFIG_KEY] = config
+    return item
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1,17 +1,87 @@
+import random
 import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 
 from botocore.exceptions import ClientError, NoCredentialsError
 from structlog import get_logger  # type: ignore
 
 from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal import config_patch
 from adobe_config_mgmt_lib.dal.abstract_db_handler import AbstractDBHandler
-from adobe_config_mgmt_lib.dal.dynamodb import SERVICES_CONFIG_TABLE, dynamodb
+from adobe_config_mgmt_lib.dal.blob_store import (
+    BlobNotFoundError,
+    BlobStore,
+    LocalBlobStore,
+)
+from adobe_config_mgmt_lib.dal.dynamodb import (
+    get_dynamodb,
+    services_config_table_name,
+    table_bootstrap,
+)
+from adobe_config_mgmt_lib.dal.dynamodb.capacity import WRITE_MODE, capacity_meter
+from adobe_config_mgmt_lib.dal.dynamodb.changes import (
+    CHANGES_INDEX,
+    SERVICE_CHANGES_INDEX,
+    change_bucket,
+    modification_attributes,
+    modification_clock,
+)
+from adobe_config_mgmt_lib.dal.dynamodb.chunk_store import DynamodbChunkStore
+from adobe_config_mgmt_lib.dal.dynamodb.codec import (
+    PayloadDecoder,
+    decode_item,
+    encode_config,
+    encode_payload,
+    payload_hash,
+    serialize_config,
+)
+from adobe_config_mgmt_lib.dal.dynamodb.expressions import (
+    ExpressionBuilder,
+    to_dynamodb_value,
+)
+from adobe_config_mgmt_lib.dal.dynamodb.heads import (
+    HEAD_SORT_KEY,
+    head_partition_key,
+    head_service_id,
+)
+from adobe_config_mgmt_lib.dal.exceptions import (
+    INTERNAL_SERVER_ERROR_MESSAGE,
+    ConfigVersionConflictError,
+    PatchConflictError,
+)
+from adobe_config_mgmt_lib.dal.projection import ITEM_ATTRIBUTES, project_item
 from adobe_config_mgmt_lib.resources.constants import (  # Services-configs keys
+    CHANGE_BUCKET_KEY,
+    CONFIG_BLOB_KEY,
+    CONFIG_CODEC_KEY,
+    CONFIG_ITEMS_KEY,
     CONFIG_KEY,
+    CONFIG_KEYS_KEY,
+    CONFIG_MANIFEST_KEY,
     CONFIG_NAME_KEY,
+    CONSISTENT_READ_KEY,
     CREATED_AT_KEY,
+    DELETED_KEY,
+    EVENTUAL_CONSISTENCY,
+    EXCLUSIVE_START_KEY,
+    EXPECTED_VERSION_KEY,
+    EXPIRES_AT_KEY,
+    HEAD_VERSION_KEY,
+    LIMIT_KEY,
+    MODIFIED_AT_KEY,
+    PATCH_KEY,
+    PATCH_TYPE_KEY,
+    PREVIOUS_MANIFEST_KEY,
+    PROJECTION_KEY,
     SERVICE_ID_KEY,
+    SERVICE_IDS_KEY,
+    SINCE_KEY,
+    STRONG_CONSISTENCY,
     UPDATED_AT_KEY,
+    VERSION_KEY,
 )
 
 """
@@ -25,18 +95,87 @@ fetch config based on service ID & config type
 
 logger = get_logger()
 
-INTERNAL_SERVER_ERROR_MESSAGE = "Internal server error."
 DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE = "Dynamodb client is not initialized."
+CONDITIONAL_CHECK_FAILED_ERROR_CODE = "ConditionalCheckFailedException"
+VALIDATION_ERROR_CODE = "ValidationException"
+
+# Limits of the dynamodb batch APIs
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+# Retries of the unprocessed keys/items of the batch APIs
+BATCH_MAX_ATTEMPTS = 8
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+BATCH_BACKOFF_MAX_SECONDS = 2.0
+# Read-modify-write attempts of a patch racing with other writes
+PATCH_MAX_ATTEMPTS = 5
+
+# Backends of the configs too large for an entry
+DYNAMODB_OFFLOAD_BACKEND = "dynamodb"
+LOCAL_OFFLOAD_BACKEND = "local"
+# Keys of the manifest of an offloaded config
+MANIFEST_BACKEND_KEY = "backend"
+MANIFEST_REF_KEY = "ref"
+MANIFEST_CHUNKS_KEY = "chunks"
+MANIFEST_SIZE_KEY = "size"
+MANIFEST_HASH_KEY = "sha256"
+MANIFEST_CODEC_KEY = "codec"
+# Reads of an offloaded config racing with its replacement
+OFFLOAD_READ_ATTEMPTS = 3
+
+
+class _PatchNeedsConfig(Exception):
+    """
+    The patch can't be applied in place and must be applied to the config
+    """
+
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, as recommended for the batch APIs
+    Args:
+        attempt: the number of attempts made so far
+    Returns:
+        The number of seconds to wait before the next attempt
+    """
+    return random.uniform(
+        0, min(BATCH_BACKOFF_MAX_SECONDS, BATCH_BACKOFF_BASE_SECONDS * 2 ** attempt)
+    )
 
 
 class DynamodbDAL(AbstractDBHandler):
     # dynamodb internal keys
     DYNAMO_DB_ITEMS_KEY = "Items"
+    DYNAMO_DB_LAST_EVALUATED_KEY = "LastEvaluatedKey"
     DYNAMO_DB_RESPONSE_META_KEY = "ResponseMetadata"
     DYNAMO_DB_HTTP_STATUS_CODE_KEY = "HTTPStatusCode"
+    DYNAMO_DB_RESPONSES_KEY = "Responses"
+    DYNAMO_DB_UNPROCESSED_KEYS_KEY = "UnprocessedKeys"
+    DYNAMO_DB_UNPROCESSED_ITEMS_KEY = "UnprocessedItems"
+    DYNAMO_DB_ATTRIBUTES_KEY = "Attributes"
 
     def __init__(self):
-        self.table = dynamodb.Table(SERVICES_CONFIG_TABLE)
+        self._resource = None
+        self._table = None
+        self._chunk_store = None
+
+    @property
+    def table(self):
+        """
+        The config table, checked or created on first use
+        """
+        resource = get_dynamodb()
+        if self._resource is not resource:
+            # A forked process renews the resource, and the table with it
+            table_bootstrap.ensure()
+            self._table = resource.Table(services_config_table_name())
+            self._chunk_store = DynamodbChunkStore(self._table)
+            self._resource = resource
+        return self._table
+
+    @property
+    def chunk_store(self) -> DynamodbChunkStore:
+        self.table
+        return self._chunk_store
 
     def add_configs(self, data: dict, execution_context: dict):
         """
@@ -52,7 +191,7 @@ class DynamodbDAL(AbstractDBHandler):
         config_name = data.get(CONFIG_NAME_KEY)
         config = data.get(CONFIG_KEY)
         response = self._add_service_config(service_id, config_name, config)
-        logger.info(f"dynamo db add config completed. response code: {response}")
+        logger.debug(f"dynamo db add config completed. response code: {response}")
         return response == 200
 
     def get_configs(self, data: dict, execution_context: dict):
@@ -61,19 +200,229 @@ class DynamodbDAL(AbstractDBHandler):
 
         Args:
             data: contains all the required fields for inserting
-            execution_context: any additional info needed for completing the operation.
+            execution_context: may contain the paths of the config to return,
+                to read only these sub-documents, and the read consistency.
 
         Returns:
             The status code obtained from the operation
         """
+        projection = (execution_context or {}).get(PROJECTION_KEY)
+        consistent_read = self._consistent_read(execution_context)
         if SERVICE_ID_KEY not in data and CONFIG_NAME_KEY not in data:
             logger.error(
                 f"Mandatory query fields are missing. Mandatory fields are: {SERVICE_ID_KEY}, {CONFIG_NAME_KEY}"
             )
             return None
         if SERVICE_ID_KEY in data and CONFIG_NAME_KEY not in data:
-            return self._get_all_service_config(data[SERVICE_ID_KEY])
-        return self._get_service_config(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY])
+            return self._get_all_service_config(
+                data[SERVICE_ID_KEY], projection, consistent_read
+            )
+        return self._get_service_config(
+            data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY], projection, consistent_read
+        )
+
+    def get_config_page(self, data: dict, execution_context: dict):
+        """
+         Method to fetch a single page of the configs of a service.
+
+        Args:
+            data: contains the service ID
+            execution_context: may contain the page size, the key to resume after,
+                the paths of the config to return and the read consistency.
+
+        Returns:
+            The entries of the page and the key of the next page, None if it was the last one
+        """
+        execution_context = execution_context or {}
+        exclusive_start_key = execution_context.get(EXCLUSIVE_START_KEY)
+        while True:
+            items, exclusive_start_key = self._query_service_config_page(
+                data[SERVICE_ID_KEY],
+                limit=execution_context.get(LIMIT_KEY),
+                exclusive_start_key=exclusive_start_key,
+                projection=execution_context.get(PROJECTION_KEY),
+                consistent_read=self._consistent_read(execution_context),
+            )
+            # A page may only hold tombstones, which are left out
+            if items or not exclusive_start_key:
+                return items, exclusive_start_key
+
+    def batch_get_configs(self, data: dict, execution_context: dict):
+        """
+         Method to fetch many configs, across services, in as few round trips as possible.
+
+        Args:
+            data: contains the (service ID, config name) pairs to fetch
+            execution_context: may contain the read consistency.
+
+        Returns:
+            The entries found, in no particular order
+        """
+        keys = list(dict.fromkeys(tuple(key) for key in data[CONFIG_KEYS_KEY]))
+        consistent_read = self._consistent_read(execution_context)
+        return [
+            item
+            for item in self._batch_get_all(keys, consistent_read)
+            if DELETED_KEY not in item
+        ]
+
+    def _batch_get_all(self, keys: list, consistent_read: bool) -> list:
+        items = []
+        for i in range(0, len(keys), BATCH_GET_MAX_KEYS):
+            items.extend(
+                self._batch_get_service_config(
+                    keys[i : i + BATCH_GET_MAX_KEYS], consistent_read
+                )
+            )
+        return items
+
+    def batch_add_configs(self, data: dict, execution_context: dict):
+        """
+         Method to add many configs, across services, with BatchWriteItem.
+
+        BatchWriteItem can only put whole entries, so it writes the new configs
+        only, in chunks of 25, several chunks at a time. The configs already
+        stored, tombstones included, are written one by one instead, for their
+        version to keep increasing and their creation time to be kept, along
+        with the configs too large for an entry and their offloaded payload.
+        Args:
+            data: contains the items to write, with unique (service ID, config name) pairs
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The (service ID, config name) pairs which could not be written, with the reason
+        """
+        stored = self._stored_keys(
+            [
+                (item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY])
+                for item in data[CONFIG_ITEMS_KEY]
+            ]
+        )
+        items = []
+        singles = []
+        for item in data[CONFIG_ITEMS_KEY]:
+            new_item = None
+            if (item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY]) not in stored:
+                new_item = self._new_config_item(
+                    item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY], item.get(CONFIG_KEY)
+                )
+            if new_item is None:
+                singles.append(item)
+            else:
+                items.append(new_item)
+        chunks = [
+            items[i : i + BATCH_WRITE_MAX_ITEMS]
+            for i in range(0, len(items), BATCH_WRITE_MAX_ITEMS)
+        ]
+        failed = {}
+        workers = min(settings.batch_write_workers, len(chunks) + len(singles))
+        if not workers:
+            return failed
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="batch-write"
+        ) as executor:
+            single_failures = executor.map(self._add_single_config, singles)
+            for chunk_failures in executor.map(self._batch_write_chunk, chunks):
+                failed.update(chunk_failures)
+            for item_failures in single_failures:
+                failed.update(item_failures)
+        self._bump_heads_of_written(items, failed)
+        logger.info(
+            "Done batch writing data to dynamodb",
+            items=len(items),
+            chunks=len(chunks),
+            singles=len(singles),
+            failed=len(failed),
+        )
+        return failed
+
+    def _stored_keys(self, keys: list) -> set:
+        """
+        Reads which of the given entries are stored, tombstones included,
+        100 keys per BatchGetItem
+        Args:
+            keys: the (service ID, config name) pairs to look up
+        Returns:
+            The pairs of the entries stored
+        """
+        stored = set()
+        for i in range(0, len(keys), BATCH_GET_MAX_KEYS):
+            items = self._batch_get_service_config(
+                keys[i : i + BATCH_GET_MAX_KEYS], keys_only=True
+            )
+            stored.update(
+                (item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY]) for item in items
+            )
+        return stored
+
+    def get_service_heads(self, data: dict, execution_context: dict):
+        """
+         Method to read the head versions of many services, 100 per BatchGetItem.
+
+        Args:
+            data: contains the service IDs
+            execution_context: may contain the read consistency.
+        Returns:
+            The head version of every service, 0 for a service not written
+            to since the heads were introduced
+        """
+        service_ids = list(dict.fromkeys(data[SERVICE_IDS_KEY]))
+        keys = [
+            (head_partition_key(service_id), HEAD_SORT_KEY)
+            for service_id in service_ids
+        ]
+        consistent_read = self._consistent_read(execution_context)
+        heads = dict.fromkeys(service_ids, 0)
+        for i in range(0, len(keys), BATCH_GET_MAX_KEYS):
+            for item in self._batch_get_service_config(
+                keys[i : i + BATCH_GET_MAX_KEYS], consistent_read
+            ):
+                heads[head_service_id(item[SERVICE_ID_KEY])] = int(
+                    item[HEAD_VERSION_KEY]
+                )
+        return heads
+
+    def _bump_head(self, service_id: str, count: int = 1) -> None:
+        """
+        Increments the head version of a service, once its configs were written.
+        A failure only delays the detection of the write until the next one,
+        so it is logged and ignored
+        Args:
+            service_id: The ID of the service.
+            count: The number of writes to the configs of the service
+        """
+        try:
+            response = self.table.update_item(
+                Key={
+                    SERVICE_ID_KEY: head_partition_key(service_id),
+                    CONFIG_NAME_KEY: HEAD_SORT_KEY,
+                },
+                UpdateExpression="SET #updated_at = :now ADD #head_version :count",
+                ExpressionAttributeNames={
+                    "#updated_at": UPDATED_AT_KEY,
+                    "#head_version": HEAD_VERSION_KEY,
+                },
+                ExpressionAttributeValues={
+                    ":now": str(int(time.time())),
+                    ":count": count,
+                },
+                **self._capacity_kwargs(),
+            )
+            capacity_meter.record("update_item", WRITE_MODE, response)
+        except (ClientError, NoCredentialsError) as ex:
+            logger.warning(
+                "Could not bump the head of the service.",
+                service_id=service_id,
+                error=str(ex),
+            )
+
+    def _bump_heads_of_written(self, items: list, failed: dict) -> None:
+        written = Counter(
+            item[SERVICE_ID_KEY]
+            for item in items
+            if (item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY]) not in failed
+        )
+        for service_id, count in written.items():
+            self._bump_head(service_id, count)
 
     def _add_service_config(
         self, service_id: str, config_name: str, config: str,
@@ -91,28 +440,63 @@ class DynamodbDAL(AbstractDBHandler):
         """
         try:
             if settings.dynamodb_init_complete:
-                logger.info(
+                logger.debug(
                     "Inserting entry into the dynamodb",
                     service_id=service_id,
                     config_name=config_name,
                     dynmodb_status=settings.dynamodb_init_complete,
-                    table=SERVICES_CONFIG_TABLE,
+                    table=self.table.name,
                 )
-                created_at = int(time.time())
-                updated_at = int(time.time())
-                response = self.table.put_item(
-                    Item={
-                        SERVICE_ID_KEY: service_id,
-                        CREATED_AT_KEY: str(created_at),
-                        UPDATED_AT_KEY: str(updated_at),
-                        CONFIG_KEY: config,
-                        CONFIG_NAME_KEY: config_name,
-                    }
+                now = str(int(time.time()))
+                names = {
+                    "#created_at": CREATED_AT_KEY,
+                    "#updated_at": UPDATED_AT_KEY,
+                    "#version": VERSION_KEY,
+                    "#deleted": DELETED_KEY,
+                    "#expires_at": EXPIRES_AT_KEY,
+                }
+                values = {":now": now, ":one": 1}
+                set_config, remove_config, manifest = self._config_clauses(
+                    service_id, config_name, config, names, values
+                )
+                modified = self._modified_clause(names, values)
+                # Upserting, so re-adding a config keeps its creation time and
+                # its version keeps increasing, even once deleted
+                try:
+                    response = self.table.update_item(
+                        Key={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+                        UpdateExpression=(
+                            f"SET {set_config}, #updated_at = :now, {modified}, "
+                            "#created_at = if_not_exists(#created_at, :now) "
+                            f"REMOVE {remove_config}, #deleted, #expires_at "
+                            "ADD #version :one"
+                        ),
+                        ExpressionAttributeNames=names,
+                        ExpressionAttributeValues=values,
+                        ReturnValues="UPDATED_NEW",
+                        **self._capacity_kwargs(),
+                    )
+                except ClientError:
+                    self._delete_blob(service_id, config_name, manifest)
+                    raise
+                capacity_meter.record("update_item", WRITE_MODE, response)
+                self._bump_head(service_id)
+                self._delete_blob(
+                    service_id,
+                    config_name,
+                    response.get(self.DYNAMO_DB_ATTRIBUTES_KEY, {}).get(
+                        PREVIOUS_MANIFEST_KEY
+                    ),
                 )
                 result = response[self.DYNAMO_DB_RESPONSE_META_KEY][
                     self.DYNAMO_DB_HTTP_STATUS_CODE_KEY
                 ]
-                logger.info("Done writing data to dynamodb", result=result)
+                logger.info(
+                    "Done writing data to dynamodb",
+                    service_id=service_id,
+                    config_name=config_name,
+                    result=result,
+                )
                 return result
             else:
                 logger.exception(
@@ -135,12 +519,118 @@ class DynamodbDAL(AbstractDBHandler):
             )
             raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
 
-    def _get_service_config(self, service_id: str, config_name: int):
+    def _batch_write_chunk(self, items: list):
+        """
+        Writes up to 25 entries to dynamodb with a single BatchWriteItem,
+        retrying the unprocessed items with backoff
+        Args:
+            items: the entries to write
+        Returns:
+            The (service ID, config name) pairs which could not be written, with the reason
+        """
+        request_items = {
+            self.table.name: [{"PutRequest": {"Item": item}} for item in items]
+        }
+        if not settings.dynamodb_init_complete:
+            logger.error(
+                DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
+                dynmodb_status=settings.dynamodb_init_complete,
+            )
+            return {
+                (
+                    item[SERVICE_ID_KEY],
+                    item[CONFIG_NAME_KEY],
+                ): INTERNAL_SERVER_ERROR_MESSAGE
+                for item in items
+            }
+        try:
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(_backoff_delay(attempt))
+                response = get_dynamodb().batch_write_item(
+                    RequestItems=request_items, **self._capacity_kwargs()
+                )
+                capacity_meter.record("batch_write_item", WRITE_MODE, response)
+                request_items = response.get(self.DYNAMO_DB_UNPROCESSED_ITEMS_KEY)
+                if not request_items:
+                    return {}
+            error = "Unprocessed by dynamodb after retries"
+            items = [
+                request["PutRequest"]["Item"]
+                for request in request_items[self.table.name]
+            ]
+        except (ClientError, NoCredentialsError) as ce:
+            logger.exception(
+                "Error while batch writing entries into the dynamodb", error=str(ce),
+            )
+            error = str(ce)
+        return {(item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY]): error for item in items}
+
+    def _add_single_config(self, item: dict) -> dict:
+        """
+        Writes a config of a batch on its own, with UpdateItem
+        Args:
+            item: the item to write
+        Returns:
+            The (service ID, config name) pair if it could not be written, with the reason
+        """
+        try:
+            self._add_service_config(
+                item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY], item.get(CONFIG_KEY)
+            )
+        except RuntimeError:
+            return {
+                (
+                    item[SERVICE_ID_KEY],
+                    item[CONFIG_NAME_KEY],
+                ): INTERNAL_SERVER_ERROR_MESSAGE
+            }
+        return {}
+
+    @classmethod
+    def _new_config_item(cls, service_id: str, config_name: str, config):
+        """
+        Builds a new entry of the config table, for a config never stored before
+        Args:
+            service_id: Application/Service id.
+            config_name: Name of the config
+            config: The config
+        Returns:
+            The entry to write, None if the config is too large for an entry
+        """
+        blob, codec, offload = cls._stored_config(config)
+        if offload:
+            return None
+        now = time.time()
+        item = {
+            SERVICE_ID_KEY: service_id,
+            CREATED_AT_KEY: str(int(now)),
+            UPDATED_AT_KEY: str(int(now)),
+            CONFIG_NAME_KEY: config_name,
+            VERSION_KEY: 1,
+            **modification_attributes(),
+        }
+        if blob is None:
+            item[CONFIG_KEY] = to_dynamodb_value(config)
+        else:
+            item[CONFIG_BLOB_KEY] = blob
+            item[CONFIG_CODEC_KEY] = codec
+        return item
+
+    def _get_service_config(
+        self,
+        service_id: str,
+        config_name: int,
+        projection: list = None,
+        consistent_read: bool = True,
+    ):
         """
         Gets all the entries from dynamodb
         Args:
             service_id: The ID of the service.
             config_name: The name of the config
+            projection: The paths of the config to read, None for the whole config
+            consistent_read: False to allow reading a slightly stale entry, at half the cost
         Returns:
             All the entries matching the search criteria
         """
@@ -149,18 +639,24 @@ class DynamodbDAL(AbstractDBHandler):
                 logger.info(
                     "Reading entry from the dynamodb",
                     dynmodb_status=settings.dynamodb_init_complete,
-                    table=SERVICES_CONFIG_TABLE,
+                    table=self.table.name,
                 )
                 response = self.table.query(
-                    ConsistentRead=True,  # Takes care of consistency in Dynamodb
-                    TableName=SERVICES_CONFIG_TABLE,
+                    ConsistentRead=consistent_read,
+                    TableName=self.table.name,
                     KeyConditionExpression="service_id = :service_id AND config_name = :config_name",
                     ExpressionAttributeValues={
                         ":service_id": service_id,
                         ":config_name": config_name,
                     },
+                    **self._read_kwargs(projection),
+                )
+                capacity_meter.record(
+                    "query", self._read_mode(consistent_read), response
+                )
+                return self._decoded_items(
+                    response[self.DYNAMO_DB_ITEMS_KEY], projection
                 )
-                return response[self.DYNAMO_DB_ITEMS_KEY]
             else:
                 logger.error(
                     DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
@@ -175,28 +671,171 @@ class DynamodbDAL(AbstractDBHandler):
             )
             raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
 
-    def _get_all_service_config(self, service_id: str):
+    def _batch_get_service_config(
+        self, keys: list, consistent_read: bool = True, keys_only: bool = False
+    ):
         """
-        Gets all the entries from dynamodb
+        Gets up to 100 entries from dynamodb with a single BatchGetItem,
+        retrying the unprocessed keys with backoff
+        Args:
+            keys: the (service ID, config name) pairs to fetch
+            consistent_read: False to allow reading slightly stale entries, at half the cost
+            keys_only: True to read the keys of the entries only
+        Returns:
+            The entries found
+        """
+        request_items = {
+            self.table.name: {
+                "Keys": [
+                    {SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name}
+                    for service_id, config_name in keys
+                ],
+                "ConsistentRead": consistent_read,
+            }
+        }
+        if keys_only:
+            request_items[self.table.name].update(
+                ProjectionExpression="#service_id, #config_name",
+                ExpressionAttributeNames={
+                    "#service_id": SERVICE_ID_KEY,
+                    "#config_name": CONFIG_NAME_KEY,
+                },
+            )
+        items = []
+        try:
+            if not settings.dynamodb_init_complete:
+                logger.error(
+                    DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
+                    dynmodb_status=settings.dynamodb_init_complete,
+                )
+                raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+            for attempt in range(BATCH_MAX_ATTEMPTS):
+                if attempt:
+                    time.sleep(_backoff_delay(attempt))
+                response = get_dynamodb().batch_get_item(
+                    RequestItems=request_items, **self._capacity_kwargs()
+                )
+                capacity_meter.record(
+                    "batch_get_item", self._read_mode(consistent_read), response
+                )
+                items.extend(
+                    self._decoded_items(
+                        response[self.DYNAMO_DB_RESPONSES_KEY].get(self.table.name, [])
+                    )
+                )
+                request_items = response.get(self.DYNAMO_DB_UNPROCESSED_KEYS_KEY)
+                if not request_items:
+                    return items
+                logger.info(
+                    "Retrying the unprocessed keys of the batch read.",
+                    unprocessed=len(request_items[self.table.name]["Keys"]),
+                    attempt=attempt + 1,
+                )
+        except (ClientError, NoCredentialsError) as nce:
+            logger.exception(
+                "Error while batch reading entries from the configs from dynamodb",
+                keys=len(keys),
+                error=str(nce),
+            )
+            raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+        logger.error(
+            "Could not read all the entries of the batch from dynamodb",
+            unprocessed=len(request_items[self.table.name]["Keys"]),
+        )
+        raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+
+    def _get_all_service_config(
+        self, service_id: str, projection: list = None, consistent_read: bool = True
+    ):
+        """
+        Gets all the entries from dynamodb, following the query pages
         Args:
             service_id: The ID of the service.
+            projection: The paths of the config to read, None for the whole config
+            consistent_read: False to allow reading slightly stale entries, at half the cost
         Returns:
             All the entries matching the search criteria
         """
+        items = []
+        for page in self._iter_service_config_pages(
+            service_id, projection=projection, consistent_read=consistent_read
+        ):
+            items.extend(page)
+        return items
+
+    def _iter_service_config_pages(
+        self,
+        service_id: str,
+        page_size: int = None,
+        exclusive_start_key: dict = None,
+        projection: list = None,
+        consistent_read: bool = True,
+    ):
+        """
+        Generator over the query pages of the configs of a service
+        Args:
+            service_id: The ID of the service.
+            page_size: The max number of entries per page, bounded by 1 MB if not given
+            exclusive_start_key: The key to resume the query after
+            projection: The paths of the config to read, None for the whole config
+            consistent_read: False to allow reading slightly stale entries, at half the cost
+        Returns:
+            The entries of each page, as they are read
+        """
+        while True:
+            items, exclusive_start_key = self._query_service_config_page(
+                service_id, page_size, exclusive_start_key, projection, consistent_read
+            )
+            yield items
+            if not exclusive_start_key:
+                return
+
+    def _query_service_config_page(
+        self,
+        service_id: str,
+        limit: int = None,
+        exclusive_start_key: dict = None,
+        projection: list = None,
+        consistent_read: bool = True,
+    ):
+        """
+        Gets a single page of the entries of a service from dynamodb
+        Args:
+            service_id: The ID of the service.
+            limit: The max number of entries to read
+            exclusive_start_key: The key to resume the query after
+            projection: The paths of the config to read, None for the whole config
+            consistent_read: False to allow reading slightly stale entries, at half the cost
+        Returns:
+            The entries of the page and the key to resume the query after,
+            None if this was the last page
+        """
         try:
             if settings.dynamodb_init_complete:
                 logger.info(
                     "Reading entry from the dynamodb",
                     dynmodb_status=settings.dynamodb_init_complete,
-                    table=SERVICES_CONFIG_TABLE,
+                    table=self.table.name,
                 )
+                query_kwargs = self._read_kwargs(projection)
+                if limit:
+                    query_kwargs["Limit"] = limit
+                if exclusive_start_key:
+                    query_kwargs["ExclusiveStartKey"] = exclusive_start_key
                 response = self.table.query(
-                    ConsistentRead=True,  # Takes care of consistency in Dynamodb
-                    TableName=SERVICES_CONFIG_TABLE,
+                    ConsistentRead=consistent_read,
+                    TableName=self.table.name,
                     KeyConditionExpression="service_id = :service_id",
                     ExpressionAttributeValues={":service_id": service_id},
+                    **query_kwargs,
+                )
+                capacity_meter.record(
+                    "query", self._read_mode(consistent_read), response
+                )
+                return (
+                    self._decoded_items(response[self.DYNAMO_DB_ITEMS_KEY], projection),
+                    response.get(self.DYNAMO_DB_LAST_EVALUATED_KEY),
                 )
-                return response[self.DYNAMO_DB_ITEMS_KEY]
             else:
                 logger.error(
                     DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
@@ -210,34 +849,358 @@ class DynamodbDAL(AbstractDBHandler):
             )
             raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
 
+    @staticmethod
+    def _consistent_read(execution_context: dict) -> bool:
+        """
+        The reads which don't ask for a consistency use the server-wide default
+        Args:
+            execution_context: may contain the read consistency
+        Returns:
+            True for a strongly consistent read
+        """
+        consistent_read = (execution_context or {}).get(CONSISTENT_READ_KEY)
+        if consistent_read is None:
+            return settings.read_consistency == STRONG_CONSISTENCY
+        return consistent_read
+
+    @staticmethod
+    def _read_mode(consistent_read: bool) -> str:
+        return STRONG_CONSISTENCY if consistent_read else EVENTUAL_CONSISTENCY
+
+    @staticmethod
+    def _capacity_kwargs() -> dict:
+        return {
+            "ReturnConsumedCapacity": "TOTAL"
+            if settings.return_consumed_capacity
+            else "NONE"
+        }
+
+    @staticmethod
+    def _projection_kwargs(projection: list = None) -> dict:
+        """
+        Builds the ProjectionExpression reading the given paths of the config,
+        along with the other attributes of the entries
+        Args:
+            projection: The paths of the config to read, None for the whole
+                config, empty for none of it
+        Returns:
+            The projection arguments of the query, empty to read whole entries
+        """
+        if projection is None:
+            return {}
+        builder = ExpressionBuilder()
+        attributes = ITEM_ATTRIBUTES
+        if projection:
+            # Compressed and offloaded configs are read whole, and projected once decoded
+            attributes += (CONFIG_BLOB_KEY, CONFIG_CODEC_KEY, CONFIG_MANIFEST_KEY)
+        paths = [builder.name(attribute) for attribute in attributes]
+        paths.extend(builder.path([CONFIG_KEY] + path) for path in projection)
+        return {
+            "ProjectionExpression": ", ".join(paths),
+            "ExpressionAttributeNames": builder.names,
+        }
+
+    @classmethod
+    def _read_kwargs(cls, projection: list = None) -> dict:
+        """
+        Builds the arguments of a query reading the given paths of the
+        configs, and leaving the tombstones out
+        Args:
+            projection: The paths of the config to read, None for the whole
+                config, empty for none of it
+        Returns:
+            The projection, filter and capacity arguments of the query
+        """
+        kwargs = cls._projection_kwargs(projection)
+        kwargs.setdefault("ExpressionAttributeNames", {})["#deleted"] = DELETED_KEY
+        kwargs["FilterExpression"] = "attribute_not_exists(#deleted)"
+        kwargs.update(cls._capacity_kwargs())
+        return kwargs
+
+    @staticmethod
+    def _modified_clause(names: dict, values: dict) -> str:
+        """
+        Builds the SET clause stamping an entry with its modification time,
+        which the delta sync indexes are sorted on
+        Args:
+            names: the expression attribute names, updated in place
+            values: the expression attribute values, updated in place
+        Returns:
+            The clause
+        """
+        clauses = []
+        for key, value in modification_attributes().items():
+            names[f"#{key}"] = key
+            values[f":{key}"] = value
+            clauses.append(f"#{key} = :{key}")
+        return ", ".join(clauses)
+
+    def _decoded_items(self, items: list, projection: list = None) -> list:
+        """
+        Decodes the compressed and the offloaded configs of the entries read.
+        The config of an entry is left out when none of the projected paths
+        exist, it is returned empty instead
+        """
+        for item in items:
+            item.pop(PREVIOUS_MANIFEST_KEY, None)
+            manifest = item.pop(CONFIG_MANIFEST_KEY, None)
+            if manifest is not None:
+                config = self._read_offloaded_config(
+                    item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY], manifest
+                )
+                item.update(project_item({CONFIG_KEY: config}, projection))
+            decode_item(item, projection)
+            if projection is not None:
+                item.setdefault(CONFIG_KEY, {})
+        return items
+
+    @staticmethod
+    def _stored_config(config) -> Tuple[Optional[bytes], Optional[str], bool]:
+        """
+        Picks how a config is stored: as a map, compressed if it is large
+        enough, or offloaded if it is too large for an entry
+        Args:
+            config: the config to write
+        Returns:
+            The compressed config and its codec, (None, None) to store it as a
+            map, and whether it must be offloaded instead
+        """
+        blob, codec = encode_config(
+            config,
+            settings.config_compression_codec,
+            settings.config_compression_threshold_bytes,
+        )
+        size = len(blob) if blob is not None else len(serialize_config(config))
+        return blob, codec, size > settings.config_item_max_bytes
+
+    def _config_clauses(
+        self, service_id: str, config_name: str, config, names: dict, values: dict
+    ) -> Tuple[str, str, Optional[dict]]:
+        """
+        Builds the update clauses writing a config, compressed or offloaded
+        depending on its size, and removing its other representations. An
+        offloaded config is stored before the entry refers to it.
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            config: the config to write
+            names: the expression attribute names, updated in place
+            values: the expression attribute values, updated in place
+        Returns:
+            The SET clause, the REMOVE clause and the manifest of the
+            offloaded config, if any
+        """
+        names.update(
+            {
+                "#config": CONFIG_KEY,
+                "#config_blob": CONFIG_BLOB_KEY,
+                "#config_codec": CONFIG_CODEC_KEY,
+                "#config_manifest": CONFIG_MANIFEST_KEY,
+                "#previous_manifest": PREVIOUS_MANIFEST_KEY,
+            }
+        )
+        values[":no_manifest"] = None
+        # The write returns the manifest it replaces, so that the payload
+        # which is no longer referred to can be deleted
+        previous = "#previous_manifest = if_not_exists(#config_manifest, :no_manifest)"
+        blob, codec, offload = self._stored_config(config)
+        if offload:
+            manifest = self._offload_config(service_id, config_name, config)
+            values[":config_manifest"] = manifest
+            return (
+                f"#config_manifest = :config_manifest, {previous}",
+                "#config, #config_blob, #config_codec",
+                manifest,
+            )
+        if blob is None:
+            values[":config"] = to_dynamodb_value(config)
+            return (
+                f"#config = :config, {previous}",
+                "#config_blob, #config_codec, #config_manifest",
+                None,
+            )
+        values[":config_blob"] = blob
+        values[":config_codec"] = codec
+        return (
+            f"#config_blob = :config_blob, #config_codec = :config_codec, {previous}",
+            "#config, #config_manifest",
+            None,
+        )
+
+    def _blob_store(self, backend: str) -> BlobStore:
+        if backend == LOCAL_OFFLOAD_BACKEND:
+            return LocalBlobStore(settings.config_blob_dir)
+        return self.chunk_store
+
+    def _offload_config(self, service_id: str, config_name: str, config) -> dict:
+        """
+        Stores a config too large for an entry in the configured blob store
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            config: the config to store
+        Returns:
+            The manifest of the stored config
+        """
+        payload, codec = encode_payload(config, settings.config_compression_codec)
+        chunk_size = settings.config_chunk_size_bytes
+        pieces = [
+            payload[i : i + chunk_size] for i in range(0, len(payload), chunk_size)
+        ]
+        manifest = {
+            MANIFEST_BACKEND_KEY: settings.config_offload_backend,
+            MANIFEST_REF_KEY: uuid.uuid4().hex,
+            MANIFEST_CHUNKS_KEY: len(pieces),
+            MANIFEST_SIZE_KEY: len(payload),
+            MANIFEST_HASH_KEY: payload_hash(payload),
+            MANIFEST_CODEC_KEY: codec,
+        }
+        self._blob_store(manifest[MANIFEST_BACKEND_KEY]).put(
+            service_id, config_name, manifest[MANIFEST_REF_KEY], pieces
+        )
+        logger.info(
+            "Offloaded the config.",
+            service_id=service_id,
+            config_name=config_name,
+            size=len(payload),
+            chunks=len(pieces),
+            backend=manifest[MANIFEST_BACKEND_KEY],
+        )
+        return manifest
+
+    def _read_offloaded_config(self, service_id: str, config_name: str, manifest):
+        """
+        Reads an offloaded config, decoding its payload as it is read. The
+        payload may be deleted by a write replacing the config while it is
+        being read, the manifest is then read again
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            manifest: The manifest of the offloaded config
+        Returns:
+            The config
+        """
+        for attempt in range(OFFLOAD_READ_ATTEMPTS):
+            decoder = PayloadDecoder(manifest[MANIFEST_CODEC_KEY])
+            pieces = self._blob_store(manifest[MANIFEST_BACKEND_KEY]).iter_pieces(
+                service_id,
+                config_name,
+                manifest[MANIFEST_REF_KEY],
+                int(manifest[MANIFEST_CHUNKS_KEY]),
+            )
+            try:
+                for piece in pieces:
+                    decoder.feed(piece)
+                return decoder.result(
+                    manifest[MANIFEST_HASH_KEY], int(manifest[MANIFEST_SIZE_KEY])
+                )
+            except (BlobNotFoundError, ValueError) as ex:
+                logger.warning(
+                    "Could not read the offloaded config.",
+                    service_id=service_id,
+                    config_name=config_name,
+                    attempt=attempt + 1,
+                    error=str(ex),
+                )
+            manifest = self._current_manifest(service_id, config_name)
+            if manifest is None:
+                break
+        raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+
+    def _current_manifest(self, service_id: str, config_name: str):
+        response = self.table.get_item(
+            Key={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+            ConsistentRead=True,
+            ProjectionExpression="#config_manifest",
+            ExpressionAttributeNames={"#config_manifest": CONFIG_MANIFEST_KEY},
+            **self._capacity_kwargs(),
+        )
+        capacity_meter.record("get_item", STRONG_CONSISTENCY, response)
+        return response.get("Item", {}).get(CONFIG_MANIFEST_KEY)
+
+    def _delete_blob(self, service_id: str, config_name: str, manifest) -> None:
+        """
+        Deletes the payload of an offloaded config, if any. A failure only
+        leaves an unused payload behind, so it is logged and ignored
+        """
+        if not manifest:
+            return
+        try:
+            self._blob_store(manifest[MANIFEST_BACKEND_KEY]).delete(
+                service_id,
+                config_name,
+                manifest[MANIFEST_REF_KEY],
+                int(manifest[MANIFEST_CHUNKS_KEY]),
+            )
+        except (ClientError, NoCredentialsError, OSError) as ex:
+            logger.warning(
+                "Could not delete the offloaded config.",
+                service_id=service_id,
+                config_name=config_name,
+                ref=manifest[MANIFEST_REF_KEY],
+                error=str(ex),
+            )
+
     def update_configs(self, data: dict, execution_context: dict):
         """
-        :param data:
-        :param execution_context:
-        :return:
+        Method to update the config of an entry with a single conditional
+        UpdateItem, which also increments the version of the entry.
+
+        Args:
+            data: contains the service ID, the config name and the new config
+            execution_context: may contain the version the entry is expected to be at
+        Returns:
+            The updated entry, None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
         """
-        service_id = (data[SERVICE_ID_KEY],)
+        service_id = data[SERVICE_ID_KEY]
         config_name = data[CONFIG_NAME_KEY]
+        expected_version = (execution_context or {}).get(EXPECTED_VERSION_KEY)
         try:
             if settings.dynamodb_init_complete:
-                logger.info(
-                    "Updating config for service: {service_id}, config: {config_name}",
+                logger.debug(
+                    "Updating config",
+                    service_id=service_id,
+                    config_name=config_name,
                     status="in-progress",
                 )
-
-                response = self.get_configs(
-                    data=data, execution_context=execution_context
+                names = {"#updated_at": UPDATED_AT_KEY, "#version": VERSION_KEY}
+                values = {":updated_at": str(int(time.time())), ":one": 1}
+                set_config, remove_config, manifest = self._config_clauses(
+                    service_id, config_name, data[CONFIG_KEY], names, values
                 )
-                item = response[0]
-
-                item[CONFIG_KEY] = data["config"]
-                item[UPDATED_AT_KEY] = str(int(time.time()))
-                self.table.put_item(Item=item)
+                modified = self._modified_clause(names, values)
+                try:
+                    response = self.table.update_item(
+                        Key={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+                        UpdateExpression=(
+                            f"SET {set_config}, #updated_at = :updated_at, {modified} "
+                            f"REMOVE {remove_config} "
+                            "ADD #version :one"
+                        ),
+                        ConditionExpression=self._write_condition(
+                            expected_version, names, values
+                        ),
+                        ExpressionAttributeNames=names,
+                        ExpressionAttributeValues=values,
+                        ReturnValues="ALL_NEW",
+                        **self._capacity_kwargs(),
+                    )
+                except ClientError:
+                    self._delete_blob(service_id, config_name, manifest)
+                    raise
+                capacity_meter.record("update_item", WRITE_MODE, response)
+                self._bump_head(service_id)
                 logger.info(
-                    f"Done updating the config for service: {service_id}, config: {config_name}",
+                    "Done updating the config",
+                    service_id=service_id,
+                    config_name=config_name,
                     result=True,
                 )
-                return True
+                return self._written_item(
+                    response[self.DYNAMO_DB_ATTRIBUTES_KEY], data[CONFIG_KEY]
+                )
             else:
                 logger.exception(
                     DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
@@ -246,6 +1209,13 @@ class DynamodbDAL(AbstractDBHandler):
                 raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
 
         except (ClientError, NoCredentialsError) as ce:
+            if self._is_condition_check_failure(ce):
+                return self._handle_condition_check_failure(
+                    self._failed_condition_item(service_id, config_name),
+                    service_id,
+                    config_name,
+                    expected_version,
+                )
             logger.exception(
                 f"Error while updating config entry in dynamodb for the "
                 f"service: {service_id}, config-type: {config_name}",
@@ -260,8 +1230,596 @@ class DynamodbDAL(AbstractDBHandler):
             )
             raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
 
+    def _written_item(self, item: dict, config) -> dict:
+        """
+        The entry returned by a write, with the config as written rather
+        than as stored, so an offloaded config isn't read back
+        """
+        self._delete_blob(
+            item[SERVICE_ID_KEY],
+            item[CONFIG_NAME_KEY],
+            item.pop(PREVIOUS_MANIFEST_KEY, None),
+        )
+        for key in (CONFIG_BLOB_KEY, CONFIG_CODEC_KEY, CONFIG_MANIFEST_KEY):
+            item.pop(key, None)
+        item[CONFIG_KEY] = to_dynamodb_value(config)
+        return item
+
+    @staticmethod
+    def _write_condition(expected_version: int, names: dict, values: dict) -> str:
+        """
+        Builds the condition of a write to an existing entry, which isn't a tombstone
+        Args:
+            expected_version: the version the entry must be at, None for any version
+            names: the expression attribute names, updated in place
+            values: the expression attribute values, updated in place
+        Returns:
+            The condition expression
+        """
+        names["#deleted"] = DELETED_KEY
+        condition = (
+            f"attribute_exists({SERVICE_ID_KEY}) AND attribute_not_exists(#deleted)"
+        )
+        if expected_version is None:
+            return condition
+        names["#version"] = VERSION_KEY
+        values[":expected_version"] = expected_version
+        if expected_version == 0:
+            # Entries written before versioning was introduced have no version
+            return (
+                f"{condition} AND (attribute_not_exists(#version) "
+                "OR #version = :expected_version)"
+            )
+        return f"{condition} AND #version = :expected_version"
+
+    @staticmethod
+    def _is_condition_check_failure(error: Exception) -> bool:
+        return (
+            isinstance(error, ClientError)
+            and error.response.get("Error", {}).get("Code")
+            == CONDITIONAL_CHECK_FAILED_ERROR_CODE
+        )
+
+    def _failed_condition_item(self, service_id: str, config_name: str):
+        """
+        Reads the entry a conditional write failed on, to tell why it failed.
+        The clients of the supported botocore versions can't have the entry
+        returned along with the failed condition.
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+        Returns:
+            The entry, None if there is no such entry
+        """
+        try:
+            response = self.table.get_item(
+                Key={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+                ConsistentRead=True,
+                **self._capacity_kwargs(),
+            )
+        except (ClientError, NoCredentialsError) as ce:
+            logger.exception(
+                "Error while reading the entry of a failed condition",
+                service_id=service_id,
+                config_name=config_name,
+                error=str(ce),
+            )
+            raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+        capacity_meter.record("get_item", STRONG_CONSISTENCY, response)
+        return response.get("Item")
+
+    @staticmethod
+    def _handle_condition_check_failure(
+        current_item: Optional[dict],
+        service_id: str,
+        config_name: str,
+        expected_version: int,
+    ):
+        """
+        Tells a missing entry apart from a version mismatch, from the entry
+        read after the failed condition
+        Returns:
+            None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
+        """
+        if not current_item or DELETED_KEY in current_item:
+            logger.info(
+                "No config entry to update.",
+                service_id=service_id,
+                config_name=config_name,
+            )
+            return None
+        current_version = int(current_item.get(VERSION_KEY, 0))
+        logger.info(
+            "Config version conflict.",
+            service_id=service_id,
+            config_name=config_name,
+            expected_version=expected_version,
+            current_version=current_version,
+        )
+        raise ConfigVersionConflictError(
+            412,
+            f"The config is at version {current_version}, not {expected_version}",
+            current_version=current_version,
+        )
+
+    def patch_configs(self, data: dict, execution_context: dict):
+        """
+        Method to apply a JSON Merge Patch or a JSON Patch to the config of an entry.
+
+        Patches which only touch known paths are applied in place, with a
+        single conditional UpdateItem. The others, and the ones whose
+        conditions fail for another reason than a conflict, fall back to
+        reading the config and writing it back at the version it was read at.
+        Args:
+            data: contains the service ID, the config name, the patch and its type
+            execution_context: may contain the version the entry is expected to be at
+        Returns:
+            The updated entry, None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
+            PatchConflictError: if the patch can't be applied to the config
+        """
+        service_id = data[SERVICE_ID_KEY]
+        config_name = data[CONFIG_NAME_KEY]
+        patch = to_dynamodb_value(data[PATCH_KEY])
+        patch_type = data[PATCH_TYPE_KEY]
+        expected_version = (execution_context or {}).get(EXPECTED_VERSION_KEY)
+        operations = config_patch.patch_operations(patch, patch_type)
+        if operations is not None:
+            try:
+                return self._patch_in_place(
+                    service_id,
+                    config_name,
+                    patch,
+                    patch_type,
+                    operations,
+                    expected_version,
+                )
+            except _PatchNeedsConfig:
+                logger.debug(
+                    "Patching the config with a read-modify-write.",
+                    service_id=service_id,
+                    config_name=config_name,
+                )
+        return self._patch_read_modify_write(
+            service_id, config_name, patch, patch_type, expected_version
+        )
+
+    def _patch_in_place(
+        self,
+        service_id: str,
+        config_name: str,
+        patch,
+        patch_type: str,
+        operations: list,
+        expected_version: int,
+    ):
+        """
+        Applies the operations of a patch with a single UpdateItem
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            patch: The patch document
+            patch_type: The type of the patch
+            operations: The path level operations of the patch
+            expected_version: The version the entry must be at, None for any version
+        Returns:
+            The updated entry, None if there is no such entry
+        Raises:
+            _PatchNeedsConfig: if the patch must be applied to the config instead
+        """
+        builder, update_expression, condition = self._patch_expressions(
+            operations, expected_version
+        )
+        try:
+            if not settings.dynamodb_init_complete:
+                logger.error(
+                    DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
+                    dynmodb_status=settings.dynamodb_init_complete,
+                )
+                raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+            response = self.table.update_item(
+                Key={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+                UpdateExpression=update_expression,
+                ConditionExpression=condition,
+                ExpressionAttributeNames=builder.names,
+                ExpressionAttributeValues=builder.values,
+                ReturnValues="ALL_NEW",
+                **self._capacity_kwargs(),
+            )
+            capacity_meter.record("update_item", WRITE_MODE, response)
+            self._bump_head(service_id)
+            logger.info(
+                "Done patching the config",
+                service_id=service_id,
+                config_name=config_name,
+                operations=len(operations),
+            )
+            return self._decoded_items([response[self.DYNAMO_DB_ATTRIBUTES_KEY]])[0]
+        except (ClientError, NoCredentialsError) as ce:
+            if self._is_condition_check_failure(ce):
+                return self._handle_patch_condition_failure(
+                    self._failed_condition_item(service_id, config_name),
+                    service_id,
+                    config_name,
+                    patch,
+                    patch_type,
+                    expected_version,
+                )
+            if (
+                isinstance(ce, ClientError)
+                and ce.response.get("Error", {}).get("Code") == VALIDATION_ERROR_CODE
+            ):
+                # e.g. a path going through a member which is not a map
+                raise _PatchNeedsConfig()
+            logger.exception(
+                f"Error while patching config entry in dynamodb for the "
+                f"service: {service_id}, config-type: {config_name}",
+                error=str(ce),
+            )
+            raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+
+    @classmethod
+    def _patch_expressions(
+        cls, operations: list, expected_version: int
+    ) -> Tuple[ExpressionBuilder, str, str]:
+        """
+        Builds the update and condition expressions applying the operations of a patch
+        Args:
+            operations: The path level operations of the patch
+            expected_version: The version the entry must be at, None for any version
+        Returns:
+            The builder holding the names and values, the update expression
+            and the condition expression
+        Raises:
+            _PatchNeedsConfig: if the patch must be applied to the config instead
+        """
+        builder = ExpressionBuilder()
+        set_clauses = [
+            f"{builder.name(UPDATED_AT_KEY)} = {builder.value(str(int(time.time())))}",
+            cls._modified_clause(builder.names, builder.values),
+        ]
+        remove_clauses = []
+        conditions = [
+            cls._write_condition(expected_version, builder.names, builder.values),
+            # Compressed configs can only be patched once decoded
+            f"attribute_exists({builder.name(CONFIG_KEY)})",
+        ]
+        for operation in operations:
+            kind, path = operation[0], builder.path([CONFIG_KEY] + operation[1])
+            if kind == config_patch.SET:
+                set_clauses.append(f"{path} = {builder.value(operation[2])}")
+            elif kind == config_patch.APPEND:
+                set_clauses.append(
+                    f"{path} = list_append({path}, {builder.value([operation[2]])})"
+                )
+            elif kind == config_patch.REMOVE:
+                remove_clauses.append(path)
+            elif kind == config_patch.ASSERT_EXISTS:
+                conditions.append(f"attribute_exists({path})")
+            elif isinstance(operation[2], (dict, list)):
+                # Only scalars are compared reliably in a condition
+                raise _PatchNeedsConfig()
+            else:
+                conditions.append(f"{path} = {builder.value(operation[2])}")
+        update_expression = "SET " + ", ".join(set_clauses)
+        if remove_clauses:
+            update_expression += " REMOVE " + ", ".join(remove_clauses)
+        update_expression += f" ADD {builder.name(VERSION_KEY)} {builder.value(1)}"
+        return builder, update_expression, " AND ".join(conditions)
+
+    @classmethod
+    def _handle_patch_condition_failure(
+        cls,
+        current_item: Optional[dict],
+        service_id: str,
+        config_name: str,
+        patch,
+        patch_type: str,
+        expected_version: int,
+    ):
+        """
+        Tells a missing entry, a version mismatch and a patch which can't be
+        applied apart, from the entry read after the failed condition
+        Returns:
+            None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
+            PatchConflictError: if the patch can't be applied to the config
+            _PatchNeedsConfig: if the patch must be applied to the config instead
+        """
+        if not current_item or DELETED_KEY in current_item:
+            return cls._handle_condition_check_failure(
+                current_item, service_id, config_name, expected_version
+            )
+        if CONFIG_MANIFEST_KEY in current_item:
+            raise _PatchNeedsConfig()
+        current_item = decode_item(current_item)
+        if (
+            expected_version is not None
+            and int(current_item.get(VERSION_KEY, 0)) != expected_version
+        ):
+            return cls._handle_condition_check_failure(
+                current_item, service_id, config_name, expected_version
+            )
+        # Raises the conflict if the patch really can't be applied,
+        # otherwise the conditions were stricter than the patch
+        config_patch.apply_patch(current_item.get(CONFIG_KEY) or {}, patch, patch_type)
+        raise _PatchNeedsConfig()
+
+    def _patch_read_modify_write(
+        self,
+        service_id: str,
+        config_name: str,
+        patch,
+        patch_type: str,
+        expected_version: int,
+    ):
+        """
+        Applies a patch to the config as read, and writes it back on the
+        condition that the entry is still at the version it was read at
+        Args:
+            service_id: The ID of the service.
+            config_name: The name of the config
+            patch: The patch document
+            patch_type: The type of the patch
+            expected_version: The version the entry must be at, None for any version
+        Returns:
+            The updated entry, None if there is no such entry
+        """
+        for attempt in range(PATCH_MAX_ATTEMPTS):
+            items = self._get_service_config(service_id, config_name)
+            if not items:
+                return None
+            current_version = int(items[0].get(VERSION_KEY, 0))
+            if expected_version is not None and current_version != expected_version:
+                raise ConfigVersionConflictError(
+                    412,
+                    f"The config is at version {current_version}, not {expected_version}",
+                    current_version=current_version,
+                )
+            config = config_patch.apply_patch(
+                items[0].get(CONFIG_KEY) or {}, patch, patch_type
+            )
+            try:
+                return self.update_configs(
+                    data={
+                        SERVICE_ID_KEY: service_id,
+                        CONFIG_NAME_KEY: config_name,
+                        CONFIG_KEY: config,
+                    },
+                    execution_context={EXPECTED_VERSION_KEY: current_version},
+                )
+            except ConfigVersionConflictError:
+                if expected_version is not None:
+                    raise
+                logger.info(
+                    "Config changed while being patched, retrying.",
+                    service_id=service_id,
+                    config_name=config_name,
+                    attempt=attempt + 1,
+                )
+        raise PatchConflictError(409, "The config kept changing while being patched")
+
     def delete_configs(self, data: dict, execution_context: dict):
         """
-        TODO implement this logic if needed
+        Method to delete a config, leaving a tombstone in place of its entry.
+
+        The tombstone keeps the keys, the timestamps and the version of the
+        entry, so that the delta sync reports the deletion, and is left out
+        of every other read. Dynamodb deletes it once the tombstone retention
+        is over. Adding the config again replaces it.
+        Args:
+            data: contains the service ID and the config name
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The tombstone, None if there is no such config
+        """
+        service_id = data[SERVICE_ID_KEY]
+        config_name = data[CONFIG_NAME_KEY]
+        now = int(time.time())
+        names = {
+            "#updated_at": UPDATED_AT_KEY,
+            "#version": VERSION_KEY,
+            "#deleted": DELETED_KEY,
+            "#expires_at": EXPIRES_AT_KEY,
+            "#config": CONFIG_KEY,
+            "#config_blob": CONFIG_BLOB_KEY,
+            "#config_codec": CONFIG_CODEC_KEY,
+            "#config_manifest": CONFIG_MANIFEST_KEY,
+            "#previous_manifest": PREVIOUS_MANIFEST_KEY,
+        }
+        values = {
+            ":now": str(now),
+            ":one": 1,
+            ":deleted": True,
+            ":expires_at": now + settings.tombstone_retention_seconds,
+            ":no_manifest": None,
+        }
+        modified = self._modified_clause(names, values)
+        try:
+            if not settings.dynamodb_init_complete:
+                logger.error(
+                    DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
+                    dynmodb_status=settings.dynamodb_init_complete,
+                )
+                raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+            response = self.table.update_item(
+                Key={SERVICE_ID_KEY: service_id, CONFIG_NAME_KEY: config_name},
+                UpdateExpression=(
+                    "SET #deleted = :deleted, #expires_at = :expires_at, "
+                    f"#updated_at = :now, {modified}, #previous_manifest = "
+                    "if_not_exists(#config_manifest, :no_manifest) "
+                    "REMOVE #config, #config_blob, #config_codec, #config_manifest "
+                    "ADD #version :one"
+                ),
+                ConditionExpression=self._write_condition(None, names, values),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW",
+                **self._capacity_kwargs(),
+            )
+        except (ClientError, NoCredentialsError) as ce:
+            if self._is_condition_check_failure(ce):
+                logger.info(
+                    "No config entry to delete.",
+                    service_id=service_id,
+                    config_name=config_name,
+                )
+                return None
+            logger.exception(
+                f"Error while deleting config entry in dynamodb for the "
+                f"service: {service_id}, config-type: {config_name}",
+                error=str(ce),
+            )
+            raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+        capacity_meter.record("update_item", WRITE_MODE, response)
+        self._bump_head(service_id)
+        tombstone = response[self.DYNAMO_DB_ATTRIBUTES_KEY]
+        self._delete_blob(
+            service_id, config_name, tombstone.pop(PREVIOUS_MANIFEST_KEY, None)
+        )
+        logger.info(
+            "Done deleting the config", service_id=service_id, config_name=config_name,
+        )
+        return tombstone
+
+    def get_config_changes(self, data: dict, execution_context: dict):
+        """
+        Method to fetch the configs changed after a modification time, the
+        tombstones of the deleted ones included, from the delta sync indexes.
+
+        The indexes only hold the keys of the entries, which are then read
+        with strongly consistent batch reads. Across services, the changes are
+        read day by day, from the day of the modification time on, which
+        should be within the tombstone retention.
+        Args:
+            data: may contain a service ID, to fetch the changes of this service only
+            execution_context: contains the modification time to fetch the
+                changes after, in microseconds, and may contain the max number of changes
+        Returns:
+            The changed entries, oldest change first, the modification time
+            of the last change read from the index, None if there was none,
+            and whether there may be more changes. A page cut at the max
+            number of changes also holds all the other changes at the time
+            of its last one.
+        """
+        since = int(execution_context[SINCE_KEY])
+        limit = execution_context.get(LIMIT_KEY) or settings.delta_sync_page_size
+        service_id = data.get(SERVICE_ID_KEY)
+        if service_id is not None:
+            partitions = [(SERVICE_CHANGES_INDEX, SERVICE_ID_KEY, service_id)]
+        else:
+            partitions = [
+                (CHANGES_INDEX, CHANGE_BUCKET_KEY, bucket)
+                for bucket in range(
+                    change_bucket(since), change_bucket(modification_clock.now()) + 1,
+                )
+            ]
+        entries = []
+        try:
+            if not settings.dynamodb_init_complete:
+                logger.error(
+                    DYNAMODB_CLIENT_NOT_INITIALIZED_MESSAGE,
+                    dynmodb_status=settings.dynamodb_init_complete,
+                )
+                raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+            for partition in partitions:
+                entries.extend(
+                    self._query_change_index(*partition, since, limit - len(entries))
+                )
+                if len(entries) >= limit:
+                    entries.extend(self._query_last_time_changes(partition, entries))
+                    break
+            keys = list(
+                dict.fromkeys(
+                    (entry[SERVICE_ID_KEY], entry[CONFIG_NAME_KEY]) for entry in entries
+                )
+            )
+            items = self._batch_get_all(keys, consistent_read=True)
+        except (ClientError, NoCredentialsError) as nce:
+            logger.exception(
+                "Error while reading the config changes from dynamodb",
+                service_id=service_id,
+                error=str(nce),
+            )
+            raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+        items.sort(key=lambda item: item.get(MODIFIED_AT_KEY, 0))
+        last_modified_at = int(entries[-1][MODIFIED_AT_KEY]) if entries else None
+        return items, last_modified_at, len(entries) >= limit
+
+    def _query_last_time_changes(self, partition: tuple, entries: list) -> list:
+        """
+        Reads the keys of the entries modified at the time of the last one
+        read, which were not read yet
+        Args:
+            partition: The index, its partition key and the partition the
+                last entry was read from
+            entries: The keys of the entries read, oldest first
+        Returns:
+            The keys of the entries and their modification time
+        """
+        last_modified_at = int(entries[-1][MODIFIED_AT_KEY])
+        read = {(entry[SERVICE_ID_KEY], entry[CONFIG_NAME_KEY]) for entry in entries}
+        return [
+            entry
+            for entry in self._query_change_index(
+                *partition, last_modified_at - 1, None, until=last_modified_at
+            )
+            if (entry[SERVICE_ID_KEY], entry[CONFIG_NAME_KEY]) not in read
+        ]
+
+    def _query_change_index(
+        self,
+        index_name: str,
+        key: str,
+        value,
+        since: int,
+        limit: Optional[int],
+        until: Optional[int] = None,
+    ) -> list:
+        """
+        Reads the keys of the entries modified after a time from a delta sync index
+        Args:
+            index_name: The name of the index
+            key: The partition key of the index
+            value: The partition to read
+            since: The modification time to read the entries after, in microseconds
+            limit: The max number of entries to read, None for no limit
+            until: The last modification time to read the entries up to, None for now
+        Returns:
+            The keys of the entries and their modification time, oldest first
         """
-        pass
+        entries = []
+        query_kwargs = self._capacity_kwargs()
+        condition = "#partition = :partition AND #modified_at > :since"
+        values = {":partition": value, ":since": since}
+        if until is not None:
+            # Both bounds of a between are included
+            condition = (
+                "#partition = :partition AND #modified_at BETWEEN :since AND :until"
+            )
+            values = {":partition": value, ":since": since + 1, ":until": until}
+        while limit is None or len(entries) < limit:
+            if limit is not None:
+                query_kwargs["Limit"] = limit - len(entries)
+            response = self.table.query(
+                IndexName=index_name,
+                KeyConditionExpression=condition,
+                ExpressionAttributeNames={
+                    "#partition": key,
+                    "#modified_at": MODIFIED_AT_KEY,
+                },
+                ExpressionAttributeValues=values,
+                **query_kwargs,
+            )
+            capacity_meter.record("query", EVENTUAL_CONSISTENCY, response)
+            entries.extend(response[self.DYNAMO_DB_ITEMS_KEY])
+            if not response.get(self.DYNAMO_DB_LAST_EVALUATED_KEY):
+                break
+            query_kwargs["ExclusiveStartKey"] = response[
+                self.DYNAMO_DB_LAST_EVALUATED_KEY
+            ]
+        return entries
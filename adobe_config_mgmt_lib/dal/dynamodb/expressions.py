@@ -0,0 +1,67 @@
+from decimal import Decimal
+from typing import Any, List
+
+"""
+Helpers to build dynamodb expressions.
+
+Every attribute name and value goes through a placeholder, so reserved
+words and arbitrary config keys can be used in document paths.
+"""
+
+
+class ExpressionBuilder:
+    def __init__(self):
+        self.names = {}
+        self.values = {}
+        self._name_placeholders = {}
+
+    def name(self, attribute: str) -> str:
+        """
+        Args:
+            attribute: the attribute name, or map key
+        Returns:
+            The placeholder of the name, the same for every use of the name
+        """
+        if attribute not in self._name_placeholders:
+            placeholder = f"#n{len(self._name_placeholders)}"
+            self._name_placeholders[attribute] = placeholder
+            self.names[placeholder] = attribute
+        return self._name_placeholders[attribute]
+
+    def value(self, value: Any) -> str:
+        """
+        Args:
+            value: the value to compare or write
+        Returns:
+            The placeholder of the value
+        """
+        placeholder = f":v{len(self.values)}"
+        self.values[placeholder] = to_dynamodb_value(value)
+        return placeholder
+
+    def path(self, tokens: List[str]) -> str:
+        """
+        Args:
+            tokens: the attribute name followed by the nested map keys
+        Returns:
+            The document path
+        """
+        return ".".join(self.name(token) for token in tokens)
+
+
+def to_dynamodb_value(value: Any) -> Any:
+    """
+    Converts the floats of a JSON value to Decimals, the only non-integer
+    numbers the boto3 serializer accepts.
+    Args:
+        value: the JSON value
+    Returns:
+        The value, ready to be written to dynamodb
+    """
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: to_dynamodb_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_dynamodb_value(item) for item in value]
+    return value
@@ -0,0 +1,22 @@
+from adobe_config_mgmt_lib.resources.constants import RESERVED_KEY_SEPARATOR
+
+"""
+Head entries of the services.
+
+Every write to the configs of a service increments the version of its head
+entry, so telling whether anything changed for a service takes reading a
+single small entry rather than all of its configs. The head of a service
+lives under a partition of its own, next to the one of the service, so that
+listing the configs of a service never reads it.
+"""
+
+HEAD_PARTITION_SUFFIX = f"{RESERVED_KEY_SEPARATOR}head"
+HEAD_SORT_KEY = "head"
+
+
+def head_partition_key(service_id: str) -> str:
+    return f"{service_id}{HEAD_PARTITION_SUFFIX}"
+
+
+def head_service_id(partition_key: str) -> str:
+    return partition_key[: -len(HEAD_PARTITION_SUFFIX)]
@@ -0,0 +1,299 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from botocore.exceptions import ClientError
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.dal.dynamodb import clients, deserialize
+from adobe_config_mgmt_lib.dal.dynamodb.chunk_store import CHUNK_PARTITION_SUFFIX
+from adobe_config_mgmt_lib.dal.dynamodb.heads import HEAD_PARTITION_SUFFIX
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_NAME_KEY,
+    DELETED_KEY,
+    SERVICE_ID_KEY,
+    VERSION_KEY,
+)
+
+"""
+Reading of the DynamoDB Stream of the config table.
+
+The reader follows every shard of the stream, resuming each one after the
+last record handed out, as recorded by the checkpoints. A shard split or
+closed by dynamodb is read to its end before its children are, so the
+changes of an entry are read in order. The checkpoints are kept in memory,
+and saved to a file when given a path, so a restarted replica resumes where
+it stopped rather than at the tip of the stream.
+"""
+
+logger = get_logger()
+
+# Starting positions of the shards without a checkpoint
+LATEST = "LATEST"
+TRIM_HORIZON = "TRIM_HORIZON"
+AFTER_SEQUENCE_NUMBER = "AFTER_SEQUENCE_NUMBER"
+# The checkpoint of a shard read to its end
+SHARD_END = "SHARD_END"
+SHARD_REFRESH_SECONDS = 60.0
+EXPIRED_ITERATOR_ERROR_CODE = "ExpiredIteratorException"
+TRIMMED_DATA_ERROR_CODE = "TrimmedDataAccessException"
+INSERT_EVENT = "INSERT"
+REMOVE_EVENT = "REMOVE"
+# The principal of the deletions made by the time to live of the table
+TTL_PRINCIPAL = "dynamodb.amazonaws.com"
+
+
+class StreamChange:
+    __slots__ = ("event_name", "service_id", "config_name", "version", "deleted")
+
+    def __init__(
+        self,
+        event_name: str,
+        service_id: str,
+        config_name: str,
+        version: Optional[int],
+        deleted: bool,
+    ):
+        # INSERT, MODIFY or REMOVE
+        self.event_name = event_name
+        self.service_id = service_id
+        self.config_name = config_name
+        # None when the entry is gone
+        self.version = version
+        self.deleted = deleted
+
+    def __repr__(self):
+        return (
+            f"StreamChange({self.event_name!r}, {self.service_id!r}, "
+            f"{self.config_name!r}, {self.version!r}, deleted={self.deleted!r})"
+        )
+
+
+def stream_change(record: dict) -> Optional[StreamChange]:
+    """
+    Reads the change of a config from a stream record
+    Args:
+        record: the stream record
+    Returns:
+        The change, None for the records of the head and chunk entries, and
+        for the expiry of the tombstones
+    """
+    keys = record["dynamodb"]["Keys"]
+    service_id = keys[SERVICE_ID_KEY]["S"]
+    if service_id.endswith((HEAD_PARTITION_SUFFIX, CHUNK_PARTITION_SUFFIX)):
+        return None
+    config_name = keys[CONFIG_NAME_KEY]["S"]
+    event_name = record["eventName"]
+    if event_name == REMOVE_EVENT:
+        if record.get("userIdentity", {}).get("principalId") == TTL_PRINCIPAL:
+            return None
+        return StreamChange(event_name, service_id, config_name, None, True)
+    image = record["dynamodb"].get("NewImage", {})
+    version = image.get(VERSION_KEY)
+    return StreamChange(
+        event_name,
+        service_id,
+        config_name,
+        None if version is None else int(deserialize(version)),
+        DELETED_KEY in image,
+    )
+
+
+class ShardCheckpoints:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: the file the checkpoints are saved to, None to keep them in memory only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._sequence_numbers: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self._sequence_numbers = json.load(checkpoint_file)
+
+    def get(self, shard_id: str) -> Optional[str]:
+        """
+        Returns:
+            The sequence number of the last record read from the shard,
+            SHARD_END once read to its end, None if not read yet
+        """
+        return self._sequence_numbers.get(shard_id)
+
+    def set(self, shard_id: str, sequence_number: str) -> None:
+        with self._lock:
+            self._sequence_numbers[shard_id] = sequence_number
+
+    def save(self) -> None:
+        """
+        Writes the checkpoints to their file, if any, replacing it atomically
+        """
+        if not self.path:
+            return
+        with self._lock:
+            content = json.dumps(self._sequence_numbers)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            checkpoint_file.write(content)
+        os.replace(temporary_path, self.path)
+
+
+class StreamReader:
+    def __init__(
+        self,
+        client,
+        stream_arn: str,
+        checkpoints: ShardCheckpoints,
+        start_position: str = LATEST,
+        batch_size: int = 1000,
+    ):
+        """
+        Args:
+            client: the dynamodbstreams client
+            stream_arn: the ARN of the stream of the table
+            checkpoints: the positions to resume the shards from
+            start_position: where to start the shards open at the first read
+                and without a checkpoint, LATEST or TRIM_HORIZON. The shards
+                opened later are read from their start.
+            batch_size: the max number of records read from a shard at once
+        """
+        self.client = client
+        self.stream_arn = stream_arn
+        self.checkpoints = checkpoints
+        self.start_position = start_position
+        self.batch_size = batch_size
+        self._parents: Dict[str, Optional[str]] = {}
+        self._iterators: Dict[str, Optional[str]] = {}
+        self._refreshed_at: Optional[float] = None
+        self._started = False
+        self.records = 0
+        # The number of times records were trimmed before they were read
+        self.trimmed = 0
+
+    def read(self) -> List[dict]:
+        """
+        Reads the new records of every open shard, once each
+        Returns:
+            The records, in order within each shard
+        """
+        if self._refreshed_at is None or (
+            time.monotonic() - self._refreshed_at >= SHARD_REFRESH_SECONDS
+        ):
+            self.refresh_shards()
+        records = []
+        for shard_id in list(self._iterators):
+            records.extend(self._read_shard(shard_id))
+        self.records += len(records)
+        return records
+
+    def refresh_shards(self) -> None:
+        """
+        Lists the shards of the stream and opens the ones ready to be read
+        """
+        # The shards past the retention of the stream are no longer listed
+        self._parents = {
+            shard["ShardId"]: shard.get("ParentShardId")
+            for shard in self._describe_shards()
+        }
+        for shard_id, parent_id in self._parents.items():
+            if shard_id in self._iterators or self._is_done(shard_id):
+                continue
+            if parent_id in self._parents and not self._is_done(parent_id):
+                # The children of a shard are read once it was read to its end
+                continue
+            self._iterators[shard_id] = self._shard_iterator(
+                shard_id, TRIM_HORIZON if self._started else self.start_position
+            )
+        self._refreshed_at = time.monotonic()
+        self._started = True
+
+    def stats(self) -> dict:
+        return {"shards": len(self._iterators), "records": self.records}
+
+    def _is_done(self, shard_id: str) -> bool:
+        return self.checkpoints.get(shard_id) == SHARD_END
+
+    def _describe_shards(self) -> List[dict]:
+        shards = []
+        kwargs = {"StreamArn": self.stream_arn}
+        while True:
+            description = self.client.describe_stream(**kwargs)["StreamDescription"]
+            shards.extend(description.get("Shards", []))
+            if not description.get("LastEvaluatedShardId"):
+                return shards
+            kwargs["ExclusiveStartShardId"] = description["LastEvaluatedShardId"]
+
+    def _shard_iterator(self, shard_id: str, start_position: str) -> str:
+        kwargs = {
+            "StreamArn": self.stream_arn,
+            "ShardId": shard_id,
+            "ShardIteratorType": start_position,
+        }
+        sequence_number = self.checkpoints.get(shard_id)
+        if sequence_number is not None:
+            kwargs["ShardIteratorType"] = AFTER_SEQUENCE_NUMBER
+            kwargs["SequenceNumber"] = sequence_number
+        return self.client.get_shard_iterator(**kwargs)["ShardIterator"]
+
+    def _read_shard(self, shard_id: str) -> List[dict]:
+        try:
+            response = self.client.get_records(
+                ShardIterator=self._iterators[shard_id], Limit=self.batch_size
+            )
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code == EXPIRED_ITERATOR_ERROR_CODE:
+                self._iterators[shard_id] = self._shard_iterator(shard_id, TRIM_HORIZON)
+                return []
+            if code == TRIMMED_DATA_ERROR_CODE:
+                # The records after the checkpoint are gone, the consumer
+                # resyncs on seeing `trimmed` move
+                logger.warning("Stream records were trimmed.", shard_id=shard_id)
+                self.trimmed += 1
+                self._iterators[shard_id] = self.client.get_shard_iterator(
+                    StreamArn=self.stream_arn,
+                    ShardId=shard_id,
+                    ShardIteratorType=TRIM_HORIZON,
+                )["ShardIterator"]
+                return []
+            raise
+        records = response.get("Records", [])
+        if records:
+            self.checkpoints.set(shard_id, records[-1]["dynamodb"]["SequenceNumber"])
+        next_iterator = response.get("NextShardIterator")
+        if next_iterator is None:
+            # A closed shard read to its end, its children can be read
+            del self._iterators[shard_id]
+            self.checkpoints.set(shard_id, SHARD_END)
+            self._refreshed_at = None
+        else:
+            self._iterators[shard_id] = next_iterator
+        return records
+
+
+def open_stream_reader(
+    table, checkpoint_path: str, start_position: str, batch_size: int
+) -> Optional[StreamReader]:
+    """
+    Builds the reader of the stream of the config table
+    Args:
+        table: the config table
+        checkpoint_path: the file of the checkpoints, empty to keep them in memory
+        start_position: LATEST or TRIM_HORIZON
+        batch_size: the max number of records read from a shard at once
+    Returns:
+        The reader, None if the table has no stream
+    """
+    stream_arn = table.latest_stream_arn
+    if not stream_arn:
+        logger.error("The config table has no stream.", table=table.name)
+        return None
+    return StreamReader(
+        clients.create_client("dynamodbstreams"),
+        stream_arn,
+        ShardCheckpoints(checkpoint_path or None),
+        start_position=start_position,
+        batch_size=batch_size,
+    )
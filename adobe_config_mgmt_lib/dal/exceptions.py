@@ -0,0 +1,31 @@
+"""
+Errors raised by the data access layers.
+
+Like the other DAL errors, they carry the HTTP status code and the message
+as their arguments.
+"""
+
+INTERNAL_SERVER_ERROR_MESSAGE = "Internal server error."
+
+
+class ConfigVersionConflictError(RuntimeError):
+    """
+    The config is not at the version the write was conditioned on
+    """
+
+    def __init__(self, status_code: int, message: str, current_version: int = None):
+        super().__init__(status_code, message)
+        self.status_code = status_code
+        self.message = message
+        self.current_version = current_version
+
+
+class PatchConflictError(RuntimeError):
+    """
+    The patch can't be applied to the current config
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(status_code, message)
+        self.status_code = status_code
+        self.message = message
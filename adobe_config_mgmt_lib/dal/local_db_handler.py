@@ -0,0 +1,416 @@
+import time
+from abc import abstractmethod
+from collections import Counter
+from typing import ContextManager, Dict, List, Optional
+
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.dal import config_patch
+from adobe_config_mgmt_lib.dal.abstract_db_handler import AbstractDBHandler
+from adobe_config_mgmt_lib.dal.dynamodb.changes import modification_attributes
+from adobe_config_mgmt_lib.dal.exceptions import ConfigVersionConflictError
+from adobe_config_mgmt_lib.dal.projection import project_item
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_ITEMS_KEY,
+    CONFIG_KEY,
+    CONFIG_KEYS_KEY,
+    CONFIG_NAME_KEY,
+    CREATED_AT_KEY,
+    DELETED_KEY,
+    EXCLUSIVE_START_KEY,
+    EXPECTED_VERSION_KEY,
+    EXPIRES_AT_KEY,
+    LIMIT_KEY,
+    MODIFIED_AT_KEY,
+    PATCH_KEY,
+    PATCH_TYPE_KEY,
+    PROJECTION_KEY,
+    SERVICE_ID_KEY,
+    SERVICE_IDS_KEY,
+    SINCE_KEY,
+    UPDATED_AT_KEY,
+    VERSION_KEY,
+)
+
+"""
+Base of the data access layers storing the configs in the process or on
+the local disk.
+
+The operations are implemented once, here, with the semantics of the
+dynamodb DAL: every write increments the version of the entry and the head
+version of its service, and stamps the entry with its modification time;
+deleted configs are kept as tombstones until the tombstone retention is
+over, reported by the delta sync and left out of every other read. The
+backends only store and look up the entries, each operation running in a
+transaction of theirs, so reads are always strongly consistent and a
+patch is never lost to a concurrent write.
+"""
+
+logger = get_logger()
+
+
+class LocalDBHandler(AbstractDBHandler):
+    @abstractmethod
+    def _transaction(self, write: bool = False) -> ContextManager:
+        """
+        The transaction an operation runs in, the writes being serialized
+        Args:
+            write: whether the operation writes
+        """
+
+    @abstractmethod
+    def _read_entry(self, service_id: str, config_name: str) -> Optional[dict]:
+        """
+        Returns:
+            A copy of the entry, tombstones included, None if there is none
+        """
+
+    @abstractmethod
+    def _write_entry(self, entry: dict) -> None:
+        """
+        Replaces the entry with the same keys, if any
+        """
+
+    @abstractmethod
+    def _read_service_entries(
+        self, service_id: str, after: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Args:
+            service_id: The ID of the service.
+            after: The name of the config to read the entries after, if any
+            limit: The max number of entries to read, None for all
+        Returns:
+            Copies of the entries of the service, tombstones left out, by config name
+        """
+
+    @abstractmethod
+    def _read_changed_entries(
+        self,
+        service_id: Optional[str],
+        since: int,
+        limit: Optional[int],
+        until: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Args:
+            service_id: The ID of the service, None for all the services
+            since: The modification time to read the entries after, in microseconds
+            limit: The max number of entries to read, None for no limit
+            until: The last modification time to read the entries up to, None for now
+        Returns:
+            Copies of the entries, tombstones included, oldest modification first
+        """
+
+    @abstractmethod
+    def _purge_tombstones(self, now: int) -> None:
+        """
+        Drops the tombstones expired by now
+        """
+
+    @abstractmethod
+    def _bump_head(self, service_id: str, count: int = 1) -> None:
+        """
+        Increments the head version of a service
+        """
+
+    @abstractmethod
+    def _read_heads(self, service_ids: List[str]) -> Dict[str, int]:
+        """
+        Returns:
+            The head version of the services written to
+        """
+
+    def add_configs(self, data: dict, execution_context: dict):
+        """
+        Method to add a config, or to replace it. Adding a config again keeps
+        its creation time and its version keeps increasing, even once deleted.
+
+        Args:
+            data: contains the service ID, the config name and the config
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            True
+        """
+        with self._transaction(write=True):
+            self._put_config(
+                data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY], data.get(CONFIG_KEY)
+            )
+            self._bump_head(data[SERVICE_ID_KEY])
+        logger.debug(
+            "Added the config.",
+            service_id=data[SERVICE_ID_KEY],
+            config_name=data[CONFIG_NAME_KEY],
+        )
+        return True
+
+    def get_configs(self, data: dict, execution_context: dict):
+        """
+        Method to fetch a config, or all the configs of a service.
+
+        Args:
+            data: contains the service ID and optionally the config name
+            execution_context: may contain the paths of the config to return
+        Returns:
+            The matching entries
+        """
+        projection = (execution_context or {}).get(PROJECTION_KEY)
+        if SERVICE_ID_KEY not in data:
+            logger.error(
+                f"Mandatory query fields are missing. Mandatory fields are: {SERVICE_ID_KEY}, {CONFIG_NAME_KEY}"
+            )
+            return None
+        with self._transaction():
+            if CONFIG_NAME_KEY in data:
+                entry = self._read_entry(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY])
+                entries = [] if entry is None or DELETED_KEY in entry else [entry]
+            else:
+                entries = self._read_service_entries(data[SERVICE_ID_KEY])
+        return [_projected(entry, projection) for entry in entries]
+
+    def batch_add_configs(self, data: dict, execution_context: dict):
+        """
+        Method to add many configs, across services, in a single transaction.
+
+        Args:
+            data: contains the items to write
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The (service ID, config name) pairs which could not be written, none
+        """
+        items = data[CONFIG_ITEMS_KEY]
+        with self._transaction(write=True):
+            for item in items:
+                self._put_config(
+                    item[SERVICE_ID_KEY], item[CONFIG_NAME_KEY], item.get(CONFIG_KEY)
+                )
+            for service_id, count in Counter(
+                item[SERVICE_ID_KEY] for item in items
+            ).items():
+                self._bump_head(service_id, count)
+        logger.info("Done batch writing the configs", items=len(items))
+        return {}
+
+    def batch_get_configs(self, data: dict, execution_context: dict):
+        """
+        Method to fetch many configs, across services.
+
+        Args:
+            data: contains the (service ID, config name) pairs to fetch
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The entries found
+        """
+        keys = list(dict.fromkeys(tuple(key) for key in data[CONFIG_KEYS_KEY]))
+        with self._transaction():
+            entries = [self._read_entry(service_id, name) for service_id, name in keys]
+        return [entry for entry in entries if entry and DELETED_KEY not in entry]
+
+    def get_config_page(self, data: dict, execution_context: dict):
+        """
+        Method to fetch a single page of the configs of a service, by config name.
+
+        Args:
+            data: contains the service ID
+            execution_context: may contain the page size, the key to resume
+                after and the paths of the config to return.
+        Returns:
+            The entries of the page and the key to resume after, None on the last page
+        """
+        execution_context = execution_context or {}
+        service_id = data[SERVICE_ID_KEY]
+        limit = execution_context.get(LIMIT_KEY)
+        start_key = execution_context.get(EXCLUSIVE_START_KEY) or {}
+        with self._transaction():
+            # One more entry tells whether this page is the last one
+            entries = self._read_service_entries(
+                service_id, start_key.get(CONFIG_NAME_KEY), limit and limit + 1
+            )
+        last_key = None
+        if limit and len(entries) > limit:
+            entries = entries[:limit]
+            last_key = {
+                SERVICE_ID_KEY: service_id,
+                CONFIG_NAME_KEY: entries[-1][CONFIG_NAME_KEY],
+            }
+        projection = execution_context.get(PROJECTION_KEY)
+        return [_projected(entry, projection) for entry in entries], last_key
+
+    def get_service_heads(self, data: dict, execution_context: dict):
+        """
+        Method to read the head versions of many services.
+
+        Args:
+            data: contains the service IDs
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The head version of every service, 0 for a service never written to
+        """
+        service_ids = list(dict.fromkeys(data[SERVICE_IDS_KEY]))
+        with self._transaction():
+            heads = self._read_heads(service_ids)
+        return {service_id: heads.get(service_id, 0) for service_id in service_ids}
+
+    def get_config_changes(self, data: dict, execution_context: dict):
+        """
+        Method to fetch the configs changed after a modification time, the
+        tombstones of the deleted ones included.
+
+        Args:
+            data: may contain a service ID, to fetch the changes of this service only
+            execution_context: contains the modification time to fetch the
+                changes after, in microseconds, and may contain the max number of changes
+        Returns:
+            The changed entries, oldest change first, the modification time
+            of the last one, None if there was none, and whether there may be
+            more changes. A page cut at the max number of changes also holds
+            all the other changes at the time of its last one.
+        """
+        since = int(execution_context[SINCE_KEY])
+        limit = execution_context.get(LIMIT_KEY) or settings.delta_sync_page_size
+        service_id = data.get(SERVICE_ID_KEY)
+        with self._transaction():
+            entries = self._read_changed_entries(service_id, since, limit)
+            more = len(entries) >= limit
+            if more:
+                last_modified_at = entries[-1][MODIFIED_AT_KEY]
+                entries = [
+                    entry
+                    for entry in entries
+                    if entry[MODIFIED_AT_KEY] < last_modified_at
+                ] + self._read_changed_entries(
+                    service_id, last_modified_at - 1, None, until=last_modified_at
+                )
+        last_modified_at = entries[-1][MODIFIED_AT_KEY] if entries else None
+        return entries, last_modified_at, more
+
+    def update_configs(self, data: dict, execution_context: dict):
+        """
+        Method to replace the config of an entry.
+
+        Args:
+            data: contains the service ID, the config name and the new config
+            execution_context: may contain the version the entry is expected to be at
+        Returns:
+            The updated entry, None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
+        """
+        expected_version = (execution_context or {}).get(EXPECTED_VERSION_KEY)
+        with self._transaction(write=True):
+            entry = self._current_entry(data, expected_version)
+            if entry is None:
+                return None
+            return self._rewrite(entry, data[CONFIG_KEY])
+
+    def patch_configs(self, data: dict, execution_context: dict):
+        """
+        Method to apply a JSON Merge Patch or a JSON Patch to the config of an
+        entry, which is read and written back in the same transaction.
+
+        Args:
+            data: contains the service ID, the config name, the patch and its type
+            execution_context: may contain the version the entry is expected to be at
+        Returns:
+            The updated entry, None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
+            PatchConflictError: if the patch can't be applied to the config
+        """
+        expected_version = (execution_context or {}).get(EXPECTED_VERSION_KEY)
+        with self._transaction(write=True):
+            entry = self._current_entry(data, expected_version)
+            if entry is None:
+                return None
+            config = config_patch.apply_patch(
+                entry.get(CONFIG_KEY) or {}, data[PATCH_KEY], data[PATCH_TYPE_KEY]
+            )
+            return self._rewrite(entry, config)
+
+    def delete_configs(self, data: dict, execution_context: dict):
+        """
+        Method to delete a config, leaving a tombstone in place of its entry.
+
+        Args:
+            data: contains the service ID and the config name
+            execution_context: any additional info needed for completing the operation.
+        Returns:
+            The tombstone, None if there is no such config
+        """
+        now = int(time.time())
+        with self._transaction(write=True):
+            entry = self._current_entry(data, None)
+            if entry is None:
+                return None
+            entry.pop(CONFIG_KEY, None)
+            entry[DELETED_KEY] = True
+            entry[EXPIRES_AT_KEY] = now + settings.tombstone_retention_seconds
+            _stamp(entry, now)
+            self._write_entry(entry)
+            self._bump_head(entry[SERVICE_ID_KEY])
+            self._purge_tombstones(now)
+        logger.info(
+            "Done deleting the config",
+            service_id=data[SERVICE_ID_KEY],
+            config_name=data[CONFIG_NAME_KEY],
+        )
+        return entry
+
+    def _put_config(self, service_id: str, config_name: str, config) -> None:
+        current = self._read_entry(service_id, config_name) or {}
+        now = int(time.time())
+        entry = {
+            SERVICE_ID_KEY: service_id,
+            CONFIG_NAME_KEY: config_name,
+            CONFIG_KEY: config,
+            CREATED_AT_KEY: current.get(CREATED_AT_KEY, str(now)),
+            VERSION_KEY: current.get(VERSION_KEY, 0),
+        }
+        _stamp(entry, now)
+        self._write_entry(entry)
+
+    def _current_entry(self, data: dict, expected_version: Optional[int]):
+        """
+        Reads the entry a write applies to
+        Returns:
+            The entry, None if there is no such entry
+        Raises:
+            ConfigVersionConflictError: if the entry is not at the expected version
+        """
+        entry = self._read_entry(data[SERVICE_ID_KEY], data[CONFIG_NAME_KEY])
+        if entry is None or DELETED_KEY in entry:
+            logger.info(
+                "No config entry to write.",
+                service_id=data[SERVICE_ID_KEY],
+                config_name=data[CONFIG_NAME_KEY],
+            )
+            return None
+        current_version = int(entry.get(VERSION_KEY, 0))
+        if expected_version is not None and current_version != expected_version:
+            raise ConfigVersionConflictError(
+                412,
+                f"The config is at version {current_version}, not {expected_version}",
+                current_version=current_version,
+            )
+        return entry
+
+    def _rewrite(self, entry: dict, config) -> dict:
+        entry[CONFIG_KEY] = config
+        _stamp(entry, int(time.time()))
+        self._write_entry(entry)
+        self._bump_head(entry[SERVICE_ID_KEY])
+        return entry
+
+
+def _stamp(entry: dict, now: int) -> None:
+    # Every write moves the version and the modification time of the entry
+    entry[UPDATED_AT_KEY] = str(now)
+    entry[VERSION_KEY] = int(entry.get(VERSION_KEY, 0)) + 1
+    entry.update(modification_attributes())
+
+
+def _projected(entry: dict, projection: Optional[list]) -> dict:
+    if projection is None:
+        return entry
+    return project_item(entry, projection)
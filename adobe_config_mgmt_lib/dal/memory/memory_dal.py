@@ -0,0 +1,101 @@
+import bisect
+import copy
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from adobe_config_mgmt_lib.dal.local_db_handler import LocalDBHandler
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_NAME_KEY,
+    DELETED_KEY,
+    EXPIRES_AT_KEY,
+    MODIFIED_AT_KEY,
+    SERVICE_ID_KEY,
+)
+
+"""
+Data access layer keeping the configs in the process.
+
+Nothing is persisted: the configs only live as long as the process, which
+makes it the backend of the tests, of the benchmarks of the upper layers,
+free of any I/O, and of the single replica deployments which are handed
+their configs on start. The entries are copied in and out, as they would
+be serialized by any other backend, so the callers never share them.
+"""
+
+
+class InMemoryDAL(LocalDBHandler):
+    def __init__(self):
+        # Reentrant, the operations call one another
+        self._lock = threading.RLock()
+        self._entries: Dict[Tuple[str, str], dict] = {}
+        # The config names of every service, sorted, for the pages
+        self._names: Dict[str, List[str]] = {}
+        self._heads: Dict[str, int] = {}
+
+    def _transaction(self, write: bool = False):
+        return self._lock
+
+    def _read_entry(self, service_id: str, config_name: str) -> Optional[dict]:
+        entry = self._entries.get((service_id, config_name))
+        return copy.deepcopy(entry)
+
+    def _write_entry(self, entry: dict) -> None:
+        key = (entry[SERVICE_ID_KEY], entry[CONFIG_NAME_KEY])
+        if key not in self._entries:
+            bisect.insort(self._names.setdefault(key[0], []), key[1])
+        self._entries[key] = copy.deepcopy(entry)
+
+    def _read_service_entries(
+        self, service_id: str, after: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[dict]:
+        names = self._names.get(service_id, [])
+        start = 0 if after is None else bisect.bisect_right(names, after)
+        entries = []
+        for config_name in names[start:]:
+            entry = self._entries[(service_id, config_name)]
+            if DELETED_KEY in entry:
+                continue
+            entries.append(copy.deepcopy(entry))
+            if limit and len(entries) >= limit:
+                break
+        return entries
+
+    def _read_changed_entries(
+        self,
+        service_id: Optional[str],
+        since: int,
+        limit: Optional[int],
+        until: Optional[int] = None,
+    ) -> List[dict]:
+        # A scan, the changes are read once per sync of a client
+        changed = sorted(
+            (
+                entry
+                for entry in self._entries.values()
+                if entry[MODIFIED_AT_KEY] > since
+                and (until is None or entry[MODIFIED_AT_KEY] <= until)
+                and (service_id is None or entry[SERVICE_ID_KEY] == service_id)
+            ),
+            key=lambda entry: entry[MODIFIED_AT_KEY],
+        )
+        return copy.deepcopy(changed[:limit])
+
+    def _purge_tombstones(self, now: int) -> None:
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if entry.get(EXPIRES_AT_KEY, now + 1) <= now
+        ]
+        for service_id, config_name in expired:
+            del self._entries[(service_id, config_name)]
+            self._names[service_id].remove(config_name)
+
+    def _bump_head(self, service_id: str, count: int = 1) -> None:
+        self._heads[service_id] = self._heads.get(service_id, 0) + count
+
+    def _read_heads(self, service_ids: List[str]) -> Dict[str, int]:
+        return {
+            service_id: self._heads[service_id]
+            for service_id in service_ids
+            if service_id in self._heads
+        }
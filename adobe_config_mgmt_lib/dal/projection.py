@@ -0,0 +1,88 @@
+from typing import List, Optional
+
+from adobe_config_mgmt_lib.resources.constants import (
+    CONFIG_KEY,
+    CONFIG_NAME_KEY,
+    CREATED_AT_KEY,
+    SERVICE_ID_KEY,
+    UPDATED_AT_KEY,
+    VERSION_KEY,
+)
+
+"""
+Partial reads of the configs.
+
+A projection is a list of paths within the config, each path being the
+list of the nested keys to follow. Projected entries keep all their other
+attributes and only the requested sub-documents of their config.
+"""
+
+FIELD_SEPARATOR = ","
+PATH_SEPARATOR = "."
+
+# Attributes returned along with the projected config
+ITEM_ATTRIBUTES = (
+    SERVICE_ID_KEY,
+    CONFIG_NAME_KEY,
+    CREATED_AT_KEY,
+    UPDATED_AT_KEY,
+    VERSION_KEY,
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[List[str]]]:
+    """
+    Method to read a projection from a list of dotted paths
+    :param fields: comma separated paths within the config, e.g. "db.pool,features"
+    :return: the projection, None to read the whole config
+    :raises ValueError: if a path is empty or has an empty key
+    """
+    if fields is None:
+        return None
+    paths = []
+    for field in fields.split(FIELD_SEPARATOR):
+        path = field.strip().split(PATH_SEPARATOR)
+        if not all(path):
+            raise ValueError(f"Invalid field: {field}")
+        paths.append(path)
+    return normalize_paths(paths)
+
+
+def normalize_paths(paths: List[List[str]]) -> List[List[str]]:
+    """
+    Method to drop the paths already covered by another path, as the
+    database rejects overlapping paths
+    :param paths: the paths of the projection
+    :return: the paths which are not within another path
+    """
+    result = []
+    for path in sorted(paths, key=len):
+        if not any(path[: len(other)] == other for other in result):
+            result.append(path)
+    return result
+
+
+def project_item(item: dict, paths: Optional[List[List[str]]]) -> dict:
+    """
+    Method to apply a projection to an entry read in full
+    :param item: the entry, left untouched
+    :param paths: the projection, None to keep the whole config
+    :return: the projected entry
+    """
+    if paths is None:
+        return item
+    projected = {key: item[key] for key in ITEM_ATTRIBUTES if key in item}
+    config = {}
+    for path in paths:
+        value = item.get(CONFIG_KEY)
+        for key in path:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = config
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+    projected[CONFIG_KEY] = config
+    return projected
@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.dal.dynamodb.changes import change_bucket
+from adobe_config_mgmt_lib.dal.exceptions import INTERNAL_SERVER_ERROR_MESSAGE
+from adobe_config_mgmt_lib.dal.local_db_handler import LocalDBHandler
+from adobe_config_mgmt_lib.resources.constants import (
+    CHANGE_BUCKET_KEY,
+    CONFIG_KEY,
+    CONFIG_NAME_KEY,
+    CREATED_AT_KEY,
+    DELETED_KEY,
+    EXPIRES_AT_KEY,
+    MODIFIED_AT_KEY,
+    SERVICE_ID_KEY,
+    UPDATED_AT_KEY,
+    VERSION_KEY,
+)
+
+"""
+Data access layer storing the configs in a SQLite database.
+
+The database is run in WAL mode, so reads never wait for the writes and a
+write only waits for the other writes. Every thread has a connection of
+its own. The configs are stored as JSON text, keyed by service ID and config
+name, and indexed on their modification time for the delta sync.
+"""
+
+logger = get_logger()
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS configs (
+        service_id TEXT NOT NULL,
+        config_name TEXT NOT NULL,
+        config TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL,
+        deleted INTEGER NOT NULL DEFAULT 0,
+        expires_at INTEGER,
+        PRIMARY KEY (service_id, config_name)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS configs_by_service_changes "
+    "ON configs (service_id, modified_at)",
+    "CREATE INDEX IF NOT EXISTS configs_by_changes ON configs (modified_at)",
+    "CREATE INDEX IF NOT EXISTS tombstones_by_expiry ON configs (expires_at) "
+    "WHERE expires_at IS NOT NULL",
+    """
+    CREATE TABLE IF NOT EXISTS heads (
+        service_id TEXT PRIMARY KEY,
+        head_version INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+)
+
+COLUMNS = (
+    "service_id, config_name, config, created_at, updated_at, version, "
+    "modified_at, deleted, expires_at"
+)
+
+# Waits for the lock of another writer, in seconds
+BUSY_TIMEOUT_SECONDS = 30.0
+
+
+class SqliteDAL(LocalDBHandler):
+    def __init__(self, path: str):
+        """
+        Args:
+            path: the database file, created along with its directory if missing
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in SCHEMA:
+            connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # The transactions are managed by `_transaction`
+            connection = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None
+            )
+            # Durable enough in WAL mode, a crash only loses the last writes
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self, write: bool = False):
+        connection = self._connection()
+        if connection.in_transaction:
+            # Within the transaction of the calling operation
+            yield connection
+            return
+        try:
+            # Writers take the lock upfront, rather than failing to upgrade it
+            connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            yield connection
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.exception("Error while accessing the sqlite database", error=str(e))
+            self._rollback(connection)
+            raise RuntimeError(500, INTERNAL_SERVER_ERROR_MESSAGE)
+        except BaseException:
+            self._rollback(connection)
+            raise
+
+    @staticmethod
+    def _rollback(connection: sqlite3.Connection) -> None:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+
+    def _read_entry(self, service_id: str, config_name: str) -> Optional[dict]:
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT {COLUMNS} FROM configs "
+                "WHERE service_id = ? AND config_name = ?",
+                (service_id, config_name),
+            )
+            .fetchone()
+        )
+        return _entry(row)
+
+    def _write_entry(self, entry: dict) -> None:
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO configs ({COLUMNS}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry[SERVICE_ID_KEY],
+                entry[CONFIG_NAME_KEY],
+                json.dumps(entry[CONFIG_KEY]) if CONFIG_KEY in entry else None,
+                entry[CREATED_AT_KEY],
+                entry[UPDATED_AT_KEY],
+                entry[VERSION_KEY],
+                entry[MODIFIED_AT_KEY],
+                int(DELETED_KEY in entry),
+                entry.get(EXPIRES_AT_KEY),
+            ),
+        )
+
+    def _read_service_entries(
+        self, service_id: str, after: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[dict]:
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS} FROM configs "
+            "WHERE service_id = ? AND config_name > ? AND deleted = 0 "
+            "ORDER BY config_name LIMIT ?",
+            (service_id, after or "", limit or -1),
+        )
+        return [_entry(row) for row in rows]
+
+    def _read_changed_entries(
+        self,
+        service_id: Optional[str],
+        since: int,
+        limit: Optional[int],
+        until: Optional[int] = None,
+    ) -> List[dict]:
+        conditions, parameters = ["modified_at > ?"], [since]
+        if until is not None:
+            conditions.append("modified_at <= ?")
+            parameters.append(until)
+        if service_id is not None:
+            conditions.append("service_id = ?")
+            parameters.append(service_id)
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS} FROM configs WHERE {' AND '.join(conditions)} "
+            "ORDER BY modified_at LIMIT ?",
+            (*parameters, limit or -1),
+        )
+        return [_entry(row) for row in rows]
+
+    def _purge_tombstones(self, now: int) -> None:
+        self._connection().execute("DELETE FROM configs WHERE expires_at <= ?", (now,))
+
+    def _bump_head(self, service_id: str, count: int = 1) -> None:
+        self._connection().execute(
+            "INSERT INTO heads (service_id, head_version) VALUES (?, ?) "
+            "ON CONFLICT (service_id) DO UPDATE "
+            "SET head_version = head_version + excluded.head_version",
+            (service_id, count),
+        )
+
+    def _read_heads(self, service_ids: List[str]) -> Dict[str, int]:
+        heads = {}
+        connection = self._connection()
+        for service_id in service_ids:
+            row = connection.execute(
+                "SELECT head_version FROM heads WHERE service_id = ?", (service_id,)
+            ).fetchone()
+            if row is not None:
+                heads[service_id] = row[0]
+        return heads
+
+
+def _entry(row: Optional[tuple]) -> Optional[dict]:
+    """
+    Builds an entry, as returned by the other backends, from its row
+    """
+    if row is None:
+        return None
+    (
+        service_id,
+        config_name,
+        config,
+        created_at,
+        updated_at,
+        version,
+        modified_at,
+        deleted,
+        expires_at,
+    ) = row
+    entry = {
+        SERVICE_ID_KEY: service_id,
+        CONFIG_NAME_KEY: config_name,
+        CREATED_AT_KEY: created_at,
+        UPDATED_AT_KEY: updated_at,
+        VERSION_KEY: version,
+        MODIFIED_AT_KEY: modified_at,
+        CHANGE_BUCKET_KEY: change_bucket(modified_at),
+    }
+    if deleted:
+        entry[DELETED_KEY] = True
+        entry[EXPIRES_AT_KEY] = expires_at
+    else:
+        entry[CONFIG_KEY] = json.loads(config)
+    return entry
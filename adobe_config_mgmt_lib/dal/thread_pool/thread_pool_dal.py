@@ -0,0 +1,186 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from structlog import get_logger  # type: ignore
+
+from adobe_config_mgmt_lib.dal.abstract_db_handler import (
+    AbstractDBHandler,
+    AsyncAbstractDBHandler,
+)
+
+"""
+Non-blocking data access layer.
+
+Runs the blocking calls of a synchronous DAL on a bounded thread pool,
+so the event loop stays free while the DynamoDB requests are in flight.
+The pool size bounds the number of concurrent requests per worker.
+"""
+
+logger = get_logger()
+
+
+class ThreadPoolDAL(AsyncAbstractDBHandler):
+    def __init__(self, db_handler: AbstractDBHandler, max_workers: int):
+        self.db_handler = db_handler
+        self.max_workers = max_workers
+        self.executor = None
+
+    async def add_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.add_configs`
+
+        Args:
+            data: contains all the required fields/attributes for inserting
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.add_configs, data=data, execution_context=execution_context
+        )
+
+    async def get_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.get_configs`
+
+        Args:
+            data: contains the service ID and optionally the config name
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.get_configs, data=data, execution_context=execution_context
+        )
+
+    async def batch_add_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.batch_add_configs`
+
+        Args:
+            data: contains the items to write
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.batch_add_configs,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def batch_get_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.batch_get_configs`
+
+        Args:
+            data: contains the (service ID, config name) pairs to fetch
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.batch_get_configs,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def get_config_page(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.get_config_page`
+
+        Args:
+            data: contains the service ID
+            execution_context: the page size and the key to resume after, if any
+        """
+        return await self._run(
+            self.db_handler.get_config_page,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def get_service_heads(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.get_service_heads`
+
+        Args:
+            data: contains the service IDs
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.get_service_heads,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def get_config_changes(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.get_config_changes`
+
+        Args:
+            data: may contain the service ID
+            execution_context: the modification time and the max number of changes
+        """
+        return await self._run(
+            self.db_handler.get_config_changes,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def update_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.update_configs`
+
+        Args:
+            data: contains the keys of the config and the new config
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.update_configs,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def patch_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.patch_configs`
+
+        Args:
+            data: contains the keys of the config, the patch and its type
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.patch_configs,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    async def delete_configs(self, data: dict, execution_context: dict):
+        """
+        Non-blocking variant of `AbstractDBHandler.delete_configs`
+
+        Args:
+            data: contains the keys of the config
+            execution_context: any additional info needed for completing the operation.
+        """
+        return await self._run(
+            self.db_handler.delete_configs,
+            data=data,
+            execution_context=execution_context,
+        )
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker threads once the queued calls are done.
+        A new pool is started on the next call.
+        """
+        if self.executor is not None:
+            logger.info(
+                "Shutting down the DAL thread pool.", max_workers=self.max_workers
+            )
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def _run(self, method: Callable, **kwargs):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="dal"
+            )
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(method, **kwargs)
+        )
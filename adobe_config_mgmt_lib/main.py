@@ -1,15 +1,24 @@
+import asyncio
+from typing import Optional
+
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from structlog import get_logger
 
 from adobe_config_mgmt_lib.apis.internal_apis import app as config_app
 from adobe_config_mgmt_lib.core.config import settings
+from adobe_config_mgmt_lib.core.cron import config_change_listener, stream_consumer
+from adobe_config_mgmt_lib.core.service_config import service_config_mgmt
+from adobe_config_mgmt_lib.core.service_config.response_cache import response_cache
+from adobe_config_mgmt_lib.dal import async_dal_instance, config_cache
+from adobe_config_mgmt_lib.dal.dynamodb import table_bootstrap
+from adobe_config_mgmt_lib.dal.dynamodb.capacity import capacity_meter
+from adobe_config_mgmt_lib.dal.dynamodb.clients import pool_meter
+from adobe_config_mgmt_lib.resources.constants import DYNAMODB_BACKEND
 
 logger = get_logger(__name__)
 
-complete_description = (
-    " This Document outlines the API contracts"
-)
+complete_description = " This Document outlines the API contracts"
 
 app = FastAPI(title=settings.APP_NAME, description=complete_description)
 app.include_router(config_app, prefix="/adobe/v1")
@@ -25,10 +34,93 @@ Reasons:
 """
 
 
+_bootstrap_task: Optional[asyncio.Task] = None
+_stale_saver_task: Optional[asyncio.Task] = None
+
+
+async def _bootstrap_table():
+    """
+    Checks or creates the config table in the background, until it succeeds,
+    so that the service starts right away and turns ready once it did
+    """
+    loop = asyncio.get_event_loop()
+    while not await loop.run_in_executor(None, table_bootstrap.ensure):
+        await asyncio.sleep(settings.dynamodb_bootstrap_retry_seconds)
+
+
+async def _save_stale_results():
+    """
+    Saves the last known results of the reads every now and then, for the
+    next run to start warm even if this one doesn't stop cleanly
+    """
+    loop = asyncio.get_event_loop()
+    while True:
+        await asyncio.sleep(settings.stale_snapshot_interval_seconds)
+        try:
+            await loop.run_in_executor(None, service_config_mgmt.save_stale_results)
+        except OSError as e:
+            logger.warning("Could not save the last known results.", error=str(e))
+
+
+@app.on_event("startup")
+def startup():
+    global _bootstrap_task, _stale_saver_task
+    # Before the table is ready, the saved results are all there is to serve
+    service_config_mgmt.warm_start()
+    if settings.stale_snapshot_path:
+        _stale_saver_task = asyncio.ensure_future(_save_stale_results())
+    if settings.dal_backend == DYNAMODB_BACKEND:
+        _bootstrap_task = asyncio.ensure_future(_bootstrap_table())
+    config_change_listener.start_watching()
+    stream_consumer.start_consuming()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if _bootstrap_task is not None:
+        _bootstrap_task.cancel()
+    if _stale_saver_task is not None:
+        _stale_saver_task.cancel()
+        try:
+            service_config_mgmt.save_stale_results()
+        except OSError as e:
+            logger.warning("Could not save the last known results.", error=str(e))
+    await config_change_listener.stop_watching()
+    await stream_consumer.stop_consuming()
+    async_dal_instance.shutdown()
+
+
 @app.get("/healthz")
 def healthz():
     """
-    To check the readiness of the service
+    To check the readiness of the service, ready once the config table is usable
     :return:
     """
+    # The other backends are ready as soon as they are created
+    if settings.dal_backend == DYNAMODB_BACKEND and not table_bootstrap.ready:
+        return JSONResponse(status_code=503, content={"ready": False})
     return JSONResponse(status_code=200, content={"ready": True})
+
+
+@app.get("/stats")
+def stats():
+    """
+    To expose the internal counters of the service
+    :return:
+    """
+    return JSONResponse(
+        status_code=200,
+        content={
+            "dynamodb_table": table_bootstrap.stats(),
+            "cache": config_cache.stats(),
+            "response_cache": response_cache.stats(),
+            "watches": service_config_mgmt.watch_hub.stats(),
+            "events": service_config_mgmt.event_bus.stats(),
+            "single_flight": service_config_mgmt.read_flight.stats(),
+            "stale_results": service_config_mgmt.stale_store.stats(),
+            "change_watches": config_change_listener.watch_scheduler.stats(),
+            "stream": stream_consumer.stream_consumer.stats(),
+            "dynamodb_consumed_capacity": capacity_meter.stats(),
+            "dynamodb_connections": pool_meter.stats(),
+        },
+    )
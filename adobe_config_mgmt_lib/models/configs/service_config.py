@@ -1,6 +1,16 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, constr
+
+from adobe_config_mgmt_lib.resources.constants import SERVICE_ID_REGEX
+
+# Max number of configs which can be fetched by a single batch request
+BATCH_GET_MAX_REQUEST_KEYS = 1000
+
+# The service IDs can't hold the separator of the internal partitions
+ServiceId = constr(regex=SERVICE_ID_REGEX)
 
 
 class ServiceConfigPayload(BaseModel):
@@ -13,3 +23,66 @@ class ServiceConfigResponse(BaseModel):
     created_at: int
     config_name: str
     config: dict
+    version: int = 0
+
+
+class ServiceConfigChange(ServiceConfigResponse):
+    # Empty for a deleted config
+    config: dict = {}
+    deleted: bool = False
+    modified_at: int
+
+
+class ConfigChangesResponse(BaseModel):
+    changes: List[ServiceConfigChange]
+    # The sync version to get the next changes after
+    sync_version: int
+    # Whether there are more changes to get right away
+    more: bool = False
+
+
+class ServiceConfigKey(BaseModel):
+    service_id: ServiceId
+    config_name: str
+
+
+class BatchGetPayload(BaseModel):
+    keys: List[ServiceConfigKey] = Field(
+        ..., min_items=1, max_items=BATCH_GET_MAX_REQUEST_KEYS
+    )
+
+
+class BatchGetResponse(BaseModel):
+    configs: List[ServiceConfigResponse]
+    missing: List[ServiceConfigKey]
+
+
+class ServiceHeadsPayload(BaseModel):
+    service_ids: List[ServiceId] = Field(
+        ..., min_items=1, max_items=BATCH_GET_MAX_REQUEST_KEYS
+    )
+
+
+class ServiceHeadsResponse(BaseModel):
+    heads: Dict[str, int]
+
+
+class ServiceConfigImportItem(ServiceConfigPayload):
+    service_id: ServiceId
+    config_name: str
+
+
+class ImportItemResult(BaseModel):
+    index: int
+    service_id: Optional[str] = None
+    config_name: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+
+
+class ImportResponse(BaseModel):
+    written: int = 0
+    failed: int = 0
+    invalid: int = 0
+    superseded: int = 0
+    results: List[ImportItemResult] = []
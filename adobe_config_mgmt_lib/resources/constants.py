@@ -4,3 +4,58 @@ CONFIG_NAME_KEY = "config_name"
 CONFIG_KEY = "config"
 CREATED_AT_KEY = "created_at"
 UPDATED_AT_KEY = "updated_at"
+VERSION_KEY = "version"
+# Compressed configs are stored under these keys instead of CONFIG_KEY
+CONFIG_BLOB_KEY = "config_blob"
+CONFIG_CODEC_KEY = "config_codec"
+# Configs too large for a single entry are offloaded, the entry only keeps
+# the manifest of the offloaded config, and the one it replaced
+CONFIG_MANIFEST_KEY = "config_manifest"
+PREVIOUS_MANIFEST_KEY = "previous_config_manifest"
+CHUNK_DATA_KEY = "chunk_data"
+# Incremented by every write to the configs of a service
+HEAD_VERSION_KEY = "head_version"
+# The modification time of an entry in microseconds, and its day, which the
+# delta sync indexes are sorted and partitioned on
+MODIFIED_AT_KEY = "modified_at"
+CHANGE_BUCKET_KEY = "change_bucket"
+# Deleted configs are kept as tombstones until they expire
+DELETED_KEY = "deleted"
+EXPIRES_AT_KEY = "expires_at"
+
+# The internal partitions of a service, its head and the chunks of its
+# offloaded configs, are keyed by its ID followed by this separator, which
+# the service IDs can't contain
+RESERVED_KEY_SEPARATOR = "#"
+SERVICE_ID_REGEX = f"^[^{RESERVED_KEY_SEPARATOR}]+$"
+
+# Batch operation keys
+CONFIG_KEYS_KEY = "keys"
+CONFIG_ITEMS_KEY = "items"
+SERVICE_IDS_KEY = "service_ids"
+
+# Patch keys
+PATCH_KEY = "patch"
+PATCH_TYPE_KEY = "patch_type"
+
+# Execution context keys
+LIMIT_KEY = "limit"
+EXCLUSIVE_START_KEY = "exclusive_start_key"
+EXPECTED_VERSION_KEY = "expected_version"
+PROJECTION_KEY = "projection"
+CONSISTENT_READ_KEY = "consistent_read"
+SINCE_KEY = "since"
+SYNC_VERSION_KEY = "sync_version"
+
+# Read consistency modes
+STRONG_CONSISTENCY = "strong"
+EVENTUAL_CONSISTENCY = "eventual"
+READ_CONSISTENCY_MODES = (STRONG_CONSISTENCY, EVENTUAL_CONSISTENCY)
+
+# Data access layer backends
+DYNAMODB_BACKEND = "dynamodb"
+MEMORY_BACKEND = "memory"
+SQLITE_BACKEND = "sqlite"
+
+# Response headers
+SYNC_VERSION_HEADER = "X-Sync-Version"
@@ -0,0 +1,5 @@
+#!/bin/bash -e
+
+# Compares the config storage codecs on typical payloads, or on the given JSON files
+export PYTHONPATH=$PYTHONPATH:$(pwd)
+python scripts/benchmark_codecs.py "$@"
@@ -0,0 +1,5 @@
+#!/bin/bash -e
+
+# Measures the cold start of the service, failing past the given budget
+export PYTHONPATH=$PYTHONPATH:$(pwd)
+python scripts/benchmark_startup.py "$@"
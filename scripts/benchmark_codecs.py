@@ -0,0 +1,88 @@
+"""
+Benchmark of the config storage codecs.
+
+Reports, for each codec and payload, the stored size, the compression
+ratio, the encode/decode times and the DynamoDB capacity units a write and
+a strongly consistent read of the config would consume.
+
+Usage: python scripts/benchmark_codecs.py [config.json ...]
+Without arguments, runs on generated payloads shaped like our typical configs.
+"""
+import json
+import math
+import sys
+import timeit
+
+from adobe_config_mgmt_lib.dal.dynamodb.codec import (
+    available_codecs,
+    compress,
+    decode_config,
+    serialize_config,
+)
+
+WRITE_UNIT_BYTES = 1024
+READ_UNIT_BYTES = 4096
+ROUNDS = 200
+
+
+def typical_payloads() -> dict:
+    feature_flags = {
+        f"feature_{i}": {"enabled": i % 3 == 0, "rollout": i % 100, "owners": ["team"]}
+        for i in range(200)
+    }
+    routing = {
+        "routes": [
+            {
+                "path": f"/api/v1/resource_{i}",
+                "upstream": f"http://service-{i % 20}.internal:8080",
+                "timeout_ms": 1500,
+                "retries": 2,
+            }
+            for i in range(500)
+        ]
+    }
+    tenants = {
+        f"tenant-{i:05d}": {"plan": "enterprise" if i % 7 else "free", "quota": i * 10}
+        for i in range(2000)
+    }
+    return {
+        "small": {"enabled": True, "retries": 3},
+        "feature_flags": feature_flags,
+        "routing": routing,
+        "tenants": tenants,
+    }
+
+
+def benchmark(name: str, config) -> None:
+    data = serialize_config(config)
+    print(
+        f"{name}: {len(data)} bytes, {math.ceil(len(data) / WRITE_UNIT_BYTES)} WCU, "
+        f"{math.ceil(len(data) / READ_UNIT_BYTES)} RCU uncompressed"
+    )
+    for codec in available_codecs():
+        blob = compress(data, codec)
+        encode_us = timeit.timeit(lambda: compress(data, codec), number=ROUNDS)
+        decode_us = timeit.timeit(lambda: decode_config(blob, codec), number=ROUNDS)
+        print(
+            f"  {codec:5} {len(blob):>9} bytes  ratio {len(data) / len(blob):5.1f}x  "
+            f"encode {encode_us / ROUNDS * 1e6:8.1f} us  "
+            f"decode {decode_us / ROUNDS * 1e6:8.1f} us  "
+            f"{math.ceil(len(blob) / WRITE_UNIT_BYTES)} WCU  "
+            f"{math.ceil(len(blob) / READ_UNIT_BYTES)} RCU"
+        )
+
+
+def main(paths: list) -> None:
+    if paths:
+        payloads = {}
+        for path in paths:
+            with open(path) as file:
+                payloads[path] = json.load(file)
+    else:
+        payloads = typical_payloads()
+    for name, config in payloads.items():
+        benchmark(name, config)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+"""
+Benchmark of the cold start of the service.
+
+Reports, over fresh interpreters, the time to import the service, to run
+its startup handlers, and to turn ready, the config table being checked or
+created against the configured dynamodb endpoint. The import and the
+startup should make no call to dynamodb, and stay well under a second.
+
+Usage: python scripts/benchmark_startup.py [--rounds N] [--max-seconds S]
+With --max-seconds, exits with an error when the median import and startup
+time is above it, to guard against regressions.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+COLD_START = """
+import time
+started = time.perf_counter()
+import adobe_config_mgmt_lib.main as main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from adobe_config_mgmt_lib.dal.dynamodb import table_bootstrap
+with TestClient(main.app):
+    started_up = time.perf_counter()
+    table_bootstrap.ensure()
+    ready = time.perf_counter()
+print(imported - started, started_up - imported, ready - started_up)
+"""
+
+
+def cold_start() -> list:
+    output = subprocess.run(
+        [sys.executable, "-c", COLD_START],
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+    ).stdout
+    return [float(seconds) for seconds in output.split()[-3:]]
+
+
+def main(rounds: int, max_seconds: float) -> int:
+    timings = [cold_start() for _ in range(rounds)]
+    imports, startups, readies = (statistics.median(times) for times in zip(*timings))
+    print(
+        f"import {imports * 1e3:8.1f} ms  startup {startups * 1e3:8.1f} ms  "
+        f"ready {readies * 1e3:8.1f} ms  (median of {rounds})"
+    )
+    if max_seconds is not None and imports + startups > max_seconds:
+        print(f"Import and startup took over {max_seconds} s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    arguments = parser.parse_args()
+    sys.exit(main(arguments.rounds, arguments.max_seconds))
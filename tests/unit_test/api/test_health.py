@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
-from starlette.status import HTTP_200_OK
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from adobe_config_mgmt_lib.dal.dynamodb import table_bootstrap
 
 
 class TestServiceHealth:
@@ -12,3 +14,18 @@ class TestServiceHealth:
         response = client.get(f"/healthz", allow_redirects=False,)
 
         assert response.status_code == HTTP_200_OK
+
+    def test_health_ep_not_ready_before_the_table_is(self, client: TestClient):
+        """
+        The service is not ready until its config table is usable
+        :param client:
+        :return:
+        """
+        table_bootstrap.ready = False
+        try:
+            response = client.get("/healthz", allow_redirects=False,)
+        finally:
+            table_bootstrap.ready = True
+
+        assert response.status_code == HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json() == {"ready": False}
@@ -1,9 +1,15 @@
+import asyncio
+import json
 import uuid
 
+import pytest
 from fastapi.testclient import TestClient
 from mock import patch
 from structlog import get_logger
 
+from adobe_config_mgmt_lib.core.service_config import service_config_mgmt
+from adobe_config_mgmt_lib.core.service_config.stale_store import StaleStore
+from adobe_config_mgmt_lib.dal import async_dal_instance, config_cache
 from tests.unit_test.api.validations import get_expected_response
 
 logger = get_logger()
@@ -94,3 +100,459 @@ def test_get_service_config(
 
     assert response.status_code == get_expected_response("get_configs").status_code
     assert response.json() == get_expected_response("get_configs").response
+
+
+def test_get_service_configs_paginated(client: TestClient):
+    service_id = str(uuid.uuid4())
+    for i in range(5):
+        client.post(
+            f"{url_prefix}/{service_id}/configs/config-{i}", json={"config": {"i": i}},
+        )
+    api_endpoint = f"{url_prefix}/{service_id}/configs"
+
+    first_page = client.get(api_endpoint, params={"limit": 3})
+    second_page = client.get(
+        api_endpoint,
+        params={"limit": 3, "cursor": first_page.headers["X-Next-Cursor"]},
+    )
+
+    assert first_page.status_code == 200
+    assert [c["config_name"] for c in first_page.json()] == [
+        "config-0",
+        "config-1",
+        "config-2",
+    ]
+    assert [c["config_name"] for c in second_page.json()] == ["config-3", "config-4"]
+    assert "X-Next-Cursor" not in second_page.headers
+
+
+def test_get_service_configs_ndjson_stream(client: TestClient):
+    service_id = str(uuid.uuid4())
+    for i in range(3):
+        client.post(
+            f"{url_prefix}/{service_id}/configs/config-{i}", json={"config": {"i": i}},
+        )
+
+    response = client.get(
+        f"{url_prefix}/{service_id}/configs",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    missing = client.get(
+        f"{url_prefix}/{uuid.uuid4()}/configs",
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [line["config_name"] for line in lines] == [
+        "config-0",
+        "config-1",
+        "config-2",
+    ]
+    assert missing.status_code == 404
+
+
+def test_batch_get_service_configs(client: TestClient):
+    service_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    for service_id in service_ids:
+        client.post(f"{url_prefix}/{service_id}/configs/emails", json={"config": {}})
+    keys = [
+        {"service_id": service_ids[1], "config_name": "emails"},
+        {"service_id": service_ids[0], "config_name": "emails"},
+        {"service_id": service_ids[0], "config_name": "missing"},
+    ]
+
+    response = client.post(f"{url_prefix}/configs/batch-get", json={"keys": keys})
+
+    assert response.status_code == 200
+    assert [
+        (c["service_id"], c["config_name"]) for c in response.json()["configs"]
+    ] == [(service_ids[1], "emails"), (service_ids[0], "emails")]
+    assert response.json()["missing"] == [keys[2]]
+
+
+def test_import_service_configs_ndjson(client: TestClient):
+    service_id = str(uuid.uuid4())
+    lines = [
+        json.dumps({"service_id": service_id, "config_name": f"c-{i}", "config": {}})
+        for i in range(60)
+    ]
+    lines.insert(10, "{not json")
+    lines.append(json.dumps({"service_id": service_id, "config_name": "c-0"}))
+
+    response = client.post(
+        f"{url_prefix}/configs/import",
+        data="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    configs = client.get(f"{url_prefix}/{service_id}/configs").json()
+
+    report = response.json()
+    assert response.status_code == 200
+    assert (report["written"], report["invalid"], report["superseded"]) == (60, 1, 1)
+    assert report["results"][10]["status"] == "invalid"
+    assert len(configs) == 60
+
+
+def test_import_service_configs_json_array(client: TestClient):
+    service_id = str(uuid.uuid4())
+    items = [
+        {"service_id": service_id, "config_name": "emails", "config": {"a": 1}},
+        {"service_id": service_id},
+    ]
+
+    response = client.post(f"{url_prefix}/configs/import", json=items)
+    not_a_list = client.post(f"{url_prefix}/configs/import", json=items[0])
+
+    assert [r["status"] for r in response.json()["results"]] == ["written", "invalid"]
+    assert not_a_list.status_code == 400
+
+
+def test_service_ids_of_internal_partitions_are_rejected(client: TestClient):
+    service_id = str(uuid.uuid4())
+    client.post(f"{url_prefix}/{service_id}/configs/emails", json={"config": {}})
+    head_service_id = f"{service_id}%23head"
+
+    write = client.post(
+        f"{url_prefix}/{head_service_id}/configs/head", json={"config": {}}
+    )
+    read_all = client.get(f"{url_prefix}/{head_service_id}/configs")
+    heads = client.post(
+        f"{url_prefix}/configs/heads", json={"service_ids": [f"{service_id}#head"]}
+    )
+    batch_get = client.post(
+        f"{url_prefix}/configs/batch-get",
+        json={"keys": [{"service_id": f"{service_id}#chunks", "config_name": "a"}]},
+    )
+    imported = client.post(
+        f"{url_prefix}/configs/import",
+        json=[{"service_id": f"{service_id}#head", "config_name": "head"}],
+    )
+    head = client.post(
+        f"{url_prefix}/configs/heads", json={"service_ids": [service_id]}
+    )
+
+    assert write.status_code == 422
+    assert read_all.status_code == 422
+    assert heads.status_code == 422
+    assert batch_get.status_code == 422
+    assert imported.json()["results"][0]["status"] == "invalid"
+    assert head.json()["heads"] == {service_id: 1}
+
+
+def test_update_service_config_if_match(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/emails"
+    client.post(api_endpoint, json={"config": {"enabled": True}})
+    etag = client.get(api_endpoint).headers["ETag"]
+
+    updated = client.put(
+        api_endpoint, json={"config": {"enabled": False}}, headers={"If-Match": etag}
+    )
+    stale = client.put(
+        api_endpoint, json={"config": {"enabled": True}}, headers={"If-Match": etag}
+    )
+    missing = client.put(
+        f"{url_prefix}/{service_id}/configs/missing", json={"config": {}}
+    )
+
+    assert updated.status_code == 201
+    assert updated.headers["ETag"] != etag
+    assert stale.status_code == 412
+    assert stale.headers["ETag"] == updated.headers["ETag"]
+    assert missing.status_code == 404
+    assert client.get(api_endpoint).json()["config"] == {"enabled": False}
+
+
+def test_patch_service_config(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/emails"
+    client.post(api_endpoint, json={"config": {}})
+    client.put(api_endpoint, json={"config": {"enabled": True, "retries": 3}})
+    etag = client.get(api_endpoint).headers["ETag"]
+
+    merged = client.patch(
+        api_endpoint,
+        data=json.dumps({"retries": None, "to": ["ops"]}),
+        headers={"Content-Type": "application/merge-patch+json", "If-Match": etag},
+    )
+    stale = client.patch(
+        api_endpoint, json={"enabled": False}, headers={"If-Match": etag}
+    )
+    failed_test = client.patch(
+        api_endpoint, json=[{"op": "test", "path": "/enabled", "value": False}]
+    )
+    invalid = client.patch(
+        api_endpoint,
+        data=json.dumps({"enabled": False}),
+        headers={"Content-Type": "application/json-patch+json"},
+    )
+
+    assert merged.status_code == 200
+    assert merged.headers["ETag"] != etag
+    assert stale.status_code == 412
+    assert failed_test.status_code == 409
+    assert invalid.status_code == 400
+    assert client.get(api_endpoint).json()["config"] == {"enabled": True, "to": ["ops"]}
+
+
+def test_get_service_config_fields(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/db"
+    client.post(api_endpoint, json={"config": {}})
+    client.put(
+        api_endpoint,
+        json={"config": {"pool": {"min": 1, "max": 8}, "host": "db", "port": 5432}},
+    )
+
+    one = client.get(api_endpoint, params={"fields": "pool.max,port,missing"})
+    all_configs = client.get(
+        f"{url_prefix}/{service_id}/configs", params={"fields": "pool"}
+    )
+    invalid = client.get(api_endpoint, params={"fields": "pool..max"})
+
+    assert one.json()["config"] == {"pool": {"max": 8}, "port": 5432}
+    assert one.headers["ETag"]
+    assert all_configs.json()[0]["config"] == {"pool": {"min": 1, "max": 8}}
+    assert invalid.status_code == 400
+
+
+def test_get_service_config_if_none_match(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/routes"
+    config = {"routes": [f"/api/v1/items/{i}" for i in range(100)]}
+    client.post(api_endpoint, json={"config": {}})
+    client.put(api_endpoint, json={"config": config})
+
+    first = client.get(api_endpoint)
+    etag = first.headers["ETag"]
+    not_modified = client.get(api_endpoint, headers={"If-None-Match": etag})
+    client.put(api_endpoint, json={"config": {"routes": []}})
+    modified = client.get(api_endpoint, headers={"If-None-Match": etag})
+
+    assert first.json()["config"] == config
+    # Large enough to be served gzipped to the clients accepting it
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+    assert modified.json()["config"] == {"routes": []}
+
+
+def test_watch_service_config(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/flags"
+    client.post(api_endpoint, json={"config": {}})
+    current = client.get(api_endpoint).json()["version"]
+
+    unchanged = client.get(
+        api_endpoint, params={"watch": "true", "version": current, "timeout": 0.1}
+    )
+    outdated = client.get(
+        api_endpoint, params={"watch": "true", "version": current - 1, "timeout": 5}
+    )
+    service = client.get(f"{url_prefix}/{service_id}/configs")
+    service_unchanged = client.get(
+        f"{url_prefix}/{service_id}/configs",
+        params={
+            "watch": "true",
+            "version": service.headers["X-Service-Version"],
+            "timeout": 0.1,
+        },
+    )
+
+    assert unchanged.status_code == 304
+    assert outdated.status_code == 200
+    assert outdated.json()["version"] == current
+    assert service_unchanged.status_code == 304
+
+
+def test_config_events_websocket(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/flags"
+    client.post(api_endpoint, json={"config": {}})
+    version = client.get(api_endpoint).json()["version"]
+
+    with client.websocket_connect(
+        f"{url_prefix}/configs/events/ws?config={service_id}/flags"
+    ) as websocket:
+        client.put(api_endpoint, json={"config": {"enabled": True}})
+        event = websocket.receive_json()
+
+    assert event["type"] == "config_changed"
+    assert event["service_id"] == service_id
+    assert event["config_name"] == "flags"
+    assert event["version"] == version + 1
+
+
+def test_config_events_without_topics(client: TestClient):
+    response = client.get(f"{url_prefix}/configs/events")
+
+    assert response.status_code == 400
+
+
+def test_get_service_heads(client: TestClient):
+    service_id = str(uuid.uuid4())
+    unknown_service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs"
+    client.post(f"{api_endpoint}/flags", json={"config": {}})
+    client.put(f"{api_endpoint}/flags", json={"config": {"enabled": True}})
+
+    response = client.post(
+        f"{url_prefix}/configs/heads",
+        params={"consistency": "strong"},
+        json={"service_ids": [service_id, unknown_service_id]},
+    )
+    service = client.get(api_endpoint, params={"consistency": "strong"})
+
+    assert response.status_code == 200
+    assert response.json() == {"heads": {service_id: 2, unknown_service_id: 0}}
+    assert service.headers["X-Service-Version"] == "2"
+
+
+def test_get_service_config_changes(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs"
+    client.post(f"{api_endpoint}/flags", json={"config": {}})
+    client.post(f"{api_endpoint}/emails", json={"config": {}})
+    sync_version = client.get(api_endpoint).headers["X-Sync-Version"]
+    client.put(f"{api_endpoint}/flags", json={"config": {"enabled": True}})
+
+    deleted = client.delete(f"{api_endpoint}/emails")
+    missing = client.delete(f"{api_endpoint}/emails")
+    service_changes = client.get(api_endpoint, params={"since": sync_version})
+    changes = client.get(
+        f"{url_prefix}/configs/changes", params={"since": sync_version}
+    )
+
+    assert deleted.status_code == 204
+    assert missing.status_code == 404
+    assert client.get(f"{api_endpoint}/emails").status_code == 404
+    body = service_changes.json()
+    assert [
+        (change["config_name"], change["deleted"], change["config"])
+        for change in body["changes"]
+    ] == [("flags", False, {"enabled": True}), ("emails", True, {})]
+    assert body["sync_version"] >= int(sync_version)
+    assert service_changes.headers["X-Sync-Version"] == str(body["sync_version"])
+    assert [
+        change["config_name"]
+        for change in changes.json()["changes"]
+        if change["service_id"] == service_id
+    ] == ["flags", "emails"]
+
+
+def test_get_config_changes_since_too_long_ago(client: TestClient):
+    invalid = client.get(f"{url_prefix}/configs/changes", params={"since": "yesterday"})
+    expired = client.get(
+        f"{url_prefix}/configs/changes", params={"since": "2020-01-01T00:00:00Z"}
+    )
+
+    assert invalid.status_code == 400
+    assert expired.status_code == 410
+
+
+def test_get_service_config_served_stale_when_the_table_fails(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/db"
+    client.post(api_endpoint, json={"config": {}})
+    client.put(api_endpoint, json={"config": {"pool": 8}})
+    fresh = client.get(api_endpoint)
+    fresh_all = client.get(f"{url_prefix}/{service_id}/configs")
+    config_cache.clear()
+
+    with patch.object(
+        async_dal_instance, "get_configs", side_effect=RuntimeError(500, "down")
+    ):
+        stale = client.get(api_endpoint)
+        stale_all = client.get(f"{url_prefix}/{service_id}/configs")
+        stale_fields = client.get(api_endpoint, params={"fields": "pool"})
+        # The strongly consistent reads are never served stale
+        with pytest.raises(RuntimeError):
+            client.get(api_endpoint, params={"consistency": "strong"})
+
+    assert "Warning" not in fresh.headers
+    assert stale.status_code == 200
+    assert stale.json() == fresh.json()
+    assert stale.headers["Warning"] == '110 - "Response is Stale"'
+    assert int(stale.headers["Age"]) >= 0
+    assert stale_all.json() == fresh_all.json()
+    assert stale_all.headers["X-Sync-Version"] == fresh_all.headers["X-Sync-Version"]
+    assert stale_fields.json()["config"] == {"pool": 8}
+
+
+def test_deleted_config_is_not_served_stale(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/db"
+    client.post(api_endpoint, json={"config": {"pool": 8}})
+    client.get(api_endpoint)
+    client.get(f"{url_prefix}/{service_id}/configs")
+    deleted = client.delete(api_endpoint)
+    missing = client.get(api_endpoint)
+    config_cache.clear()
+
+    with patch.object(
+        async_dal_instance, "get_configs", side_effect=RuntimeError(500, "down")
+    ):
+        with pytest.raises(RuntimeError):
+            client.get(api_endpoint)
+        with pytest.raises(RuntimeError):
+            client.get(f"{url_prefix}/{service_id}/configs")
+
+    assert deleted.status_code == 204
+    assert missing.status_code == 404
+
+
+def test_stale_result_forgotten_once_the_read_finds_nothing(client: TestClient):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/db"
+    client.post(api_endpoint, json={"config": {"pool": 8}})
+    client.get(api_endpoint)
+    config_cache.clear()
+
+    # Removed by another replica, unbeknownst to this one
+    with patch.object(async_dal_instance, "get_configs", return_value=[]):
+        missing = client.get(api_endpoint)
+
+    assert missing.status_code == 404
+    assert service_config_mgmt.stale_store.recall((service_id, "db")) is None
+
+
+def test_get_service_config_served_stale_past_the_budget(
+    client: TestClient, monkeypatch
+):
+    service_id = str(uuid.uuid4())
+    api_endpoint = f"{url_prefix}/{service_id}/configs/db"
+    client.post(api_endpoint, json={"config": {}})
+    client.put(api_endpoint, json={"config": {"pool": 8}})
+    fresh = client.get(api_endpoint)
+    config_cache.clear()
+    monkeypatch.setenv("STALE_READ_BUDGET_SECONDS", "0.05")
+
+    async def slow_read(*args, **kwargs):
+        await asyncio.sleep(0.5)
+        return []
+
+    with patch.object(async_dal_instance, "get_configs", side_effect=slow_read):
+        stale = client.get(api_endpoint)
+
+    assert stale.json() == fresh.json()
+    assert stale.headers["Warning"] == '110 - "Response is Stale"'
+
+
+def test_warm_start(monkeypatch, tmp_path):
+    service_id = str(uuid.uuid4())
+    path = str(tmp_path / "stale.jsonl")
+    item = {"service_id": service_id, "config_name": "db", "config": {}, "version": 4}
+    store = StaleStore(max_entries=10)
+    store.remember((service_id, "db"), [item])
+    store.remember((service_id, "old"), [dict(item, config_name="old")], read_at=1.0)
+    store.save(path)
+    monkeypatch.setenv("STALE_SNAPSHOT_PATH", path)
+
+    assert service_config_mgmt.warm_start() == 2
+    assert service_config_mgmt.peek_service_config(service_id, "db") == item
+    # Too old to be served as current, but still there to be served stale
+    assert service_config_mgmt.peek_service_config(service_id, "old") is None
+    assert service_config_mgmt.stale_store.recall((service_id, "old"))
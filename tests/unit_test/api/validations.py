@@ -34,6 +34,7 @@ expected_responses = {
                     "domains": "gmail.com, yahoo.com, hotmail.com",
                     "enabled": True,
                 },
+                "version": 3,
             },
             {
                 "updated_at": 1655715284,
@@ -43,6 +44,7 @@ expected_responses = {
                 "config": {
                     "config": {"domains": "gmail.com, yahoo.com", "enabled": True}
                 },
+                "version": 1,
             },
         ],
     },
@@ -54,6 +56,7 @@ expected_responses = {
             "created_at": 1655715315,
             "config_name": "emails",
             "config": {"domains": "gmail.com, yahoo.com, hotmail.com", "enabled": True},
+            "version": 3,
         },
     },
 }
@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+import requests
+from fastapi.testclient import TestClient
+
+from adobe_config_mgmt_lib.client.config_client import ConfigClient
+from adobe_config_mgmt_lib.client.http_source import HttpConfigSource
+from adobe_config_mgmt_lib.client.snapshot import Snapshot, write_snapshot
+
+url_prefix = "http://testserver/adobe/v1"
+
+
+class UnreachableSource:
+    def configs(self, service_id: str):
+        raise requests.ConnectionError("unreachable")
+
+    def changes(self, service_id: str, since: int):
+        raise requests.ConnectionError("unreachable")
+
+
+class TestSnapshot:
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    def test_configs_are_read_back(self, tmp_path, use_mmap):
+        path = str(tmp_path / "configs.snapshot")
+        write_snapshot(
+            path,
+            {"svc": 12},
+            {
+                "svc": {
+                    "flags": (b'{"config":{"on":true}}', 2, 100),
+                    "emails": (b'{"config":{}}', 1, 90),
+                }
+            },
+        )
+
+        snapshot = Snapshot.load(path, use_mmap=use_mmap)
+
+        assert snapshot.sync_versions == {"svc": 12}
+        assert snapshot.get("svc", "flags") == {"config": {"on": True}}
+        assert snapshot.entry("svc", "emails") == (b'{"config":{}}', 1, 90)
+        assert snapshot.get("svc", "missing") is None
+        assert snapshot.config_names("svc") == ["flags", "emails"]
+
+
+class TestConfigClient:
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    def test_reads_are_served_from_the_snapshot(
+        self, client: TestClient, tmp_path, use_mmap
+    ):
+        service_id = str(uuid.uuid4())
+        api_endpoint = f"{url_prefix}/{service_id}/configs"
+        client.post(f"{api_endpoint}/flags", json={"config": {"enabled": False}})
+        client.post(f"{api_endpoint}/emails", json={"config": {"sender": "a"}})
+        path = str(tmp_path / "configs.snapshot")
+        config_client = ConfigClient(
+            HttpConfigSource(url_prefix, session=client),
+            [service_id],
+            path,
+            use_mmap=use_mmap,
+        )
+
+        assert config_client.refresh() == 2
+        # The configs added are stored as their whole payload
+        assert config_client.get(service_id, "flags") == {"config": {"enabled": False}}
+        client.put(f"{api_endpoint}/flags", json={"config": {"enabled": True}})
+        client.delete(f"{api_endpoint}/emails")
+        assert config_client.refresh() == 2
+        # The changes within the settle window are read again, and ignored
+        assert config_client.refresh() == 0
+
+        assert config_client.get_all(service_id) == {"flags": {"enabled": True}}
+        assert config_client.get(service_id, "emails", default={}) == {}
+        assert config_client.get_item(service_id, "flags")["version"] == 2
+
+        # A client started while the config manager is down serves the snapshot
+        offline = ConfigClient(UnreachableSource(), [service_id], path)
+        with pytest.raises(requests.ConnectionError):
+            offline.refresh()
+        assert offline.get(service_id, "flags") == {"enabled": True}
+
+    def test_background_sync_survives_failures(self, tmp_path):
+        config_client = ConfigClient(
+            UnreachableSource(),
+            ["svc"],
+            str(tmp_path / "configs.snapshot"),
+            poll_interval=0.01,
+        )
+        with config_client:
+            while config_client.failures < 2:
+                pass
+
+        assert config_client.get("svc", "flags") is None
+        assert config_client.stats()["refreshes"] == 0
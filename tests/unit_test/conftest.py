@@ -3,10 +3,13 @@ from typing import Generator
 import pytest
 from fastapi.testclient import TestClient
 
+from adobe_config_mgmt_lib.dal.dynamodb import table_bootstrap
 from adobe_config_mgmt_lib.main import app
 
 
 @pytest.fixture(scope="function")
 def client() -> Generator:
     with TestClient(app) as c:
+        # Waits for the set up of the table started with the app
+        table_bootstrap.ensure()
         yield c
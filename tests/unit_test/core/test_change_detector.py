@@ -0,0 +1,74 @@
+from adobe_config_mgmt_lib.core.cron.config_change_listener import (
+    ADDED,
+    MODIFIED,
+    REMOVED,
+    ChangeDetector,
+    diff_config,
+)
+
+
+def _item(config_name, version, config=None):
+    return {"config_name": config_name, "version": version, "config": config or {}}
+
+
+class TestChangeDetector:
+    def test_first_snapshot_is_the_baseline(self):
+        detector = ChangeDetector()
+
+        assert detector.detect("svc", [_item("flags", 1)]) == []
+
+    def test_detects_added_removed_and_modified_configs(self):
+        detector = ChangeDetector()
+        notified = []
+        detector.register(notified.append)
+        detector.detect("svc", [_item("flags", 1), _item("emails", 1)])
+
+        changes = detector.detect("svc", [_item("flags", 2), _item("limits", 1)])
+
+        assert sorted((c.kind, c.config_name, c.version) for c in changes) == [
+            (ADDED, "limits", 1),
+            (MODIFIED, "flags", 2),
+            (REMOVED, "emails", None),
+        ]
+        assert notified == changes
+        assert all(change.diff is None for change in changes)
+
+    def test_services_are_tracked_apart(self):
+        detector = ChangeDetector()
+        detector.detect("svc", [_item("flags", 1)])
+        detector.detect("other", [])
+
+        assert detector.detect("svc", [_item("flags", 1)]) == []
+
+    def test_key_diffs(self):
+        detector = ChangeDetector(key_diffs=True)
+        detector.detect("svc", [_item("flags", 1, {"a": 1, "b": {"c": 1, "d": 1}})])
+
+        (change,) = detector.detect(
+            "svc", [_item("flags", 2, {"b": {"c": 2, "d": 1, "e/f": 1}, "g": 1})]
+        )
+
+        assert change.diff == {
+            ADDED: ["/b/e~1f", "/g"],
+            REMOVED: ["/a"],
+            MODIFIED: ["/b/c"],
+        }
+
+    def test_failing_callback_does_not_stop_the_others(self):
+        detector = ChangeDetector()
+        notified = []
+        detector.register(lambda change: 1 / 0)
+        detector.register(notified.append)
+        detector.detect("svc", [])
+
+        changes = detector.detect("svc", [_item("flags", 1)])
+
+        assert notified == changes
+
+
+def test_diff_config_of_equal_configs():
+    assert diff_config({"a": [1, 2]}, {"a": [1, 2]}) == {
+        ADDED: [],
+        REMOVED: [],
+        MODIFIED: [],
+    }
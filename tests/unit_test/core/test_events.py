@@ -0,0 +1,62 @@
+import asyncio
+
+from adobe_config_mgmt_lib.core.service_config.events import (
+    RESYNC_EVENT,
+    EventBus,
+    change_event,
+)
+
+
+class TestEventBus:
+    def test_events_reach_the_subscribers_of_the_config_and_service(self):
+        async def scenario():
+            bus = EventBus(max_queue_size=10)
+            config_subscription = bus.subscribe([("svc", "flags")])
+            service_subscription = bus.subscribe([("svc", None)])
+            other_subscription = bus.subscribe([("svc", "emails")])
+            both_subscription = bus.subscribe([("svc", None), ("svc", "flags")])
+            bus.publish(change_event("svc", "flags", 2))
+            return [
+                subscription.queue.qsize()
+                for subscription in (
+                    config_subscription,
+                    service_subscription,
+                    other_subscription,
+                    both_subscription,
+                )
+            ]
+
+        assert asyncio.run(scenario()) == [1, 1, 0, 1]
+
+    def test_slow_subscriber_is_told_to_resync(self):
+        async def scenario():
+            bus = EventBus(max_queue_size=2)
+            subscription = bus.subscribe([("svc", None)])
+            for version in range(4):
+                bus.publish(change_event("svc", "flags", version))
+            events = [await subscription.next_event(0.01) for _ in range(3)]
+            return bus, subscription, events
+
+        bus, subscription, events = asyncio.run(scenario())
+
+        assert [event and event["type"] for event in events] == [
+            RESYNC_EVENT,
+            "config_changed",
+            None,
+        ]
+        assert events[1]["version"] == 3
+        assert bus.stats()["dropped"] == 2
+
+    def test_unsubscribe_forgets_the_topics(self):
+        async def scenario():
+            bus = EventBus(max_queue_size=10)
+            subscription = bus.subscribe([("svc", None), ("svc", "flags")])
+            bus.unsubscribe(subscription)
+            bus.publish(change_event("svc", "flags"))
+            return bus, subscription
+
+        bus, subscription = asyncio.run(scenario())
+
+        assert subscription.queue.empty()
+        assert bus.stats()["subscribers"] == 0
+        assert bus.stats()["topics"] == 0
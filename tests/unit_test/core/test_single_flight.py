@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from adobe_config_mgmt_lib.core.service_config.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_reads_share_one_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        reads = []
+
+        def read():
+            reads.append(1)
+            started.set()
+            release.wait(5)
+            return {"version": 1}
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(flight.do, "svc", read)
+            started.wait(5)
+            followers = [executor.submit(flight.do, "svc", read) for _ in range(4)]
+            while flight.stats()["coalesced"] < 4:
+                pass
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert len(reads) == 1
+        assert all(result is results[0] for result in results)
+        assert flight.stats() == {"calls": 5, "coalesced": 4, "in_flight": 0}
+        # Once landed, the next read runs again
+        assert flight.do("svc", read) == {"version": 1}
+        assert len(reads) == 2
+
+    def test_async_reads_share_one_call_and_its_error(self):
+        flight = SingleFlight()
+        reads = []
+
+        async def read(key):
+            reads.append(key)
+            await asyncio.sleep(0.01)
+            if key == "missing":
+                raise KeyError(key)
+            return key.upper()
+
+        async def scenario():
+            return await asyncio.gather(
+                *(flight.do_async(key, lambda key=key: read(key)) for key in keys),
+                return_exceptions=True,
+            )
+
+        keys = ["svc", "svc", "other", "missing", "missing"]
+        results = asyncio.run(scenario())
+
+        assert results[:3] == ["SVC", "SVC", "OTHER"]
+        assert all(isinstance(result, KeyError) for result in results[3:])
+        assert sorted(reads) == ["missing", "other", "svc"]
+        assert flight.stats() == {"calls": 5, "coalesced": 2, "in_flight": 0}
+
+    def test_cancelled_caller_leaves_the_read_to_the_others(self):
+        flight = SingleFlight()
+
+        async def read():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def scenario():
+            leader = asyncio.ensure_future(flight.do_async("svc", read))
+            follower = asyncio.ensure_future(flight.do_async("svc", read))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from adobe_config_mgmt_lib.core.service_config.stale_store import StaleStore
+
+
+class TestStaleStore:
+    def test_serves_the_last_result_with_its_age(self):
+        now = [1000.0]
+        store = StaleStore(max_entries=2, clock=lambda: now[0])
+        store.remember(("svc", "db"), [{"version": 1}])
+        store.remember(("svc", "db"), [{"version": 2}])
+        now[0] += 30
+
+        assert store.serve(("svc", "db")) == ([{"version": 2}], 30.0)
+        assert store.serve(("svc", "missing")) is None
+        assert store.stats()["served"] == 1
+
+    def test_drops_the_least_recently_read(self):
+        store = StaleStore(max_entries=2)
+        for config_name in ("a", "b", "c"):
+            store.remember(("svc", config_name), [{"config_name": config_name}])
+
+        assert store.recall(("svc", "a")) is None
+        assert [key for key, _, _ in store.items()] == [("svc", "b"), ("svc", "c")]
+
+    def test_forgets_a_result(self, tmp_path):
+        path = str(tmp_path / "stale.jsonl")
+        store = StaleStore(max_entries=2)
+        store.remember(("svc", "db"), [{"version": 1}])
+        store.save(path)
+
+        store.forget(("svc", "db"))
+        store.forget(("svc", "missing"))
+
+        assert store.recall(("svc", "db")) is None
+        # The file no longer has it either once saved
+        assert store.save(path)
+        assert StaleStore(max_entries=2).load(path) == 0
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "stale.jsonl")
+        store = StaleStore(max_entries=10)
+        service = {"head_version": 3, "items": [{"config": {"ratio": Decimal("0.5")}}]}
+        store.remember(("svc", None), service, read_at=100.0)
+        store.remember(("svc", "db"), [{"config": {"pool": 8}}], read_at=200.0)
+
+        assert store.save(path)
+        # Nothing new to save
+        assert not store.save(path)
+        loaded = StaleStore(max_entries=10)
+        assert loaded.load(path) == 2
+        assert list(loaded.items()) == list(store.items())
+        assert loaded.stats()["loaded"] == 2
+        assert StaleStore(max_entries=10).load(str(tmp_path / "missing")) == 0
@@ -0,0 +1,142 @@
+import asyncio
+import uuid
+from unittest.mock import call, patch
+
+from adobe_config_mgmt_lib.core.cron.stream_consumer import StreamConsumer
+from adobe_config_mgmt_lib.core.service_config import service_config_mgmt
+from adobe_config_mgmt_lib.dal.dynamodb.streams import (
+    TRIM_HORIZON,
+    ShardCheckpoints,
+    StreamChange,
+    StreamReader,
+)
+from tests.unit_test.data_access_layer.dynamodb.test_streams import (
+    STREAM_ARN,
+    FakeStreamsClient,
+)
+
+
+class TestStreamConsumer:
+    def test_changes_are_handed_to_the_callbacks(self):
+        client = FakeStreamsClient()
+        client.add_shard("shard")
+        reader = StreamReader(client, STREAM_ARN, ShardCheckpoints())
+        consumer = StreamConsumer(lambda: reader, poll_interval=0.01)
+        changes = []
+        consumer.register(changes.append)
+
+        def failing_callback(change):
+            raise ValueError("callback failure")
+
+        consumer.register(failing_callback)
+
+        async def scenario():
+            consumer.start()
+            await asyncio.sleep(0.05)
+            client.put(
+                "shard", "INSERT", "emails", "flags", new_image={"version": {"N": "1"}}
+            )
+            client.put("shard", "MODIFY", "emails#head", "head", new_image={})
+            await asyncio.sleep(0.1)
+            await consumer.stop()
+
+        asyncio.run(scenario())
+
+        assert [(change.event_name, change.config_name) for change in changes] == [
+            ("INSERT", "flags")
+        ]
+        assert consumer.stats() == {
+            "changes": 1,
+            "failed": 0,
+            "resyncs": 0,
+            "shards": 1,
+            "records": 2,
+        }
+
+
+class TestStreamChanges:
+    def test_remote_writes_invalidate_the_cache_and_are_published(self):
+        service_id = uuid.uuid4().hex
+        service_config_mgmt.dal_instance.write_through(
+            service_id, "flags", {"service_id": service_id, "version": 2}
+        )
+
+        async def scenario():
+            # The write of this replica, already published
+            service_config_mgmt._notify_change(service_id, "flags", {"version": 2})
+            subscription = service_config_mgmt.event_bus.subscribe([(service_id, None)])
+            service_config_mgmt._apply_stream_change(
+                StreamChange("MODIFY", service_id, "flags", 2, False)
+            )
+            # The deletion by another replica
+            service_config_mgmt._apply_stream_change(
+                StreamChange("MODIFY", service_id, "flags", 3, True)
+            )
+            event = await subscription.next_event(timeout=1)
+            service_config_mgmt.event_bus.unsubscribe(subscription)
+            return event, subscription.queue.qsize()
+
+        event, pending = asyncio.run(scenario())
+
+        assert (event["version"], event["change"], pending) == (3, "removed", 0)
+        assert service_config_mgmt.peek_service_config(service_id, "flags") is None
+
+    def test_remote_writes_already_read_are_published(self):
+        service_id = uuid.uuid4().hex
+        # Written by another replica, then read through this one
+        service_config_mgmt.dal_instance.db_handler.add_configs(
+            data={"service_id": service_id, "config_name": "flags", "config": {}},
+            execution_context=None,
+        )
+        service_config_mgmt.get_service_config_by_name(service_id, "flags")
+
+        async def scenario():
+            subscription = service_config_mgmt.event_bus.subscribe([(service_id, None)])
+            with patch.object(service_config_mgmt.watch_hub, "poke") as poke:
+                service_config_mgmt._apply_stream_change(
+                    StreamChange("INSERT", service_id, "flags", 1, False)
+                )
+            event = await subscription.next_event(timeout=1)
+            service_config_mgmt.event_bus.unsubscribe(subscription)
+            return event, poke
+
+        event, poke = asyncio.run(scenario())
+
+        assert (event["version"], event["change"]) == (1, "added")
+        assert poke.call_args_list == [
+            call((service_id, "flags")),
+            call((service_id, None)),
+        ]
+        assert service_config_mgmt.peek_service_config(service_id, "flags") is not None
+
+    def test_trimmed_records_clear_the_caches_and_publish_a_resync(self):
+        service_id = uuid.uuid4().hex
+        client = FakeStreamsClient()
+        client.add_shard("shard")
+        reader = StreamReader(
+            client, STREAM_ARN, ShardCheckpoints(), start_position=TRIM_HORIZON
+        )
+        consumer = StreamConsumer(lambda: reader, poll_interval=0.01)
+        consumer.register_resync(service_config_mgmt._resync_stream)
+        client.put("shard", "INSERT", service_id, "a")
+
+        async def scenario():
+            subscription = service_config_mgmt.event_bus.subscribe([(service_id, None)])
+            consumer.start()
+            await asyncio.sleep(0.05)
+            service_config_mgmt.dal_instance.write_through(
+                service_id, "flags", {"service_id": service_id, "version": 2}
+            )
+            # Changed by another replica, its record lost to the retention
+            client.put("shard", "MODIFY", service_id, "flags")
+            client.trim("shard", 2)
+            event = await subscription.next_event(timeout=1)
+            await consumer.stop()
+            service_config_mgmt.event_bus.unsubscribe(subscription)
+            return event
+
+        event = asyncio.run(scenario())
+
+        assert event["type"] == "resync"
+        assert consumer.stats()["resyncs"] == 1
+        assert service_config_mgmt.peek_service_config(service_id, "flags") is None
@@ -0,0 +1,107 @@
+import asyncio
+from functools import partial
+from unittest.mock import patch
+from uuid import uuid4
+
+from adobe_config_mgmt_lib.core.service_config import service_config_mgmt
+from adobe_config_mgmt_lib.core.service_config.watch import WatchHub
+
+
+class TestWatchHub:
+    def test_waiters_share_a_single_poller(self):
+        """
+        All the clients watching a key are woken up by the same poller
+        :return:
+        """
+        versions = {"key": 1}
+        reads = []
+
+        async def read_version(key):
+            reads.append(key)
+            return versions[key]
+
+        async def scenario():
+            hub = WatchHub(read_version, poll_interval=60)
+            waiters = [asyncio.ensure_future(hub.wait("key", 1, 5)) for _ in range(10)]
+            await asyncio.sleep(0.01)
+            versions["key"] = 2
+            hub.poke("key")
+            results = await asyncio.gather(*waiters)
+            return hub, results
+
+        hub, results = asyncio.run(scenario())
+
+        assert results == [2] * 10
+        assert reads == ["key", "key"]
+        assert hub.stats() == {"keys": 0, "waiters": 0}
+
+    def test_wait_times_out_without_a_newer_version(self):
+        async def read_version(key):
+            return 3
+
+        hub = WatchHub(read_version, poll_interval=0.01)
+
+        assert asyncio.run(hub.wait("key", 3, 0.05)) is None
+        assert asyncio.run(hub.wait("key", 2, 0.05)) == 3
+
+    def test_poller_survives_a_failed_read(self):
+        """
+        A read failing with any error, not only the ones the DAL wraps,
+        leaves the poller running
+        :return:
+        """
+        versions = {"key": 1}
+        reads = []
+
+        async def read_version(key):
+            reads.append(key)
+            if len(reads) == 1:
+                raise ConnectionError("Could not connect to the endpoint URL")
+            return versions[key]
+
+        async def scenario():
+            hub = WatchHub(read_version, poll_interval=60)
+            waiter = asyncio.ensure_future(hub.wait("key", 1, 5))
+            await asyncio.sleep(0.01)
+            hub.poke("key")
+            await asyncio.sleep(0.01)
+            versions["key"] = 2
+            hub.poke("key")
+            return await waiter
+
+        assert asyncio.run(scenario()) == 2
+        assert len(reads) == 3
+
+
+class TestWriteNotifications:
+    def test_a_write_from_another_thread_wakes_the_watchers(self):
+        """
+        The blocking writes, run outside the event loop, poke the pollers
+        as the non-blocking ones do, well before their next poll
+        :return:
+        """
+        service_id = uuid4().hex
+        service_config_mgmt.dal_instance.add_configs(
+            data={"service_id": service_id, "config_name": "flags", "config": {}},
+            execution_context=None,
+        )
+        update = partial(
+            service_config_mgmt.update_service_config, service_id, "flags", {"a": 1}
+        )
+
+        async def scenario():
+            waiter = asyncio.ensure_future(
+                service_config_mgmt.watch_service_config_async(
+                    service_id, "flags", 1, 10
+                )
+            )
+            watches = service_config_mgmt.watch_hub._watches
+            # Written once the poller read the version the client holds
+            while getattr(watches.get((service_id, "flags")), "version", None) is None:
+                await asyncio.sleep(0.01)
+            await asyncio.get_event_loop().run_in_executor(None, update)
+            return await waiter
+
+        # Far longer than the wait, only a poke gets the new version in time
+        with patch.object(service_config_mgmt.watch_hub, "poll_interval", 60):
+            assert asyncio.run(scenario()) == 2
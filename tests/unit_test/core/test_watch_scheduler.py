@@ -0,0 +1,78 @@
+import asyncio
+
+from adobe_config_mgmt_lib.core.cron.watch_scheduler import WatchScheduler
+
+
+class TestWatchScheduler:
+    def test_churning_services_are_checked_more_often(self):
+        checks = {"busy": 0, "idle": 0}
+
+        async def check(service_id):
+            checks[service_id] += 1
+            return ["change"] if service_id == "busy" else []
+
+        async def scenario():
+            scheduler = WatchScheduler(
+                check,
+                min_interval=0.01,
+                max_interval=0.16,
+                max_concurrency=4,
+                max_services=10,
+            )
+            scheduler.register("busy")
+            scheduler.register("idle")
+            scheduler.start()
+            await asyncio.sleep(0.5)
+            await scheduler.stop()
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+
+        assert checks["busy"] > 3 * checks["idle"]
+        assert scheduler._intervals["idle"] == 0.16
+        assert scheduler._intervals["busy"] == 0.01
+
+    def test_concurrency_is_bounded(self):
+        running = []
+        peak = []
+
+        async def check(service_id):
+            running.append(service_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.remove(service_id)
+            return []
+
+        async def scenario():
+            scheduler = WatchScheduler(
+                check,
+                min_interval=0.01,
+                max_interval=1,
+                max_concurrency=3,
+                max_services=100,
+            )
+            for index in range(20):
+                scheduler.register(f"svc-{index}")
+            scheduler.start()
+            await asyncio.sleep(0.3)
+            await scheduler.stop()
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+
+        assert max(peak) == 3
+        assert scheduler.stats()["checked"] >= 20
+        assert scheduler.stats()["running"] == 0
+
+    def test_registrations_are_bounded(self):
+        async def check(service_id):
+            return []
+
+        scheduler = WatchScheduler(
+            check, min_interval=1, max_interval=1, max_concurrency=1, max_services=1
+        )
+
+        async def scenario():
+            return [scheduler.register("a"), scheduler.register("b")]
+
+        assert asyncio.run(scenario()) == [True, False]
@@ -0,0 +1,187 @@
+from adobe_config_mgmt_lib.dal.abstract_db_handler import AbstractDBHandler
+from adobe_config_mgmt_lib.dal.cache.cached_db_handler import CachedDBHandler
+from adobe_config_mgmt_lib.dal.cache.lru_cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingDBHandler(AbstractDBHandler):
+    def __init__(self):
+        self.reads = 0
+
+    def add_configs(self, data: dict, execution_context: dict):
+        return True
+
+    def get_configs(self, data: dict, execution_context: dict):
+        self.reads += 1
+        return [{"service_id": data["service_id"], "config": {"reads": self.reads}}]
+
+    def batch_add_configs(self, data: dict, execution_context: dict):
+        return {}
+
+    def batch_get_configs(self, data: dict, execution_context: dict):
+        self.reads += 1
+        return [
+            {"service_id": service_id, "config_name": config_name, "config": {}}
+            for service_id, config_name in data["keys"]
+        ]
+
+    def get_config_page(self, data: dict, execution_context: dict):
+        return self.get_configs(data, execution_context), None
+
+    def get_service_heads(self, data: dict, execution_context: dict):
+        return dict.fromkeys(data["service_ids"], 0)
+
+    def get_config_changes(self, data: dict, execution_context: dict):
+        return [], None, False
+
+    def update_configs(self, data: dict, execution_context: dict):
+        return data
+
+    def patch_configs(self, data: dict, execution_context: dict):
+        return data
+
+    def delete_configs(self, data: dict, execution_context: dict):
+        return True
+
+
+class TestLRUCache:
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = LRUCache(max_entries=10, max_bytes=1024, ttl_seconds=5, clock=clock)
+        cache.put("a", [1])
+        assert cache.get("a") == [1]
+        clock.now = 5
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = LRUCache(max_entries=2, max_bytes=1024, ttl_seconds=60)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        cache.get("a")
+        cache.put("c", [3])
+        assert cache.get("b") is None
+        assert cache.get("a") == [1]
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_limit(self):
+        cache = LRUCache(max_entries=10, max_bytes=10, ttl_seconds=60)
+        assert cache.put("a", "x" * 5) is True
+        assert cache.put("b", "y" * 5) is True
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] <= 10
+        assert cache.put("c", "z" * 50) is False
+
+
+class TestCachedDBHandler:
+    def test_hot_reads_are_served_from_cache(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+        data = {"service_id": "abc", "config_name": "emails"}
+
+        first = handler.get_configs(data=data, execution_context=None)
+        second = handler.get_configs(data=data, execution_context=None)
+
+        assert first == second
+        assert db_handler.reads == 1
+        assert handler.cache.stats()["hits"] == 1
+
+    def test_adds_invalidate_service_and_config_keys(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+        handler.get_configs(data={"service_id": "abc"}, execution_context=None)
+        handler.get_configs(
+            data={"service_id": "abc", "config_name": "emails"}, execution_context=None
+        )
+
+        handler.add_configs(
+            data={"service_id": "abc", "config_name": "emails", "config": {}},
+            execution_context=None,
+        )
+        handler.get_configs(data={"service_id": "abc"}, execution_context=None)
+        handler.get_configs(
+            data={"service_id": "abc", "config_name": "emails"}, execution_context=None
+        )
+
+        assert db_handler.reads == 4
+
+    def test_updates_write_through_the_config(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+        handler.get_configs(data={"service_id": "abc"}, execution_context=None)
+        handler.get_configs(
+            data={"service_id": "abc", "config_name": "emails"}, execution_context=None
+        )
+
+        handler.update_configs(
+            data={"service_id": "abc", "config_name": "emails", "config": {"a": 1}},
+            execution_context=None,
+        )
+        handler.get_configs(data={"service_id": "abc"}, execution_context=None)
+        config = handler.get_configs(
+            data={"service_id": "abc", "config_name": "emails"}, execution_context=None
+        )
+
+        assert config == [
+            {"service_id": "abc", "config_name": "emails", "config": {"a": 1}}
+        ]
+        assert db_handler.reads == 3
+
+    def test_service_reads_are_revalidated_against_the_head(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+
+        for head in (1, 1, 2, 2):
+            handler.get_configs(
+                data={"service_id": "abc"}, execution_context={"head_version": head}
+            )
+
+        assert db_handler.reads == 2
+
+    def test_batch_get_only_reads_missing_keys(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+        keys = [("abc", "emails"), ("abc", "message")]
+
+        handler.batch_get_configs(data={"keys": keys[:1]}, execution_context=None)
+        items = handler.batch_get_configs(data={"keys": keys}, execution_context=None)
+        handler.batch_get_configs(data={"keys": keys}, execution_context=None)
+
+        assert {(i["service_id"], i["config_name"]) for i in items} == set(keys)
+        assert db_handler.reads == 2
+
+    def test_partial_reads_are_projected_from_the_cache(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+        data = {"service_id": "svc", "config_name": "emails"}
+        projection = {"projection": [["reads"]]}
+
+        # Partial reads of an uncached config are not cached
+        handler.get_configs(data=data, execution_context=projection)
+        handler.get_configs(data=data, execution_context=projection)
+        handler.get_configs(data=data, execution_context=None)
+        projected = handler.get_configs(data=data, execution_context=projection)
+
+        assert db_handler.reads == 3
+        assert projected[0]["config"] == {"reads": 3}
+
+    def test_strong_reads_bypass_the_cache(self):
+        db_handler = CountingDBHandler()
+        handler = CachedDBHandler(db_handler, LRUCache(100, 1024 * 1024, 60))
+        data = {"service_id": "svc", "config_name": "emails"}
+
+        handler.get_configs(data=data, execution_context=None)
+        strong = handler.get_configs(
+            data=data, execution_context={"consistent_read": True}
+        )
+        cached = handler.get_configs(data=data, execution_context=None)
+
+        assert db_handler.reads == 2
+        assert cached == strong
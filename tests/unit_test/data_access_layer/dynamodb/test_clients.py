@@ -0,0 +1,41 @@
+from adobe_config_mgmt_lib.dal.dynamodb import clients
+from adobe_config_mgmt_lib.dal.dynamodb.clients import ConnectionPoolMeter
+
+
+class TestClients:
+    def test_client_config_follows_the_settings(self, monkeypatch):
+        monkeypatch.setenv("DYNAMODB_MAX_POOL_CONNECTIONS", "7")
+        monkeypatch.setenv("DYNAMODB_READ_TIMEOUT_SECONDS", "3.5")
+        monkeypatch.setenv("DYNAMODB_RETRY_MODE", "adaptive")
+
+        config = clients.client_config()
+
+        assert config.max_pool_connections == 7
+        assert config.read_timeout == 3.5
+        assert config.retries == {"mode": "adaptive", "max_attempts": 3}
+
+    def test_requests_are_metered(self):
+        meter = ConnectionPoolMeter(max_connections=2)
+        client = clients.create_client("dynamodb")
+        meter.attach(client, "test")
+
+        client.list_tables(Limit=1)
+
+        assert meter.stats()["clients"]["test"] == {
+            "in_flight": 0,
+            "peak_in_flight": 1,
+            "requests": 1,
+            "saturated": 0,
+        }
+
+    def test_requests_past_the_pool_size_are_saturated(self):
+        meter = ConnectionPoolMeter(max_connections=2)
+        meter.attach(clients.create_client("dynamodb"), "test")
+        for _ in range(3):
+            meter._sending("test")
+        meter._received("test")
+        meter._sending("test")
+
+        counters = meter.stats()["clients"]["test"]
+        assert counters["peak_in_flight"] == 3
+        assert counters["saturated"] == 2
@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+import pytest
+
+from adobe_config_mgmt_lib.dal.dynamodb.codec import (
+    NO_CODEC,
+    ZLIB_CODEC,
+    PayloadDecoder,
+    decode_item,
+    encode_config,
+    encode_payload,
+    payload_hash,
+)
+
+LARGE_CONFIG = {
+    "endpoints": [
+        {"region": f"region-{i}", "url": "https://example.com"} for i in range(50)
+    ],
+    "ratio": Decimal("0.25"),
+}
+
+
+class TestConfigCodec:
+    def test_round_trip(self):
+        blob, codec = encode_config(LARGE_CONFIG, ZLIB_CODEC, threshold=64)
+        item = decode_item({"config_blob": blob, "config_codec": codec})
+
+        assert codec == ZLIB_CODEC
+        assert len(blob) < len(str(LARGE_CONFIG))
+        assert item == {"config": LARGE_CONFIG}
+
+    def test_small_configs_are_not_compressed(self):
+        assert encode_config({"a": 1}, ZLIB_CODEC, threshold=64) == (None, None)
+        assert encode_config(LARGE_CONFIG, NO_CODEC, threshold=64) == (None, None)
+
+    def test_decode_projects_compressed_configs(self):
+        blob, codec = encode_config(LARGE_CONFIG, ZLIB_CODEC, threshold=64)
+        item = decode_item({"config_blob": blob, "config_codec": codec}, [["ratio"]])
+
+        assert item == {"config": {"ratio": Decimal("0.25")}}
+
+    def test_payload_is_decoded_piece_by_piece(self):
+        payload, codec = encode_payload(LARGE_CONFIG, NO_CODEC)
+        decoder = PayloadDecoder(codec)
+        for i in range(0, len(payload), 100):
+            decoder.feed(payload[i : i + 100])
+
+        assert codec == ZLIB_CODEC
+        assert decoder.result(payload_hash(payload), len(payload)) == LARGE_CONFIG
+
+    def test_payload_must_match_its_hash(self):
+        payload, codec = encode_payload(LARGE_CONFIG, ZLIB_CODEC)
+        decoder = PayloadDecoder(codec)
+        decoder.feed(payload)
+
+        with pytest.raises(ValueError):
+            decoder.result(payload_hash(b"other"), len(payload))
@@ -1,6 +1,18 @@
+import os
+import subprocess
+import sys
 from uuid import uuid4
 
+import pytest
+
 from adobe_config_mgmt_lib.dal import dynamodb
+from adobe_config_mgmt_lib.dal.dynamodb.capacity import capacity_meter, consumed_units
+from adobe_config_mgmt_lib.dal.dynamodb.changes import modification_clock
+from adobe_config_mgmt_lib.dal.dynamodb.dynamodb_dal import DynamodbDAL
+from adobe_config_mgmt_lib.dal.exceptions import (
+    ConfigVersionConflictError,
+    PatchConflictError,
+)
 
 
 class TestDynamodbTableCreation:
@@ -25,3 +37,648 @@ class TestDynamodbTableCreation:
         """
         result = dynamodb.create_services_config_table()
         assert result is True
+
+    def test_bootstrap_retries_a_failed_attempt_after_the_interval(self):
+        """
+        A failed set up of the table is retried by the next use past the
+        retry interval only
+        :return:
+        """
+        results = [False, True]
+        bootstrap = dynamodb.TableBootstrap(lambda: results.pop(0), retry_interval=0)
+
+        assert bootstrap.ensure() is False
+        assert bootstrap.ensure() is True
+        assert bootstrap.ensure() is True
+        assert bootstrap.stats() == {"ready": True, "attempts": 2}
+
+        throttled = dynamodb.TableBootstrap(lambda: False, retry_interval=60)
+        throttled.ensure()
+        throttled.ensure()
+        assert throttled.attempts == 1
+
+    def test_import_touches_no_network(self):
+        """
+        Importing the service reads no file and makes no call to dynamodb,
+        the table is set up on first use
+        :return:
+        """
+        script = (
+            "import sys, time\n"
+            "started = time.perf_counter()\n"
+            "import adobe_config_mgmt_lib.main\n"
+            "elapsed = time.perf_counter() - started\n"
+            "from adobe_config_mgmt_lib.core.config import settings\n"
+            "from adobe_config_mgmt_lib.dal import dynamodb\n"
+            "print(dynamodb.table_bootstrap.attempts, dynamodb._dynamodb is None,\n"
+            "      'boto3' in sys.modules, 'dynamodb' in vars(settings), elapsed)\n"
+        )
+        # No dynamodb listens there, any call would fail or hang
+        env = dict(os.environ, AWS_ENDPOINT_URL="http://127.0.0.1:9")
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.split()
+
+        assert output[-5:-1] == ["0", "True", "False", "False"]
+        assert float(output[-1]) < 5
+
+
+class TestDynamodbPagination:
+    def test_get_all_configs_follows_query_pages(self):
+        """
+        Reading all the configs of a service returns every page of the query
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        for i in range(12):
+            dal.add_configs(
+                data={
+                    "service_id": service_id,
+                    "config_name": f"config-{i:02d}",
+                    "config": {"index": i},
+                },
+                execution_context=None,
+            )
+
+        pages = list(
+            dal.iter_config_pages(
+                data={"service_id": service_id}, execution_context={"limit": 5}
+            )
+        )
+        all_configs = dal.get_configs(
+            data={"service_id": service_id}, execution_context=None
+        )
+
+        assert [len(page) for page in pages] == [5, 5, 2]
+        assert len(all_configs) == 12
+
+
+class TestDynamodbBatchGet:
+    def test_batch_get_chunks_keys_across_services(self):
+        """
+        More than 100 keys are split over several BatchGetItem calls
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_ids = [uuid4().hex, uuid4().hex]
+        keys = []
+        for service_id in service_ids:
+            for i in range(60):
+                dal.add_configs(
+                    data={
+                        "service_id": service_id,
+                        "config_name": f"config-{i:02d}",
+                        "config": {"index": i},
+                    },
+                    execution_context=None,
+                )
+                keys.append((service_id, f"config-{i:02d}"))
+        keys.append((service_ids[0], "missing"))
+
+        items = dal.batch_get_configs(data={"keys": keys}, execution_context=None)
+
+        assert len(items) == 120
+        assert {(i["service_id"], i["config_name"]) for i in items} == set(keys[:-1])
+
+
+class TestDynamodbPatch:
+    @staticmethod
+    def _patch(dal, service_id, patch, patch_type, expected_version=None):
+        return dal.patch_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "patch": patch,
+                "patch_type": patch_type,
+            },
+            execution_context={"expected_version": expected_version},
+        )
+
+    def test_patch_in_place_and_in_memory(self):
+        """
+        Patches on known paths and patches needing the config both apply
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        dal.add_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "config": {"limits": {"daily": 10}, "to": ["a"], "debug": True},
+            },
+            execution_context=None,
+        )
+
+        merged = self._patch(
+            dal, service_id, {"limits": {"hourly": 1.5}, "debug": None}, "merge-patch"
+        )
+        patched = self._patch(
+            dal,
+            service_id,
+            [
+                {"op": "add", "path": "/to/-", "value": "b"},
+                {"op": "replace", "path": "/to/0", "value": "c"},
+            ],
+            "json-patch",
+            expected_version=merged["version"],
+        )
+
+        assert merged["config"] == {"limits": {"daily": 10, "hourly": 1.5}, "to": ["a"]}
+        assert patched["config"]["to"] == ["c", "b"]
+        assert patched["version"] == merged["version"] + 1
+
+    def test_patch_conflicts(self):
+        """
+        A patch which can't apply is a 409, a stale version a 412
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        dal.add_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "config": {"a": 1},
+            },
+            execution_context=None,
+        )
+
+        with pytest.raises(PatchConflictError):
+            self._patch(dal, service_id, [{"op": "remove", "path": "/b"}], "json-patch")
+        with pytest.raises(ConfigVersionConflictError):
+            self._patch(dal, service_id, {"a": 2}, "merge-patch", expected_version=7)
+        assert self._patch(dal, uuid4().hex, {"a": 2}, "merge-patch") is None
+
+
+# The parameters of the conditional writes, and of the reads telling why
+# they failed, in botocore 1.27.12, the version of poetry.lock. Newer
+# clients accept more, which the locked one rejects before sending.
+LOCKED_CLIENT_PARAMETERS = {
+    "UpdateItem": {
+        "AttributeUpdates",
+        "ConditionExpression",
+        "ConditionalOperator",
+        "Expected",
+        "ExpressionAttributeNames",
+        "ExpressionAttributeValues",
+        "Key",
+        "ReturnConsumedCapacity",
+        "ReturnItemCollectionMetrics",
+        "ReturnValues",
+        "TableName",
+        "UpdateExpression",
+    },
+    "GetItem": {
+        "AttributesToGet",
+        "ConsistentRead",
+        "ExpressionAttributeNames",
+        "Key",
+        "ProjectionExpression",
+        "ReturnConsumedCapacity",
+        "TableName",
+    },
+}
+
+
+class TestDynamodbLockedClient:
+    def test_failed_conditions_only_use_the_parameters_of_the_locked_client(self):
+        """
+        A missing entry and a version conflict are told apart, for the
+        updates and the patches, with the calls of the locked botocore only
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        key = {"service_id": service_id, "config_name": "emails"}
+        missing_key = {"service_id": service_id, "config_name": "missing"}
+        dal.add_configs(data={**key, "config": {"a": 1}}, execution_context=None)
+        calls = []
+
+        def record_call(params, model, **kwargs):
+            calls.append((model.name, set(params)))
+
+        events = dal.table.meta.client.meta.events
+        events.register("provide-client-params.dynamodb", record_call)
+        try:
+            with pytest.raises(ConfigVersionConflictError):
+                dal.update_configs(
+                    data={**key, "config": {"a": 2}},
+                    execution_context={"expected_version": 7},
+                )
+            with pytest.raises(ConfigVersionConflictError):
+                TestDynamodbPatch._patch(
+                    dal, service_id, {"a": 2}, "merge-patch", expected_version=7
+                )
+            missing_update = dal.update_configs(
+                data={**missing_key, "config": {}}, execution_context=None
+            )
+            missing_patch = dal.patch_configs(
+                data={**missing_key, "patch": {"a": 2}, "patch_type": "merge-patch"},
+                execution_context=None,
+            )
+        finally:
+            events.unregister("provide-client-params.dynamodb", record_call)
+
+        assert missing_update is None and missing_patch is None
+        assert {"UpdateItem", "GetItem"} <= {name for name, _ in calls}
+        for name, params in calls:
+            assert params <= LOCKED_CLIENT_PARAMETERS.get(name, params), name
+
+
+class TestDynamodbProjection:
+    def test_get_configs_reads_only_the_projected_paths(self):
+        """
+        A projection reads only the given paths of the config
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        dal.add_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "db",
+                "config": {"pool": {"min": 1, "max": 8}, "host": "db"},
+            },
+            execution_context=None,
+        )
+
+        one = dal.get_configs(
+            data={"service_id": service_id, "config_name": "db"},
+            execution_context={"projection": [["pool", "max"]]},
+        )
+        none_matching = dal.get_configs(
+            data={"service_id": service_id},
+            execution_context={"projection": [["missing"]]},
+        )
+
+        assert one[0]["config"] == {"pool": {"max": 8}}
+        assert one[0]["version"] == 1
+        assert none_matching[0]["config"] == {}
+
+
+class TestDynamodbReadConsistency:
+    def test_consumed_capacity_is_recorded_per_consistency(self):
+        """
+        Reads record their consumed capacity under their consistency
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        dal.add_configs(
+            data={"service_id": service_id, "config_name": "emails", "config": {}},
+            execution_context=None,
+        )
+        capacity_meter.reset()
+
+        for consistent_read in (True, False, None):
+            dal.get_configs(
+                data={"service_id": service_id, "config_name": "emails"},
+                execution_context={"consistent_read": consistent_read},
+            )
+        dal.batch_get_configs(
+            data={"keys": [(service_id, "emails")]},
+            execution_context={"consistent_read": True},
+        )
+
+        stats = capacity_meter.stats()
+        # The server-wide default is eventual consistency
+        assert stats["query"]["strong"]["requests"] == 1
+        assert stats["query"]["eventual"]["requests"] == 2
+        assert stats["batch_get_item"]["strong"]["requests"] == 1
+
+    def test_consumed_units(self):
+        """
+        Batch responses report the capacity per table
+        :return:
+        """
+        assert consumed_units({"ConsumedCapacity": {"CapacityUnits": 0.5}}) == 0.5
+        assert (
+            consumed_units(
+                {"ConsumedCapacity": [{"CapacityUnits": 1}, {"CapacityUnits": 2}]}
+            )
+            == 3
+        )
+        assert consumed_units({}) == 0
+
+
+class TestDynamodbCompression:
+    def test_large_configs_are_stored_compressed(self, monkeypatch):
+        """
+        Large configs are compressed in the table and read back transparently
+        :return:
+        """
+        monkeypatch.setenv("CONFIG_COMPRESSION_CODEC", "zlib")
+        monkeypatch.setenv("CONFIG_COMPRESSION_THRESHOLD_BYTES", "256")
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        key = {"service_id": service_id, "config_name": "routes"}
+        config = {"routes": [{"path": f"/api/v1/items/{i}"} for i in range(40)]}
+        dal.add_configs(data={**key, "config": config}, execution_context=None)
+
+        stored = dal.table.get_item(Key=key)["Item"]
+        read = dal.get_configs(data=key, execution_context=None)
+        projected = dal.get_configs(
+            data=key, execution_context={"projection": [["routes"]]}
+        )
+        patched = dal.patch_configs(
+            data={**key, "patch": {"routes": None}, "patch_type": "merge-patch"},
+            execution_context=None,
+        )
+
+        assert "config" not in stored and stored["config_codec"] == "zlib"
+        assert read[0]["config"] == config
+        assert projected[0]["config"] == config
+        assert patched["config"] == {}
+        # Small enough to be stored as a map again
+        assert "config_blob" not in dal.table.get_item(Key=key)["Item"]
+
+
+class TestDynamodbOffloading:
+    @staticmethod
+    def _large_config():
+        # Random strings, so that the config doesn't compress much
+        return {"keys": {f"key_{i}": uuid4().hex for i in range(60)}, "ratio": 0.5}
+
+    def test_large_configs_are_stored_as_chunks(self, monkeypatch):
+        """
+        Configs too large for an entry are split into chunk entries, read back
+        transparently and deleted once replaced
+        :return:
+        """
+        monkeypatch.setenv("CONFIG_ITEM_MAX_BYTES", "1024")
+        monkeypatch.setenv("CONFIG_CHUNK_SIZE_BYTES", "300")
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        key = {"service_id": service_id, "config_name": "secrets"}
+        config = self._large_config()
+        dal.add_configs(data={**key, "config": config}, execution_context=None)
+
+        manifest = dal.table.get_item(Key=key)["Item"]["config_manifest"]
+        chunks = dal.table.query(
+            KeyConditionExpression="service_id = :service_id",
+            ExpressionAttributeValues={":service_id": f"{service_id}#chunks"},
+        )["Items"]
+        read = dal.get_configs(data=key, execution_context=None)
+        listed = dal.get_configs(
+            data={"service_id": service_id}, execution_context=None
+        )
+        projected = dal.get_configs(
+            data=key, execution_context={"projection": [["ratio"]]}
+        )
+        patched = dal.patch_configs(
+            data={**key, "patch": {"keys": None}, "patch_type": "merge-patch"},
+            execution_context=None,
+        )
+
+        assert manifest["chunks"] == len(chunks) > 1
+        assert read[0]["config"] == config
+        assert [item["config_name"] for item in listed] == ["secrets"]
+        assert projected[0]["config"] == {"ratio": 0.5}
+        assert patched["config"] == {"ratio": 0.5}
+        # Small enough to be stored as a map again, the chunks are gone
+        assert "config_manifest" not in dal.table.get_item(Key=key)["Item"]
+        assert not dal.table.query(
+            KeyConditionExpression="service_id = :service_id",
+            ExpressionAttributeValues={":service_id": f"{service_id}#chunks"},
+        )["Items"]
+
+    def test_large_configs_can_be_stored_as_local_files(self, monkeypatch, tmp_path):
+        """
+        The local filesystem backend stores the offloaded configs as files
+        :return:
+        """
+        monkeypatch.setenv("CONFIG_ITEM_MAX_BYTES", "1024")
+        monkeypatch.setenv("CONFIG_OFFLOAD_BACKEND", "local")
+        monkeypatch.setenv("CONFIG_BLOB_DIR", str(tmp_path))
+        dal = DynamodbDAL()
+        key = {"service_id": uuid4().hex, "config_name": "secrets"}
+        first, second = self._large_config(), self._large_config()
+        dal.add_configs(data={**key, "config": first}, execution_context=None)
+        dal.update_configs(data={**key, "config": second}, execution_context=None)
+
+        read = dal.batch_get_configs(
+            data={"keys": [(key["service_id"], "secrets")]}, execution_context=None
+        )
+
+        assert read[0]["config"] == second
+        # The file of the replaced config is deleted
+        assert len(list(tmp_path.glob("*/*"))) == 1
+
+
+class TestDynamodbBatchWrite:
+    def test_batch_write_increments_the_versions_of_stored_configs(self):
+        """
+        The configs already stored are rewritten one by one, their version
+        incremented and their creation time kept, the new ones start at 1
+        :return:
+        """
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        dal.add_configs(
+            data={"service_id": service_id, "config_name": "emails", "config": {}},
+            execution_context=None,
+        )
+        before = dal.get_configs(
+            data={"service_id": service_id, "config_name": "emails"},
+            execution_context=None,
+        )[0]
+
+        dal.batch_add_configs(
+            data={
+                "items": [
+                    {"service_id": service_id, "config_name": name, "config": {"a": 1}}
+                    for name in ("emails", "flags")
+                ]
+            },
+            execution_context=None,
+        )
+        items = {
+            item["config_name"]: item
+            for item in dal.get_configs(
+                data={"service_id": service_id}, execution_context=None
+            )
+        }
+        heads = dal.get_service_heads(
+            data={"service_ids": [service_id]},
+            execution_context={"consistent_read": True},
+        )
+
+        assert items["emails"]["version"] == before["version"] + 1
+        assert items["emails"]["created_at"] == before["created_at"]
+        assert items["emails"]["config"] == {"a": 1}
+        assert items["flags"]["version"] == 1
+        assert heads == {service_id: 3}
+
+
+class TestDynamodbServiceHeads:
+    def test_every_write_bumps_the_head_of_the_service(self):
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        other_service_id = uuid4().hex
+        dal.add_configs(
+            data={"service_id": service_id, "config_name": "emails", "config": {}},
+            execution_context=None,
+        )
+        dal.update_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "config": {"a": 1},
+            },
+            execution_context=None,
+        )
+        dal.patch_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "patch": {"b": 2},
+                "patch_type": "merge-patch",
+            },
+            execution_context=None,
+        )
+        dal.batch_add_configs(
+            data={
+                "items": [
+                    {"service_id": service_id, "config_name": "flags", "config": {}},
+                    {"service_id": service_id, "config_name": "limits", "config": {}},
+                ]
+            },
+            execution_context=None,
+        )
+
+        heads = dal.get_service_heads(
+            data={"service_ids": [service_id, other_service_id]},
+            execution_context={"consistent_read": True},
+        )
+        configs = dal.get_configs(
+            data={"service_id": service_id}, execution_context=None
+        )
+
+        assert heads == {service_id: 5, other_service_id: 0}
+        assert sorted(item["config_name"] for item in configs) == [
+            "emails",
+            "flags",
+            "limits",
+        ]
+
+
+class TestDynamodbDeltaSync:
+    @staticmethod
+    def _add(dal, service_id: str, config_name: str, config: dict):
+        dal.add_configs(
+            data={
+                "service_id": service_id,
+                "config_name": config_name,
+                "config": config,
+            },
+            execution_context=None,
+        )
+
+    def test_changes_of_a_service_include_the_tombstones(self):
+        dal = DynamodbDAL()
+        service_id = uuid4().hex
+        self._add(dal, service_id, "emails", {})
+        self._add(dal, service_id, "flags", {})
+        self._add(dal, service_id, "limits", {})
+        since = modification_clock.now()
+        dal.update_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "config": {"a": 1},
+            },
+            execution_context=None,
+        )
+        tombstone = dal.delete_configs(
+            data={"service_id": service_id, "config_name": "flags"},
+            execution_context=None,
+        )
+
+        changes, last_modified_at, more = dal.get_config_changes(
+            data={"service_id": service_id}, execution_context={"since": since}
+        )
+        configs = dal.get_configs(
+            data={"service_id": service_id}, execution_context=None
+        )
+
+        assert [item["config_name"] for item in changes] == ["emails", "flags"]
+        assert changes[0]["config"] == {"a": 1}
+        assert changes[1]["deleted"] is True and "config" not in changes[1]
+        assert tombstone["version"] == 2
+        assert last_modified_at == changes[-1]["modified_at"]
+        assert more is False
+        assert sorted(item["config_name"] for item in configs) == ["emails", "limits"]
+
+    def test_a_deleted_config_is_missing_until_added_again(self):
+        dal = DynamodbDAL()
+        key = {"service_id": uuid4().hex, "config_name": "emails"}
+        self._add(dal, key["service_id"], "emails", {"a": 1})
+        dal.delete_configs(data=key, execution_context=None)
+
+        assert dal.delete_configs(data=key, execution_context=None) is None
+        assert (
+            dal.update_configs(data={**key, "config": {}}, execution_context=None)
+            is None
+        )
+        assert (
+            dal.patch_configs(
+                data={**key, "patch": {"b": 2}, "patch_type": "merge-patch"},
+                execution_context=None,
+            )
+            is None
+        )
+        assert dal.get_configs(data=key, execution_context=None) == []
+        assert (
+            dal.batch_get_configs(
+                data={"keys": [(key["service_id"], "emails")]}, execution_context=None
+            )
+            == []
+        )
+
+        self._add(dal, key["service_id"], "emails", {"b": 2})
+        items = dal.get_configs(data=key, execution_context=None)
+
+        assert items[0]["config"] == {"b": 2}
+        assert items[0]["version"] == 3
+        assert "deleted" not in items[0]
+
+    def test_changes_across_services_are_paged(self):
+        dal = DynamodbDAL()
+        service_ids = [uuid4().hex, uuid4().hex]
+        since = modification_clock.now()
+        for service_id in service_ids:
+            self._add(dal, service_id, "emails", {})
+        dal.batch_add_configs(
+            data={
+                "items": [
+                    {"service_id": service_ids[0], "config_name": "flags", "config": {}}
+                ]
+            },
+            execution_context=None,
+        )
+
+        first, last_modified_at, more = dal.get_config_changes(
+            data={}, execution_context={"since": since, "limit": 2}
+        )
+        rest, _, rest_more = dal.get_config_changes(
+            data={}, execution_context={"since": last_modified_at, "limit": 2}
+        )
+        changes = [
+            (item["service_id"], item["config_name"])
+            for item in first + rest
+            if item["service_id"] in service_ids
+        ]
+
+        assert more is True
+        assert changes == [
+            (service_ids[0], "emails"),
+            (service_ids[1], "emails"),
+            (service_ids[0], "flags"),
+        ]
+        assert rest_more is False
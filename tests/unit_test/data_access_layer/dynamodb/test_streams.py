@@ -0,0 +1,199 @@
+from botocore.exceptions import ClientError
+
+from adobe_config_mgmt_lib.dal.dynamodb.streams import (
+    TRIM_HORIZON,
+    ShardCheckpoints,
+    StreamReader,
+    stream_change,
+)
+
+STREAM_ARN = "arn:aws:dynamodb:us-west-2:000000000000:table/configs/stream/1"
+
+
+class FakeStreamsClient:
+    """
+    Replayable stand-in of the dynamodbstreams client, over recorded shards
+    """
+
+    def __init__(self):
+        self.shards = {}
+        self.sequence_number = 0
+
+    def add_shard(self, shard_id: str, parent_id: str = None):
+        self.shards[shard_id] = {
+            "parent": parent_id,
+            "records": [],
+            "closed": False,
+            "trimmed": 0,
+        }
+
+    def close_shard(self, shard_id: str):
+        self.shards[shard_id]["closed"] = True
+
+    def trim(self, shard_id: str, count: int):
+        # The first records are past the retention of the stream
+        self.shards[shard_id]["trimmed"] = count
+
+    def put(
+        self,
+        shard_id: str,
+        event_name: str,
+        service_id: str,
+        config_name: str,
+        new_image: dict = None,
+        ttl: bool = False,
+    ):
+        self.sequence_number += 1
+        record = {
+            "eventName": event_name,
+            "dynamodb": {
+                "Keys": {
+                    "service_id": {"S": service_id},
+                    "config_name": {"S": config_name},
+                },
+                "SequenceNumber": f"{self.sequence_number:021d}",
+            },
+        }
+        if new_image is not None:
+            record["dynamodb"]["NewImage"] = new_image
+        if ttl:
+            record["userIdentity"] = {"principalId": "dynamodb.amazonaws.com"}
+        self.shards[shard_id]["records"].append(record)
+
+    def describe_stream(self, StreamArn: str, ExclusiveStartShardId: str = None):
+        shard_ids = list(self.shards)
+        if ExclusiveStartShardId is not None:
+            shard_ids = shard_ids[shard_ids.index(ExclusiveStartShardId) + 1 :]
+        # A single shard per page, to go through the pagination
+        page = [
+            {"ShardId": shard_id, "ParentShardId": self.shards[shard_id]["parent"]}
+            for shard_id in shard_ids[:1]
+        ]
+        description = {"Shards": page}
+        if len(shard_ids) > 1:
+            description["LastEvaluatedShardId"] = shard_ids[0]
+        return {"StreamDescription": description}
+
+    def get_shard_iterator(
+        self,
+        StreamArn: str,
+        ShardId: str,
+        ShardIteratorType: str,
+        SequenceNumber: str = None,
+    ):
+        records = self.shards[ShardId]["records"]
+        if ShardIteratorType == TRIM_HORIZON:
+            position = self.shards[ShardId]["trimmed"]
+        elif ShardIteratorType == "LATEST":
+            position = len(records)
+        else:
+            position = 1 + [
+                record["dynamodb"]["SequenceNumber"] for record in records
+            ].index(SequenceNumber)
+        return {"ShardIterator": f"{ShardId}|{position}"}
+
+    def get_records(self, ShardIterator: str, Limit: int):
+        shard_id, position = ShardIterator.split("|")
+        shard = self.shards[shard_id]
+        if int(position) < shard["trimmed"]:
+            raise ClientError(
+                {"Error": {"Code": "TrimmedDataAccessException"}}, "GetRecords"
+            )
+        records = shard["records"][int(position) : int(position) + Limit]
+        position = int(position) + len(records)
+        response = {"Records": records}
+        if not shard["closed"] or position < len(shard["records"]):
+            response["NextShardIterator"] = f"{shard_id}|{position}"
+        return response
+
+
+def _config_names(records: list) -> list:
+    return [record["dynamodb"]["Keys"]["config_name"]["S"] for record in records]
+
+
+class TestStreamReader:
+    def test_children_are_read_after_their_parent_and_resume_from_checkpoints(
+        self, tmp_path
+    ):
+        checkpoint_path = str(tmp_path / "checkpoints.json")
+        client = FakeStreamsClient()
+        client.add_shard("parent")
+        client.add_shard("child", parent_id="parent")
+        client.put("parent", "INSERT", "emails", "a")
+        client.put("parent", "MODIFY", "emails", "b")
+        client.put("child", "MODIFY", "emails", "c")
+        client.close_shard("parent")
+        reader = StreamReader(
+            client,
+            STREAM_ARN,
+            ShardCheckpoints(checkpoint_path),
+            start_position=TRIM_HORIZON,
+        )
+
+        first = reader.read()
+        second = reader.read()
+        reader.checkpoints.save()
+        client.put("child", "MODIFY", "emails", "d")
+        resumed = StreamReader(client, STREAM_ARN, ShardCheckpoints(checkpoint_path))
+
+        assert _config_names(first) == ["a", "b"]
+        assert _config_names(second) == ["c"]
+        assert _config_names(resumed.read()) == ["d"]
+        assert reader.stats() == {"shards": 1, "records": 3}
+
+    def test_latest_skips_the_records_before_the_first_read(self):
+        client = FakeStreamsClient()
+        client.add_shard("shard")
+        client.put("shard", "INSERT", "emails", "old")
+        reader = StreamReader(client, STREAM_ARN, ShardCheckpoints())
+
+        assert reader.read() == []
+        client.put("shard", "INSERT", "emails", "new")
+        assert _config_names(reader.read()) == ["new"]
+
+    def test_trimmed_records_are_skipped_and_counted(self):
+        client = FakeStreamsClient()
+        client.add_shard("shard")
+        reader = StreamReader(
+            client, STREAM_ARN, ShardCheckpoints(), start_position=TRIM_HORIZON
+        )
+        client.put("shard", "INSERT", "emails", "a")
+        first = reader.read()
+        client.put("shard", "INSERT", "emails", "b")
+        client.put("shard", "INSERT", "emails", "c")
+        client.trim("shard", 2)
+
+        assert _config_names(first) == ["a"]
+        assert reader.read() == []
+        assert reader.trimmed == 1
+        assert _config_names(reader.read()) == ["c"]
+
+
+class TestStreamChange:
+    def test_only_the_changes_of_the_configs_are_kept(self):
+        client = FakeStreamsClient()
+        client.add_shard("shard")
+        client.put(
+            "shard", "MODIFY", "emails", "flags", new_image={"version": {"N": "3"}}
+        )
+        client.put(
+            "shard",
+            "MODIFY",
+            "emails",
+            "limits",
+            new_image={"version": {"N": "4"}, "deleted": {"BOOL": True}},
+        )
+        client.put("shard", "MODIFY", "emails#head", "head", new_image={})
+        client.put("shard", "REMOVE", "emails", "limits", ttl=True)
+        client.put("shard", "REMOVE", "emails", "quotas")
+
+        changes = [
+            stream_change(record) for record in client.shards["shard"]["records"]
+        ]
+
+        assert [
+            (change.config_name, change.version, change.deleted)
+            for change in changes
+            if change is not None
+        ] == [("flags", 3, False), ("limits", 4, True), ("quotas", None, True)]
+        assert changes[2] is None and changes[3] is None
@@ -0,0 +1,335 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from adobe_config_mgmt_lib.core.service_config.delta_sync import next_sync_version
+from adobe_config_mgmt_lib.dal.dynamodb.changes import modification_clock
+from adobe_config_mgmt_lib.dal.dynamodb.dynamodb_dal import DynamodbDAL
+from adobe_config_mgmt_lib.dal.exceptions import (
+    ConfigVersionConflictError,
+    PatchConflictError,
+)
+from adobe_config_mgmt_lib.dal.memory.memory_dal import InMemoryDAL
+from adobe_config_mgmt_lib.dal.sqlite.sqlite_dal import SqliteDAL
+
+"""
+The behaviour every backend of the data access layer has to share, run
+against each of them.
+"""
+
+
+@pytest.fixture(params=["dynamodb", "memory", "sqlite"])
+def dal(request, tmp_path):
+    if request.param == "dynamodb":
+        return DynamodbDAL()
+    if request.param == "memory":
+        return InMemoryDAL()
+    return SqliteDAL(str(tmp_path / "configs" / "configs.sqlite3"))
+
+
+@pytest.fixture
+def service_id():
+    return uuid4().hex
+
+
+def _add(dal, service_id, config_name, config):
+    return dal.add_configs(
+        data={"service_id": service_id, "config_name": config_name, "config": config},
+        execution_context=None,
+    )
+
+
+def _get(dal, service_id, config_name=None, execution_context=None):
+    data = {"service_id": service_id}
+    if config_name is not None:
+        data["config_name"] = config_name
+    return dal.get_configs(data=data, execution_context=execution_context)
+
+
+class TestBackendConformance:
+    def test_add_and_get(self, dal, service_id):
+        assert _add(dal, service_id, "emails", {"limits": {"daily": 10}}) is True
+        first = _get(dal, service_id, "emails")[0]
+        _add(dal, service_id, "emails", {"limits": {"daily": 20}})
+        second = _get(dal, service_id, "emails")[0]
+
+        assert second["config"] == {"limits": {"daily": 20}}
+        assert second["version"] == first["version"] + 1
+        assert second["created_at"] == first["created_at"]
+        assert second["modified_at"] >= first["modified_at"]
+        assert _get(dal, service_id, "missing") == []
+        assert _get(dal, uuid4().hex) == []
+
+    def test_projection(self, dal, service_id):
+        _add(dal, service_id, "emails", {"limits": {"daily": 10}, "to": ["a"]})
+
+        items = _get(dal, service_id, "emails", {"projection": [["limits", "daily"]]})
+
+        assert items[0]["config"] == {"limits": {"daily": 10}}
+
+    def test_pages_follow_the_config_names(self, dal, service_id):
+        for i in reversed(range(7)):
+            _add(dal, service_id, f"config-{i}", {"index": i})
+
+        pages = list(
+            dal.iter_config_pages(
+                data={"service_id": service_id}, execution_context={"limit": 3}
+            )
+        )
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [item["config_name"] for page in pages for item in page] == [
+            f"config-{i}" for i in range(7)
+        ]
+        assert len(_get(dal, service_id)) == 7
+
+    def test_batch_get(self, dal, service_id):
+        other_service_id = uuid4().hex
+        _add(dal, service_id, "emails", {"a": 1})
+        _add(dal, other_service_id, "flags", {"b": 2})
+
+        items = dal.batch_get_configs(
+            data={
+                "keys": [
+                    (service_id, "emails"),
+                    (other_service_id, "flags"),
+                    (service_id, "emails"),
+                    (service_id, "missing"),
+                ]
+            },
+            execution_context=None,
+        )
+
+        configs = {
+            (item["service_id"], item["config_name"]): item["config"] for item in items
+        }
+
+        assert len(items) == 2
+        assert configs == {
+            (service_id, "emails"): {"a": 1},
+            (other_service_id, "flags"): {"b": 2},
+        }
+
+    def test_batch_add_keeps_increasing_the_versions(self, dal, service_id):
+        _add(dal, service_id, "emails", {"a": 1})
+        _add(dal, service_id, "flags", {})
+        dal.delete_configs(
+            data={"service_id": service_id, "config_name": "flags"},
+            execution_context=None,
+        )
+        before = _get(dal, service_id, "emails")[0]
+
+        failed = dal.batch_add_configs(
+            data={
+                "items": [
+                    {"service_id": service_id, "config_name": name, "config": {"b": 2}}
+                    for name in ("emails", "flags", "limits")
+                ]
+            },
+            execution_context=None,
+        )
+        items = {item["config_name"]: item for item in _get(dal, service_id)}
+
+        assert failed == {}
+        assert items["emails"]["version"] == before["version"] + 1
+        assert items["emails"]["created_at"] == before["created_at"]
+        assert items["emails"]["config"] == {"b": 2}
+        # Added again after its deletion, its version goes on from the tombstone
+        assert items["flags"]["version"] == 3
+        assert items["limits"]["version"] == 1
+
+    def test_every_write_bumps_the_head_of_the_service(self, dal, service_id):
+        _add(dal, service_id, "emails", {})
+        dal.batch_add_configs(
+            data={
+                "items": [
+                    {"service_id": service_id, "config_name": "flags", "config": {}},
+                    {"service_id": service_id, "config_name": "limits", "config": {}},
+                ]
+            },
+            execution_context=None,
+        )
+        dal.update_configs(
+            data={"service_id": service_id, "config_name": "emails", "config": {}},
+            execution_context=None,
+        )
+        dal.delete_configs(
+            data={"service_id": service_id, "config_name": "flags"},
+            execution_context=None,
+        )
+        other_service_id = uuid4().hex
+
+        heads = dal.get_service_heads(
+            data={"service_ids": [service_id, other_service_id]},
+            execution_context=None,
+        )
+
+        assert heads == {service_id: 5, other_service_id: 0}
+
+    def test_update_checks_the_expected_version(self, dal, service_id):
+        _add(dal, service_id, "emails", {"a": 1})
+        key = {"service_id": service_id, "config_name": "emails"}
+        version = _get(dal, service_id, "emails")[0]["version"]
+
+        with pytest.raises(ConfigVersionConflictError):
+            dal.update_configs(
+                data={**key, "config": {"a": 2}},
+                execution_context={"expected_version": version + 1},
+            )
+        updated = dal.update_configs(
+            data={**key, "config": {"a": 3}},
+            execution_context={"expected_version": version},
+        )
+
+        assert updated["config"] == {"a": 3}
+        assert updated["version"] == version + 1
+        assert _get(dal, service_id, "emails")[0]["config"] == {"a": 3}
+        assert (
+            dal.update_configs(
+                data={"service_id": service_id, "config_name": "missing", "config": {}},
+                execution_context=None,
+            )
+            is None
+        )
+
+    def test_patch(self, dal, service_id):
+        _add(dal, service_id, "emails", {"limits": {"daily": 10}, "debug": True})
+        key = {"service_id": service_id, "config_name": "emails"}
+
+        patched = dal.patch_configs(
+            data={
+                **key,
+                "patch": {"limits": {"hourly": 1}, "debug": None},
+                "patch_type": "merge-patch",
+            },
+            execution_context=None,
+        )
+
+        assert patched["config"] == {"limits": {"daily": 10, "hourly": 1}}
+        assert _get(dal, service_id, "emails")[0]["config"] == patched["config"]
+        with pytest.raises(PatchConflictError):
+            dal.patch_configs(
+                data={
+                    **key,
+                    "patch": [{"op": "remove", "path": "/missing"}],
+                    "patch_type": "json-patch",
+                },
+                execution_context=None,
+            )
+        assert _get(dal, service_id, "emails")[0]["version"] == patched["version"]
+
+    def test_delete_leaves_a_tombstone_in_the_changes(self, dal, service_id):
+        _add(dal, service_id, "emails", {})
+        _add(dal, service_id, "flags", {})
+        since = modification_clock.now()
+        dal.update_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "emails",
+                "config": {"a": 1},
+            },
+            execution_context=None,
+        )
+        tombstone = dal.delete_configs(
+            data={"service_id": service_id, "config_name": "flags"},
+            execution_context=None,
+        )
+
+        changes, last_modified_at, more = dal.get_config_changes(
+            data={"service_id": service_id}, execution_context={"since": since}
+        )
+        first, _, first_more = dal.get_config_changes(
+            data={"service_id": service_id},
+            execution_context={"since": since, "limit": 1},
+        )
+
+        assert tombstone["version"] == 2
+        assert [item["config_name"] for item in changes] == ["emails", "flags"]
+        assert changes[0]["config"] == {"a": 1}
+        assert changes[1]["deleted"] is True and "config" not in changes[1]
+        assert last_modified_at == changes[-1]["modified_at"]
+        assert more is False
+        assert [item["config_name"] for item in first] == ["emails"]
+        assert first_more is True
+
+    @pytest.mark.parametrize("limit", [1, 2])
+    def test_changes_are_paged_to_the_end(self, dal, service_id, limit):
+        since = modification_clock.now()
+        _add(dal, service_id, "emails", {})
+        # Written at the same time, as by two replicas at once
+        with patch.object(
+            modification_clock, "now", return_value=modification_clock.now()
+        ):
+            for config_name in ("flags", "limits", "quotas"):
+                _add(dal, service_id, config_name, {})
+        _add(dal, service_id, "users", {})
+        _add(dal, service_id, "emails", {"a": 1})
+
+        changes = []
+        for _ in range(10):
+            page, last_modified_at, more = dal.get_config_changes(
+                data={"service_id": service_id},
+                execution_context={"since": since, "limit": limit},
+            )
+            changes.extend(item["config_name"] for item in page)
+            if not more:
+                break
+            since = next_sync_version(since, last_modified_at, more, 0)
+        else:
+            pytest.fail("The changes were not paged to the end")
+
+        assert sorted(changes[:3]) == ["flags", "limits", "quotas"]
+        assert changes[3:] == ["users", "emails"]
+
+    def test_a_deleted_config_is_missing(self, dal, service_id):
+        _add(dal, service_id, "emails", {})
+        _add(dal, service_id, "flags", {})
+
+        tombstone = dal.delete_configs(
+            data={"service_id": service_id, "config_name": "flags"},
+            execution_context=None,
+        )
+
+        assert tombstone["deleted"] is True and "config" not in tombstone
+        assert [item["config_name"] for item in _get(dal, service_id)] == ["emails"]
+        assert _get(dal, service_id, "flags") == []
+        assert (
+            dal.delete_configs(
+                data={"service_id": service_id, "config_name": "flags"},
+                execution_context=None,
+            )
+            is None
+        )
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_writes_are_not_lost(backend, tmp_path):
+    """
+    Patches racing on the same config all apply, each on the result of the other
+    """
+    if backend == "memory":
+        dal = InMemoryDAL()
+    else:
+        dal = SqliteDAL(str(tmp_path / "configs.sqlite3"))
+    service_id = uuid4().hex
+    _add(dal, service_id, "counters", {})
+
+    def patch(i):
+        return dal.patch_configs(
+            data={
+                "service_id": service_id,
+                "config_name": "counters",
+                "patch": {f"counter-{i}": i},
+                "patch_type": "merge-patch",
+            },
+            execution_context=None,
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(patch, range(40)))
+    item = _get(dal, service_id, "counters")[0]
+
+    assert item["config"] == {f"counter-{i}": i for i in range(40)}
+    assert item["version"] == 41
@@ -0,0 +1,91 @@
+import pytest
+
+from adobe_config_mgmt_lib.dal.config_patch import (
+    APPEND,
+    ASSERT_EXISTS,
+    JSON_PATCH,
+    MERGE_PATCH,
+    REMOVE,
+    SET,
+    InvalidPatchError,
+    apply_patch,
+    patch_operations,
+    validate_patch,
+)
+from adobe_config_mgmt_lib.dal.exceptions import PatchConflictError
+
+
+class TestApplyPatch:
+    def test_merge_patch(self):
+        config = {"a": 1, "b": {"c": 2, "d": 3}, "e": [1]}
+        patched = apply_patch(config, {"a": None, "b": {"c": 5}, "f": 6}, MERGE_PATCH)
+        assert patched == {"b": {"c": 5, "d": 3}, "e": [1], "f": 6}
+        assert config["a"] == 1
+
+    def test_json_patch(self):
+        config = {"a": {"b": [1, 3]}, "c": 1}
+        patch = [
+            {"op": "test", "path": "/c", "value": 1},
+            {"op": "add", "path": "/a/b/1", "value": 2},
+            {"op": "add", "path": "/a/b/-", "value": 4},
+            {"op": "move", "from": "/c", "path": "/d"},
+            {"op": "replace", "path": "/a~1x", "value": 0},
+        ]
+        with pytest.raises(PatchConflictError):
+            apply_patch(config, patch, JSON_PATCH)
+        patched = apply_patch(config, patch[:-1], JSON_PATCH)
+        assert patched == {"a": {"b": [1, 2, 3, 4]}, "d": 1}
+
+    def test_failed_test_operation(self):
+        with pytest.raises(PatchConflictError):
+            apply_patch(
+                {"a": 1}, [{"op": "test", "path": "/a", "value": 2}], JSON_PATCH
+            )
+
+    def test_invalid_patches(self):
+        with pytest.raises(InvalidPatchError):
+            validate_patch([], MERGE_PATCH)
+        with pytest.raises(InvalidPatchError):
+            validate_patch([{"op": "add", "path": "a", "value": 1}], JSON_PATCH)
+        with pytest.raises(InvalidPatchError):
+            validate_patch([{"op": "replace", "path": "/a"}], JSON_PATCH)
+
+
+class TestPatchOperations:
+    def test_merge_patch_operations(self):
+        operations = patch_operations({"a": None, "b": {"c": 1}}, MERGE_PATCH)
+        assert operations == [
+            (REMOVE, ["a"]),
+            (ASSERT_EXISTS, ["b"]),
+            (SET, ["b", "c"], 1),
+        ]
+
+    def test_json_patch_operations(self):
+        operations = patch_operations(
+            [{"op": "add", "path": "/a/-", "value": 1}, {"op": "remove", "path": "/b"}],
+            JSON_PATCH,
+        )
+        assert operations == [
+            (APPEND, ["a"], 1),
+            (ASSERT_EXISTS, ["b"]),
+            (REMOVE, ["b"]),
+        ]
+
+    def test_patches_needing_the_config(self):
+        # Array indexes, move and overlapping writes are applied in memory
+        assert patch_operations([{"op": "remove", "path": "/a/0"}], JSON_PATCH) is None
+        assert (
+            patch_operations([{"op": "move", "from": "/a", "path": "/b"}], JSON_PATCH)
+            is None
+        )
+        assert (
+            patch_operations(
+                [
+                    {"op": "add", "path": "/a", "value": {}},
+                    {"op": "add", "path": "/a/b", "value": 1},
+                ],
+                JSON_PATCH,
+            )
+            is None
+        )
+        assert patch_operations({"a": {}}, MERGE_PATCH) is None
@@ -0,0 +1,27 @@
+import pytest
+
+from adobe_config_mgmt_lib.dal.projection import parse_fields, project_item
+
+
+class TestProjection:
+    def test_parse_fields(self):
+        assert parse_fields(None) is None
+        assert parse_fields("db.pool, db, features") == [["db"], ["features"]]
+        with pytest.raises(ValueError):
+            parse_fields("db.")
+
+    def test_project_item(self):
+        item = {
+            "service_id": "s",
+            "config_name": "c",
+            "version": 2,
+            "config": {"db": {"pool": {"max": 8}, "host": "h"}, "debug": True},
+        }
+        projected = project_item(item, [["db", "pool"], ["missing", "key"]])
+        assert projected == {
+            "service_id": "s",
+            "config_name": "c",
+            "version": 2,
+            "config": {"db": {"pool": {"max": 8}}},
+        }
+        assert project_item(item, None) is item
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from adobe_config_mgmt_lib.dal.abstract_db_handler import AbstractDBHandler
+from adobe_config_mgmt_lib.dal.thread_pool.thread_pool_dal import ThreadPoolDAL
+
+BACKEND_LATENCY_SECONDS = 0.05
+
+
+class SlowDBHandler(AbstractDBHandler):
+    """
+    Simulates the round trip latency of a blocking DynamoDB call
+    """
+
+    def add_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return True
+
+    def get_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return [data]
+
+    def batch_add_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return {}
+
+    def batch_get_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return []
+
+    def get_config_page(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return [data], None
+
+    def get_service_heads(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return {}
+
+    def get_config_changes(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return [], None, False
+
+    def update_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return True
+
+    def patch_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return True
+
+    def delete_configs(self, data: dict, execution_context: dict):
+        time.sleep(BACKEND_LATENCY_SECONDS)
+        return True
+
+
+def _throughput(dal: ThreadPoolDAL, in_flight: int, total: int) -> float:
+    async def worker(request_ids):
+        for request_id in request_ids:
+            result = await dal.get_configs(
+                data={"service_id": str(request_id)}, execution_context=None
+            )
+            assert result == [{"service_id": str(request_id)}]
+
+    async def run():
+        await asyncio.gather(
+            *[worker(range(i, total, in_flight)) for i in range(in_flight)]
+        )
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    return total / (time.perf_counter() - started)
+
+
+class TestThreadPoolDAL:
+    def test_throughput_scales_with_in_flight_requests(self):
+        dal = ThreadPoolDAL(SlowDBHandler(), max_workers=64)
+        try:
+            sequential = _throughput(dal, in_flight=1, total=10)
+            concurrent = _throughput(dal, in_flight=50, total=200)
+        finally:
+            dal.shutdown()
+
+        # 50 in-flight requests would be serialised by a blocking call in the
+        # event loop; with the thread pool they overlap almost completely.
+        assert concurrent > sequential * 10
+
+    def test_event_loop_is_not_blocked(self):
+        dal = ThreadPoolDAL(SlowDBHandler(), max_workers=4)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.005)
+
+        async def run():
+            await asyncio.gather(
+                dal.get_configs(data={"service_id": "abc"}, execution_context=None),
+                ticker(),
+            )
+
+        try:
+            asyncio.run(run())
+        finally:
+            dal.shutdown()
+
+        assert ticks[-1] - ticks[0] < BACKEND_LATENCY_SECONDS